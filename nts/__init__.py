@@ -139,8 +139,17 @@ if TYPE_CHECKING:  # pragma: no cover
 	lang: str
 
 
-def init(site: str, sites_path: str = ".", new_site: bool = False, force: bool = False) -> None:
-	"""Initialize nts for the current site. Reset thread locals `nts.local`"""
+def init(
+	site: str,
+	sites_path: str = ".",
+	new_site: bool = False,
+	force: bool = False,
+	*,
+	cached_config: bool = False,
+) -> None:
+	"""Initialize nts for the current site. Reset thread locals `nts.local`
+
+	:param cached_config: Use site config cached in memory, it is always cached for web requests."""
 	if getattr(local, "initialised", None) and not force:
 		return
 
@@ -178,7 +187,9 @@ def init(site: str, sites_path: str = ".", new_site: bool = False, force: bool =
 	local.response_headers = Headers()
 	local.task_id = None
 
-	local.conf = get_site_config(sites_path=sites_path, site_path=site_path, cached=bool(nts.request))
+	local.conf = get_site_config(
+		sites_path=sites_path, site_path=site_path, cached=bool(nts.request) or cached_config
+	)
 	local.lang = local.conf.lang or "en"
 
 	local.module_app = None
@@ -257,6 +268,11 @@ def connect(site: str | None = None, db_name: str | None = None, set_admin_as_us
 		cur_db_name=db_name_,
 	)
 
+	if conf.route_reads_to_replicas:
+		from nts.database.replica import ReadReplicaRouter
+
+		local.db.read_router = ReadReplicaRouter(local.db)
+
 	if set_admin_as_user:
 		set_user("Administrator")
 
@@ -962,6 +978,17 @@ def _load_app_hooks(app_name: str | None = None):
 	return hooks
 
 
+def _load_warm_start_app_hooks():
+	from nts.utils import warm_start
+
+	apps = get_installed_apps(_ensure_on_bench=True)
+	hooks = warm_start.get_hooks(apps)
+	if hooks is None:
+		hooks = _load_app_hooks()
+		warm_start.set_hooks(apps, hooks)
+	return hooks
+
+
 _request_cached_load_app_hooks = request_cache(_load_app_hooks)
 _site_cached_load_app_hooks = site_cache(_load_app_hooks)
 
@@ -982,7 +1009,7 @@ def get_hooks(
 	else:
 		hooks = client_cache.get_value("app_hooks")
 		if hooks is None:
-			hooks = _load_app_hooks()
+			hooks = _load_warm_start_app_hooks()
 			client_cache.set_value("app_hooks", hooks)
 
 	if hook:
@@ -1025,6 +1052,8 @@ def setup_module_map(include_all_apps: bool = True) -> None:
 		app_modules = client_cache.get_value("installed_app_modules")
 
 	if not app_modules:
+		from nts.utils import warm_start
+
 		app_modules = {}
 
 		if include_all_apps:
@@ -1032,7 +1061,12 @@ def setup_module_map(include_all_apps: bool = True) -> None:
 		else:
 			apps = get_installed_apps(_ensure_on_bench=True)
 
+		cached_app_modules = {} if local.conf.developer_mode else warm_start.get_app_modules()
 		for app in apps:
+			if app in cached_app_modules:
+				app_modules[app] = cached_app_modules[app]
+				continue
+
 			app_modules.setdefault(app, [])
 			for module in get_module_list(app):
 				module = scrub(module)
@@ -1568,6 +1602,7 @@ from nts.config import get_common_site_config, get_conf, get_site_config
 from nts.core.doctype.system_settings.system_settings import get_system_settings
 from nts.model.document import (
 	get_doc,
+	get_docs,
 	get_lazy_doc,
 	copy_doc,
 	new_doc,
@@ -92,6 +92,23 @@ def freeze_gc():
 	_gc_frozen = True
 
 
+def preload_controllers(sites_path: str):
+	"""Import controllers of all doctypes in all apps.
+
+	When done in gunicorn master (started with `--preload`), forked workers share imported modules
+	copy-on-write (see `freeze_gc`) instead of each worker importing them on first use.
+	Enabled by setting `nts_PRELOAD_CONTROLLERS` environment variable."""
+	import importlib
+
+	from nts.utils.warm_start import get_controller_modules
+
+	for module in get_controller_modules(sites_path):
+		try:
+			importlib.import_module(module)
+		except Exception as e:
+			print(f"Failed to preload {module}: {e}", file=sys.stderr)
+
+
 def optimize_for_gil_contention():
 	if not os.environ.get("nts_PERF_PIN_WORKERS"):
 		return
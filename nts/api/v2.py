@@ -15,7 +15,7 @@ from werkzeug.routing import Rule
 
 import nts
 import nts.client
-from nts import _, cint, cstr, get_newargs, is_whitelisted
+from nts import _, cint, cstr, get_newargs, is_whitelisted, sbool
 from nts.core.doctype.server_script.server_script_utils import get_server_script_map
 from nts.handler import is_valid_http_method, run_server_script, upload_file
 
@@ -92,11 +92,16 @@ def document_list(doctype: str) -> list[dict[str, Any]]:
 		limit: Maximum number of records to fetch (default: 20)
 		group_by: Group by field
 		as_dict: Return results as dictionary (default: True)
+		stream: Stream the records as they are read from the database instead of buffering
+			the whole response, either `ndjson` or `json`. `limit=0` fetches all records.
 
 	Response:
 		nts.response["data"]: List of document records as dicts
 		nts.response["has_next_page"]: Indicates if more pages are available
 
+		When streaming as `json` the response has the same shape, `ndjson` responses contain one
+		record per line and no pagination info.
+
 	Controller Customization:
 		Doctype controllers can customize queries by implementing a static get_list(query) method
 		that receives a QueryBuilder object and returns a modified QueryBuilder.
@@ -123,6 +128,12 @@ def document_list(doctype: str) -> list[dict[str, Any]]:
 	group_by: str | None = args.get("group_by", None)
 	debug: bool = args.get("debug", False)
 	as_dict: bool = args.get("as_dict", True)
+	stream: str | None = args.get("stream", None)
+
+	if stream:
+		as_dict = sbool(as_dict)
+		# Unlimited exports are only allowed when records aren't buffered
+		limit = limit or None
 
 	query = nts.qb.get_query(
 		table=doctype,
@@ -130,7 +141,7 @@ def document_list(doctype: str) -> list[dict[str, Any]]:
 		filters=filters,
 		order_by=order_by,
 		offset=start,
-		limit=limit + 1,  # Fetch one extra to check if there's a next page
+		limit=limit + 1 if limit is not None else None,  # Fetch one extra to check if there's a next page
 		group_by=group_by,
 		ignore_permissions=False,
 	)
@@ -155,11 +166,30 @@ def document_list(doctype: str) -> list[dict[str, Any]]:
 		except Exception as e:
 			nts.throw(_("Error in {0}.get_list: {1}").format(doctype, str(e)))
 
+	if stream:
+		return stream_document_list(query, limit, as_dict, stream)
+
 	data = query.run(as_dict=as_dict, debug=debug)
 	nts.response["has_next_page"] = len(data) > limit
 	return data[:limit]
 
 
+def stream_document_list(query, limit: int | None, as_dict: bool, stream_format: str):
+	from nts.utils.response import as_stream
+
+	pagination = {"has_next_page": False}
+
+	def rows():
+		with nts.db.unbuffered_cursor():
+			for index, row in enumerate(query.run(as_dict=as_dict, as_list=not as_dict, as_iterator=True)):
+				if limit and index >= limit:
+					pagination["has_next_page"] = True
+					break
+				yield row
+
+	return as_stream(rows(), stream_format, trailer=lambda: pagination)
+
+
 def count(doctype: str) -> int:
 	from nts.desk.reportview import get_count
 
@@ -65,6 +65,9 @@ import nts.website.path_resolver  # all the page types and resolver
 import nts.website.router  # Website router
 import nts.website.website_generator  # web page doctypes
 
+if os.environ.get("nts_PRELOAD_CONTROLLERS"):
+	nts._optimizations.preload_controllers(_sites_path)
+
 # end: module pre-loading
 
 # better werkzeug default
@@ -27,11 +27,9 @@ class Reminder(Document):
 
 	@staticmethod
 	def clear_old_logs(days=30):
-		from nts.query_builder import Interval
-		from nts.query_builder.functions import Now
+		from nts.core.doctype.log_settings.log_settings import purge_old_logs
 
-		table = nts.qb.DocType("Reminder")
-		nts.db.delete(table, filters=(table.remind_at < (Now() - Interval(days=days))))
+		purge_old_logs("Reminder", days, date_field="remind_at")
 
 	def validate(self):
 		self.user = nts.session.user
@@ -4,11 +4,17 @@
 bootstrap client session
 """
 
+import hashlib
 import os
+import time
+from collections.abc import Callable
+from contextlib import contextmanager
+from typing import Any, NamedTuple
 
 import nts
 import nts.defaults
 import nts.desk.desk_page
+from nts import _
 from nts.core.doctype.installed_applications.installed_applications import (
 	get_setup_wizard_completed_apps,
 )
@@ -21,6 +27,7 @@ from nts.desk.form.load import get_meta_bundle
 from nts.email.inbox import get_email_accounts
 from nts.integrations.nts_providers.ntscloud_billing import is_fc_site
 from nts.model.base_document import get_controller
+from nts.monitor import add_data_to_monitor
 from nts.permissions import has_permission
 from nts.query_builder import DocType
 from nts.query_builder.functions import Count
@@ -39,47 +46,54 @@ def get_bootinfo():
 	bootinfo = nts._dict()
 	hooks = nts.get_hooks()
 	doclist = []
-
-	# user
-	get_user(bootinfo)
-	# desktop icon info
-
-	# system info
-	bootinfo.sitename = nts.local.site
-	bootinfo.sysdefaults = nts.defaults.get_defaults()
-	bootinfo.sysdefaults["setup_complete"] = nts.is_setup_complete()
-
-	bootinfo.server_date = nts.utils.nowdate()
-
-	if nts.session["user"] != "Guest":
-		bootinfo.user_info = get_user_info()
-
-	bootinfo.modules = {}
-	bootinfo.module_list = []
-	load_desktop_data(bootinfo)
-	bootinfo.desktop_icons = get_desktop_icons(bootinfo=bootinfo)
-	bootinfo.letter_heads = get_letter_heads()
-	bootinfo.active_domains = nts.get_active_domains()
-	bootinfo.all_domains = [d.get("name") for d in nts.get_all("Domain")]
-	add_layouts(bootinfo)
-
-	bootinfo.module_app = nts.local.module_app
-	bootinfo.single_types = [d.name for d in nts.get_all("DocType", {"issingle": 1})]
-	bootinfo.nested_set_doctypes = [
-		d.parent for d in nts.get_all("DocField", {"fieldname": "lft"}, ["parent"])
-	]
-	add_home_page(bootinfo, doclist)
-	bootinfo.page_info = get_allowed_pages()
-	load_translations(bootinfo)
-	add_timezone_info(bootinfo)
-	load_conf_settings(bootinfo)
-	load_print(bootinfo, doclist)
-	doclist.extend(get_meta_bundle("Page"))
-	bootinfo.home_folder = nts.db.get_value("File", {"is_home_folder": 1})
-	bootinfo.navbar_settings = get_navbar_settings()
-	bootinfo.notification_settings = get_notification_settings()
-	bootinfo.onboarding_tours = get_onboarding_ui_tours()
-	set_time_zone(bootinfo)
+	timings = {}
+
+	with timed_section(timings, "user"):
+		get_user(bootinfo)
+		if nts.session["user"] != "Guest":
+			bootinfo.user_info = get_user_info()
+
+	with timed_section(timings, "system"):
+		bootinfo.sitename = nts.local.site
+		bootinfo.sysdefaults = nts.defaults.get_defaults()
+		bootinfo.sysdefaults["setup_complete"] = nts.is_setup_complete()
+		bootinfo.server_date = nts.utils.nowdate()
+		bootinfo.active_domains = nts.get_active_domains()
+		bootinfo.all_domains = [d.get("name") for d in nts.get_all("Domain")]
+		bootinfo.module_app = nts.local.module_app
+		bootinfo.single_types = [d.name for d in nts.get_all("DocType", {"issingle": 1})]
+		bootinfo.nested_set_doctypes = [
+			d.parent for d in nts.get_all("DocField", {"fieldname": "lft"}, ["parent"])
+		]
+		add_timezone_info(bootinfo)
+		load_conf_settings(bootinfo)
+		set_time_zone(bootinfo)
+
+	with timed_section(timings, "desktop"):
+		bootinfo.modules = {}
+		bootinfo.module_list = []
+		load_desktop_data(bootinfo)
+		bootinfo.desktop_icons = get_desktop_icons(bootinfo=bootinfo)
+		add_layouts(bootinfo)
+		add_home_page(bootinfo, doclist)
+
+	with timed_section(timings, "pages"):
+		bootinfo.page_info = get_allowed_pages()
+
+	with timed_section(timings, "translations"):
+		load_translations(bootinfo)
+		bootinfo.lang_dict = get_lang_dict()
+		bootinfo.translated_doctypes = get_translated_doctypes()
+
+	with timed_section(timings, "print"):
+		load_print(bootinfo, doclist)
+
+	with timed_section(timings, "settings"):
+		doclist.extend(get_meta_bundle("Page"))
+		bootinfo.home_folder = nts.db.get_value("File", {"is_home_folder": 1})
+		bootinfo.navbar_settings = get_navbar_settings()
+		bootinfo.notification_settings = get_notification_settings()
+		bootinfo.onboarding_tours = get_onboarding_ui_tours()
 
 	# ipinfo
 	if nts.session.data.get("ipinfo"):
@@ -87,47 +101,64 @@ def get_bootinfo():
 
 	# add docs
 	bootinfo.docs = doclist
-	load_country_doc(bootinfo)
-	load_currency_docs(bootinfo)
+	with timed_section(timings, "docs"):
+		load_country_doc(bootinfo)
+		load_currency_docs(bootinfo)
 
-	for method in hooks.boot_session or []:
-		nts.get_attr(method)(bootinfo)
+	# sections loaded after desk, see `get_boot_section`
+	bootinfo.lazy_boot_sections = list(LAZY_BOOT_SECTIONS)
+	for name, section in LAZY_BOOT_SECTIONS.items():
+		bootinfo[name] = section.default()
+
+	with timed_section(timings, "boot_session"):
+		for method in hooks.boot_session or []:
+			nts.get_attr(method)(bootinfo)
 
 	if bootinfo.lang:
 		bootinfo.lang = str(bootinfo.lang)
 	bootinfo.versions = {k: v["version"] for k, v in get_versions().items()}
 
-	bootinfo.error_report_email = nts.conf.error_report_email
-	bootinfo.calendars = sorted(nts.get_hooks("calendars"))
-	bootinfo.treeviews = nts.get_hooks("treeviews") or []
-	bootinfo.lang_dict = get_lang_dict()
-	bootinfo.success_action = get_success_action()
-	bootinfo.update(get_email_accounts(user=nts.session.user))
-	bootinfo.sms_gateway_enabled = bool(nts.db.get_single_value("SMS Settings", "sms_gateway_url"))
-	bootinfo.frequently_visited_links = frequently_visited_links()
-	bootinfo.link_preview_doctypes = get_link_preview_doctypes()
-	bootinfo.additional_filters_config = get_additional_filters_from_hooks()
-	bootinfo.desk_settings = get_desk_settings()
-	bootinfo.app_logo_url = get_app_logo()
-	bootinfo.link_title_doctypes = get_link_title_doctypes()
-	bootinfo.translated_doctypes = get_translated_doctypes()
-	bootinfo.subscription_conf = add_subscription_conf()
-	bootinfo.marketplace_apps = get_marketplace_apps()
-	bootinfo.is_fc_site = is_fc_site()
-	bootinfo.changelog_feed = get_changelog_feed_items()
-	bootinfo.enable_address_autocompletion = nts.db.get_single_value(
-		"Geolocation Settings", "enable_address_autocompletion"
-	)
+	with timed_section(timings, "other"):
+		bootinfo.error_report_email = nts.conf.error_report_email
+		bootinfo.calendars = sorted(nts.get_hooks("calendars"))
+		bootinfo.treeviews = nts.get_hooks("treeviews") or []
+		bootinfo.update(get_email_accounts(user=nts.session.user))
+		bootinfo.sms_gateway_enabled = bool(nts.db.get_single_value("SMS Settings", "sms_gateway_url"))
+		bootinfo.link_preview_doctypes = get_link_preview_doctypes()
+		bootinfo.additional_filters_config = get_additional_filters_from_hooks()
+		bootinfo.desk_settings = get_desk_settings()
+		bootinfo.app_logo_url = get_app_logo()
+		bootinfo.link_title_doctypes = get_link_title_doctypes()
+		bootinfo.subscription_conf = add_subscription_conf()
+		bootinfo.is_fc_site = is_fc_site()
+		bootinfo.enable_address_autocompletion = nts.db.get_single_value(
+			"Geolocation Settings", "enable_address_autocompletion"
+		)
+
+		if sentry_dsn := get_sentry_dsn():
+			bootinfo.sentry_dsn = sentry_dsn
 
-	if sentry_dsn := get_sentry_dsn():
-		bootinfo.sentry_dsn = sentry_dsn
+		bootinfo.setup_wizard_completed_apps = get_setup_wizard_completed_apps() or []
+		bootinfo.desktop_icon_urls = get_desktop_icon_urls()
+		bootinfo.desktop_icon_style = get_icon_style() or "Subtle"
+
+	add_data_to_monitor(boot_timings=timings)
+	if nts.conf.developer_mode:
+		bootinfo.boot_timings = timings
 
-	bootinfo.setup_wizard_completed_apps = get_setup_wizard_completed_apps() or []
-	bootinfo.desktop_icon_urls = get_desktop_icon_urls()
-	bootinfo.desktop_icon_style = get_icon_style() or "Subtle"
 	return bootinfo
 
 
+@contextmanager
+def timed_section(timings: dict, section: str):
+	"""Record time taken (in ms) to build a section of boot info."""
+	start = time.monotonic()
+	try:
+		yield
+	finally:
+		timings[section] = round((time.monotonic() - start) * 1000, 2)
+
+
 def get_icon_style():
 	icon_style = nts.db.get_single_value("Desktop Settings", "icon_style")
 	if icon_style not in ["Subtle", "Solid"]:
@@ -631,3 +662,66 @@ def add_user_specific_sidebar(sidebar_items):
 			sidebar_items[sidebar_name] = sidebar_items.pop(sidebar)
 		except KeyError:
 			pass
+
+
+class BootSection(NamedTuple):
+	loader: Callable
+	# value used in boot info until the section is loaded
+	default: Callable = list
+	# seconds for which a built section is cached
+	ttl: int = 6 * 60 * 60
+
+
+# Sections of boot info which aren't required to render desk. These are cached separately for
+# every user and fetched by client using `get_boot_section` after desk has loaded.
+LAZY_BOOT_SECTIONS: dict[str, BootSection] = {
+	"changelog_feed": BootSection(get_changelog_feed_items),
+	"frequently_visited_links": BootSection(frequently_visited_links, ttl=60 * 60),
+	"letter_heads": BootSection(get_letter_heads, default=dict),
+	"marketplace_apps": BootSection(get_marketplace_apps),
+	"success_action": BootSection(get_success_action),
+}
+
+
+@nts.whitelist(methods=["GET"])
+def get_boot_section(section: str):
+	"""Return a section of boot info which is loaded after desk, see `LAZY_BOOT_SECTIONS`.
+
+	Response has an ETag, so that browser can revalidate the section instead of downloading it again."""
+	if section not in LAZY_BOOT_SECTIONS:
+		nts.throw(_("Invalid boot section: {0}").format(section))
+
+	etag, value = get_cached_boot_section(section)
+	nts.local.response_headers.set("ETag", f'"{etag}"')
+	nts.local.response_headers.set("Cache-Control", "private,no-cache")
+
+	if nts.request and nts.request.if_none_match.contains(etag):
+		nts.local.response["http_status_code"] = 304
+		return
+
+	return value
+
+
+def get_cached_boot_section(section: str) -> tuple[str, Any]:
+	"""Return ETag and value of a section of boot info for current user."""
+	key = get_boot_section_key(section)
+	if cached := nts.cache.get_value(key, user=True):
+		return cached
+
+	timings = {}
+	with timed_section(timings, section):
+		value = LAZY_BOOT_SECTIONS[section].loader()
+	add_data_to_monitor(boot_timings=timings)
+
+	etag = hashlib.sha1(nts.as_json(value).encode(), usedforsecurity=False).hexdigest()
+	nts.cache.set_value(key, (etag, value), user=True, expires_in_sec=LAZY_BOOT_SECTIONS[section].ttl)
+	return etag, value
+
+
+def get_boot_section_key(section: str) -> str:
+	return f"bootinfo::{section}"
+
+
+def clear_boot_section(section: str):
+	"""Clear cached section of boot info for all users."""
+	nts.cache.delete_keys(f"user:*:{get_boot_section_key(section)}")
@@ -74,12 +74,14 @@ doctype_cache_keys = (
 wildcard_keys = (
 	"document_cache::*",
 	"table_columns::*",
+	"permission_matrix::*",
 	*doctype_map_keys,
 )
 
 
 def clear_user_cache(user=None):
 	from nts.desk.notifications import clear_notifications
+	from nts.realtime import clear_permission_cache
 
 	# this will automatically reload the global cache
 	# so it is important to clear this first
@@ -89,8 +91,10 @@ def clear_user_cache(user=None):
 		nts.cache.hdel_names(user_cache_keys, user)
 		nts.cache.delete_keys("user:" + user)
 		clear_defaults_cache(user)
+		clear_permission_cache(user)
 	else:
 		nts.cache.delete_key(user_cache_keys)
+		nts.cache.delete_keys("user:*:bootinfo::")
 		clear_defaults_cache()
 		clear_global_cache()
 
@@ -101,24 +105,28 @@ def clear_domain_cache(user=None):
 
 
 def clear_global_cache():
+	from nts.utils import warm_start
 	from nts.website.utils import clear_website_cache
 
 	clear_doctype_cache()
 	clear_website_cache()
 	nts.cache.delete_value(global_cache_keys + bench_cache_keys)
+	warm_start.clear()
 	nts.setup_module_map()
 
 
 def clear_defaults_cache(user=None):
 	if user:
-		for key in [user, *common_default_keys]:
-			nts.client_cache.delete_value(f"defaults::{key}")
+		nts.client_cache.delete_value([f"defaults::{key}" for key in [user, *common_default_keys]])
 	elif nts.flags.in_install != "nts":
 		nts.client_cache.delete_keys("defaults::*")
 
 
 def clear_doctype_cache(doctype=None):
+	from nts.realtime import clear_permission_cache
+
 	clear_controller_cache(doctype)
+	clear_permission_cache()
 	nts.client_cache.erase_persistent_caches(doctype=doctype)
 
 	_clear_doctype_cache_from_redis(doctype)
@@ -301,7 +309,7 @@ def clear_cache(user: str | None = None, doctype: str | None = None):
 			nts.get_attr(fn)()
 
 	if (not doctype and not user) or doctype == "DocType":
-		nts.utils.caching._SITE_CACHE.clear()
+		nts.utils.caching.clear_site_cache()
 		nts.client_cache.clear_cache()
 
 	nts.local.role_permissions = {}
@@ -34,6 +34,7 @@ def main(
 	debug_exceptions: tuple[Exception] | None = None,
 	selected_categories: list[str] | None = None,
 	lightmode: bool = False,
+	n_plus_one_threshold: int | None = None,
 ) -> None:
 	"""Main function to run tests"""
 	if lightmode:
@@ -107,6 +108,7 @@ def main(
 		"debug_exceptions",
 		"debug",
 		"selected_categories",
+		"n_plus_one_threshold",
 	]:
 		param_value = locals()[param_name]
 		if param_value is not None:
@@ -132,6 +134,7 @@ def main(
 		pdb_on_exceptions=debug_exceptions,
 		selected_categories=selected_categories or [],
 		skip_before_tests=skip_before_tests,
+		n_plus_one_threshold=n_plus_one_threshold,
 	)
 
 	_initialize_test_environment(site, test_config)
@@ -294,6 +297,12 @@ def _get_doctypes_for_module_def(app, module_def):
 	help="Select test category to run",
 )
 @click.option("--lightmode", is_flag=True, default=False)
+@click.option(
+	"--fail-on-n-plus-one",
+	"n_plus_one_threshold",
+	type=int,
+	help="Fail tests which run a query of same shape from the same line more than this many times",
+)
 @pass_context
 def run_tests(
 	context: CliCtxObj,
@@ -313,6 +322,7 @@ def run_tests(
 	test_category="all",
 	lightmode=False,
 	debug=False,
+	n_plus_one_threshold=None,
 ):
 	"""Run python unit-tests"""
 
@@ -357,6 +367,7 @@ def run_tests(
 			debug=debug,
 			selected_categories=[] if test_category == "all" else test_category,
 			lightmode=lightmode,
+			n_plus_one_threshold=n_plus_one_threshold,
 		)
 
 
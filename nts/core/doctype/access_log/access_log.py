@@ -30,11 +30,9 @@ class AccessLog(Document):
 
 	@staticmethod
 	def clear_old_logs(days=30):
-		from nts.query_builder import Interval
-		from nts.query_builder.functions import Now
+		from nts.core.doctype.log_settings.log_settings import purge_old_logs
 
-		table = nts.qb.DocType("Access Log")
-		nts.db.delete(table, filters=(table.creation < (Now() - Interval(days=days))))
+		purge_old_logs("Access Log", days)
 
 
 @nts.whitelist()
@@ -2,10 +2,9 @@
 # License: MIT. See LICENSE
 
 import nts
+from nts.core.doctype.log_settings.log_settings import purge_old_logs
 from nts.core.utils import set_timeline_doc
 from nts.model.document import Document
-from nts.query_builder import DocType, Interval
-from nts.query_builder.functions import Now
 from nts.utils import get_fullname, now, strip_html
 
 
@@ -59,8 +58,7 @@ class ActivityLog(Document):
 	def clear_old_logs(days=None):
 		if not days:
 			days = 90
-		doctype = DocType("Activity Log")
-		nts.db.delete(doctype, filters=(doctype.creation < (Now() - Interval(days=days))))
+		purge_old_logs("Activity Log", days)
 
 
 def on_doctype_update():
@@ -37,6 +37,9 @@ class CustomDocPerm(Document):
 	def on_update(self):
 		nts.clear_cache(doctype=self.parent)
 
+	def on_trash(self):
+		nts.clear_cache(doctype=self.parent)
+
 	def get_permission_log_options(self, event=None):
 		return {"for_doctype": "DocType", "for_document": self.parent}
 
@@ -4,6 +4,7 @@
 import nts
 from nts import _
 from nts.model.document import Document
+from nts.realtime import clear_permission_cache
 from nts.utils import cint, get_fullname
 
 exclude_from_linked_with = True
@@ -80,6 +81,9 @@ class DocShare(Document):
 				"Shared", _("{0} shared this document with {1}").format(owner, get_fullname(self.user))
 			)
 
+	def on_update(self):
+		self.clear_permission_cache()
+
 	def on_trash(self):
 		if not self.flags.ignore_share_permission:
 			self.check_share_permission()
@@ -90,6 +94,10 @@ class DocShare(Document):
 				get_fullname(self.owner), get_fullname(self.user)
 			),
 		)
+		self.clear_permission_cache()
+
+	def clear_permission_cache(self):
+		clear_permission_cache(None if self.everyone else self.user)
 
 
 def on_doctype_update():
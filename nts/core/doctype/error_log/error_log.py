@@ -2,9 +2,8 @@
 # License: MIT. See LICENSE
 
 import nts
+from nts.core.doctype.log_settings.log_settings import purge_old_logs
 from nts.model.document import Document
-from nts.query_builder import Interval
-from nts.query_builder.functions import Now
 
 
 class ErrorLog(Document):
@@ -40,8 +39,7 @@ class ErrorLog(Document):
 
 	@staticmethod
 	def clear_old_logs(days=30):
-		table = nts.qb.DocType("Error Log")
-		nts.db.delete(table, filters=(table.creation < (Now() - Interval(days=days))))
+		purge_old_logs("Error Log", days)
 
 
 @nts.whitelist()
@@ -1,15 +1,21 @@
 # Copyright (c) 2020, nts Technologies and contributors
 # License: MIT. See LICENSE
 
+import gzip
+import os
+import time
 from typing import Protocol, runtime_checkable
 
 import nts
 from nts import _
 from nts.model.base_document import get_controller
 from nts.model.document import Document
-from nts.utils import cint
+from nts.utils import add_days, cint, now_datetime, nowdate
 from nts.utils.caching import site_cache
 
+PURGE_CHUNK_SIZE = 5000  # Logs deleted in one transaction by `purge_old_logs`
+PURGE_TIME_BUDGET = 60  # Seconds spent on purging a log type in one run, rest is purged in next run
+
 
 @runtime_checkable
 class LogType(Protocol):
@@ -147,6 +153,85 @@ def get_log_doctypes(doctype, txt, searchfield, start, page_len, filters):
 	return supported_doctypes[start:page_len]
 
 
+def purge_old_logs(
+	doctype: str,
+	days: int,
+	*,
+	date_field: str = "creation",
+	child_doctypes: tuple[str, ...] = (),
+	chunk_size: int = PURGE_CHUNK_SIZE,
+	time_budget: float | None = None,
+) -> int:
+	"""Delete logs of `doctype` where `date_field` is older than `days` and return count of deleted logs.
+
+	A single DELETE of all old logs locks large tables and stalls replicas for a long time, so logs are
+	deleted by primary key in chunks of `chunk_size`, each chunk in its own transaction. Purging stops
+	after `time_budget` seconds and waits while replicas lag behind. Child rows of `child_doctypes` are
+	deleted with their parents.
+
+	Site config:
+
+		"log_purge_time_budget": 60,  # seconds
+		"log_purge_max_replica_lag": 10,  # seconds, 0 = don't wait for replicas
+		"archive_purged_logs": 1,  # append purged logs to gzipped JSON lines files in private/log_archive
+	"""
+	from nts.database.replica import DEFAULT_MAX_LAG, ReadReplicaRouter
+
+	conf = nts.local.conf
+	deadline = time.monotonic() + (time_budget or conf.get("log_purge_time_budget") or PURGE_TIME_BUDGET)
+	max_replica_lag = conf.get("log_purge_max_replica_lag", DEFAULT_MAX_LAG)
+	replica_router = ReadReplicaRouter(nts.db) if max_replica_lag else None
+
+	table = nts.qb.DocType(doctype)
+	cutoff = add_days(now_datetime(), -days)
+	query = (
+		nts.qb.from_(table)
+		.select(table.name)
+		.where(table[date_field] < cutoff)
+		.orderby(table[date_field])
+		.limit(chunk_size)
+	)
+
+	deleted = 0
+	try:
+		while time.monotonic() < deadline and (names := query.run(pluck=True)):
+			if conf.get("archive_purged_logs"):
+				archive_logs(doctype, names)
+			for child_doctype in child_doctypes:
+				nts.db.delete(child_doctype, {"parent": ("in", names), "parenttype": doctype})
+			nts.db.delete(doctype, {"name": ("in", names)})
+			nts.db.commit()
+			deleted += len(names)
+
+			if replica_router and replica_router.replicas:
+				wait_for_replicas(replica_router, max_replica_lag, deadline)
+	finally:
+		if replica_router:
+			replica_router.close()
+
+	return deleted
+
+
+def wait_for_replicas(router, max_lag: float, deadline: float):
+	while time.monotonic() < deadline:
+		lags = [router.check_lag(replica) for replica in router.replicas]
+		# `None` if replication isn't running, waiting won't help
+		if all(lag is None or lag <= max_lag for lag in lags):
+			return
+		time.sleep(1)
+
+
+def archive_logs(doctype: str, names: list[str]):
+	"""Append logs to archive of the log type for today, one JSON object per line."""
+	archive_path = nts.get_site_path("private", "log_archive")
+	os.makedirs(archive_path, exist_ok=True)
+
+	logs = nts.get_all(doctype, filters={"name": ("in", names)}, fields="*", order_by="name")
+	with gzip.open(os.path.join(archive_path, f"{nts.scrub(doctype)}-{nowdate()}.jsonl.gz"), "at") as f:
+		for log in logs:
+			f.write(nts.as_json(log, indent=None) + "\n")
+
+
 def clear_log_table(doctype, days=90):
 	"""If any logtype table grows too large then clearing it with DELETE query
 	is not feasible in reasonable time. This command copies recent data to new
@@ -1,12 +1,20 @@
 # Copyright (c) 2022, nts Technologies and Contributors
 # License: MIT. See LICENSE
 
+import gzip
+import json
+import os
 from datetime import datetime
+from unittest.mock import patch
 
 import nts
-from nts.core.doctype.log_settings.log_settings import _supports_log_clearing, run_log_clean_up
+from nts.core.doctype.log_settings.log_settings import (
+	_supports_log_clearing,
+	purge_old_logs,
+	run_log_clean_up,
+)
 from nts.tests import IntegrationTestCase
-from nts.utils import add_to_date, now_datetime
+from nts.utils import add_to_date, now_datetime, nowdate
 
 
 class TestLogSettings(IntegrationTestCase):
@@ -56,6 +64,27 @@ class TestLogSettings(IntegrationTestCase):
 		self.assertEqual(error_log_count, 0)
 		self.assertEqual(email_queue_count, 0)
 
+	def test_purge_old_logs(self):
+		past = add_to_date(now_datetime(), days=-4)
+		old_logs = []
+		for _ in range(3):
+			error_log = nts.get_doc({"doctype": "Error Log", "method": "test_method", "error": "traceback"})
+			error_log.insert(ignore_permissions=True).db_set("creation", past)
+			old_logs.append(error_log.name)
+		recent_log = nts.get_doc({"doctype": "Error Log", "method": "test_method", "error": "traceback"})
+		recent_log.insert(ignore_permissions=True)
+
+		archive = nts.get_site_path("private", "log_archive", f"error_log-{nowdate()}.jsonl.gz")
+		self.addCleanup(lambda: os.path.exists(archive) and os.remove(archive))
+		with patch.dict(nts.conf, {"archive_purged_logs": 1}):
+			self.assertGreaterEqual(purge_old_logs("Error Log", 1, chunk_size=2), 3)
+
+		self.assertFalse(nts.db.exists("Error Log", {"name": ("in", old_logs)}))
+		self.assertTrue(nts.db.exists("Error Log", recent_log.name))
+		with gzip.open(archive, "rt") as f:
+			archived_logs = {json.loads(line)["name"] for line in f}
+		self.assertLessEqual(set(old_logs), archived_logs)
+
 	def test_logtype_identification(self):
 		supported_types = [
 			"Error Log",
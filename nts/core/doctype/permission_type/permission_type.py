@@ -68,12 +68,19 @@ class PermissionType(Document):
 		for target in CUSTOM_FIELD_TARGET:
 			self.create_custom_field(target)
 
+		self.clear_permission_matrix()
+
 		if self.should_export():
 			from nts.modules.export_file import export_to_files
 
 			module = nts.db.get_value("DocType", self.doc_type, "module")
 			export_to_files(record_list=[["Permission Type", self.name]], record_module=module)
 
+	def clear_permission_matrix(self):
+		from nts.permissions import clear_permission_matrix
+
+		clear_permission_matrix(self.doc_type)
+
 	def before_export(self, export_doc):
 		del export_doc["idx"]
 		del export_doc["docstatus"]
@@ -106,6 +113,8 @@ class PermissionType(Document):
 		for target in CUSTOM_FIELD_TARGET:
 			self.delete_custom_field(target)
 
+		self.clear_permission_matrix()
+
 		if self.should_export():
 			module = nts.db.get_value("DocType", self.doc_type, "module")
 			delete_folder(module, "Permission Type", self.name)
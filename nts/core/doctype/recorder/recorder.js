@@ -12,6 +12,7 @@ nts.ui.form.on("Recorder", {
 		frm.fields_dict.sql_queries.grid.grid_pagination.page_length = 500;
 		refresh_field("sql_queries");
 		frm.trigger("format_grid");
+		frm.trigger("show_n_plus_one_queries");
 		frm.add_custom_button(__("Suggest Optimizations"), () => {
 			nts.xcall("nts.core.doctype.recorder.recorder.optimize", {
 				recorder_id: frm.doc.name,
@@ -60,6 +61,25 @@ nts.ui.form.on("Recorder", {
 		});
 	},
 
+	show_n_plus_one_queries(frm) {
+		if (!frm.doc.n_plus_one_queries) return;
+
+		const lines = JSON.parse(frm.doc.n_plus_one_queries).map((query) => {
+			const source = query.filename ? `${query.filename}:${query.lineno}` : __("Unknown");
+			return __("{0} ran {1} times: {2}", [
+				`<code>${nts.utils.escape_html(source)}</code>`,
+				query.count,
+				`<code>${nts.utils.escape_html(query.query)}</code>`,
+			]);
+		});
+		frm.set_intro(
+			__("Same queries are executed repeatedly from these lines, probably in a loop:") +
+				"<br>" +
+				lines.join("<br>"),
+			"red"
+		);
+	},
+
 	/// Format duration and copy cells
 	format_grid(frm) {
 		const max_duration = Math.max(20, ...frm.doc.sql_queries.map((d) => d.duration));
@@ -33,6 +33,7 @@ class Recorder(Document):
 		event_type: DF.Data | None
 		form_dict: DF.Code | None
 		method: DF.Literal["GET", "POST", "PUT", "DELETE", "PATCH", "HEAD", "OPTIONS"]
+		n_plus_one_queries: DF.Code | None
 		number_of_queries: DF.Int
 		path: DF.Data | None
 		profile: DF.Code | None
@@ -107,6 +108,9 @@ def serialize_request(request):
 		request_headers=nts.as_json(request.get("headers", {}), indent=4),
 		form_dict=nts.as_json(request.get("form_dict", {}), indent=4),
 		sql_queries=request.get("calls"),
+		n_plus_one_queries=nts.as_json(request["n_plus_one_queries"], indent=4)
+		if request.get("n_plus_one_queries")
+		else None,
 		suggested_indexes=request.get("suggested_indexes"),
 		modified=request.get("time"),
 		creation=request.get("time"),
@@ -2,9 +2,8 @@
 # License: MIT. See LICENSE
 
 import nts
+from nts.core.doctype.log_settings.log_settings import purge_old_logs
 from nts.model.document import Document
-from nts.query_builder import Interval
-from nts.query_builder.functions import Now
 
 
 class ScheduledJobLog(Document):
@@ -24,5 +23,4 @@ class ScheduledJobLog(Document):
 
 	@staticmethod
 	def clear_old_logs(days=90):
-		table = nts.qb.DocType("Scheduled Job Log")
-		nts.db.delete(table, filters=(table.creation < (Now() - Interval(days=days))))
+		purge_old_logs("Scheduled Job Log", days)
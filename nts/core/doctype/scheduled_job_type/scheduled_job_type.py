@@ -68,6 +68,14 @@ class ScheduledJobType(Document):
 					title=_("Bad Cron Expression"),
 				)
 
+	def on_update(self):
+		from nts.utils.scheduler import index_scheduled_jobs, remove_from_index
+
+		if self.stopped:
+			remove_from_index([self.name])
+		else:
+			index_scheduled_jobs([self])
+
 	def enqueue(self, force=False) -> bool:
 		# enqueue event if last execution is done
 		if self.is_event_due() or force:
@@ -166,10 +174,13 @@ class ScheduledJobType(Document):
 		self.update_scheduler_log(status)
 
 	def update_scheduler_log(self, status):
+		from nts.utils.scheduler import index_scheduled_jobs
+
 		if not self.create_log:
 			# self.get_next_execution will work properly iff self.last_execution is properly set
 			self.db_set("last_execution", now_datetime(), update_modified=False)
 			nts.db.commit()
+			index_scheduled_jobs([self])
 			return
 		if not self.scheduler_log:
 			self.scheduler_log = nts.get_doc(
@@ -183,12 +194,17 @@ class ScheduledJobType(Document):
 		if status == "Start":
 			self.db_set("last_execution", now_datetime(), update_modified=False)
 		nts.db.commit()
+		if status == "Start":
+			index_scheduled_jobs([self])
 
 	def get_queue_name(self):
 		return "long" if ("Long" in self.frequency or "Maintenance" in self.frequency) else "default"
 
 	def on_trash(self):
+		from nts.utils.scheduler import remove_from_index
+
 		nts.db.delete("Scheduled Job Log", {"scheduled_job_type": self.name})
+		remove_from_index([self.name])
 
 
 @nts.whitelist()
@@ -223,6 +239,15 @@ def sync_jobs(hooks: dict | None = None):
 	scheduler_events = hooks or nts.get_hooks("scheduler_events")
 	insert_events(scheduler_events)
 	clear_events(scheduler_events)
+	index_jobs()
+
+
+def index_jobs():
+	"""Index next execution time of all jobs of site, the scheduler only checks jobs due as per index."""
+	from nts.utils.scheduler import index_scheduled_jobs
+
+	job_types = nts.get_all("Scheduled Job Type", filters={"stopped": 0}, fields="*")
+	index_scheduled_jobs([nts.get_doc(doctype="Scheduled Job Type", **job_type) for job_type in job_types])
 
 
 def insert_events(scheduler_events: dict) -> list:
@@ -47,11 +47,9 @@ class SubmissionQueue(Document):
 
 	@staticmethod
 	def clear_old_logs(days=30):
-		from nts.query_builder import Interval
-		from nts.query_builder.functions import Now
+		from nts.core.doctype.log_settings.log_settings import purge_old_logs
 
-		table = nts.qb.DocType("Submission Queue")
-		nts.db.delete(table, filters=(table.creation < (Now() - Interval(days=days))))
+		purge_old_logs("Submission Queue", days)
 
 	def insert(self, to_be_queued_doc: Document, action: str):
 		self.status = "Queued"
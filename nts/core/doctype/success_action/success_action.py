@@ -1,6 +1,7 @@
 # Copyright (c) 2018, nts Technologies and contributors
 # License: MIT. See LICENSE
 
+from nts.boot import clear_boot_section
 from nts.model.document import Document
 
 
@@ -20,4 +21,8 @@ class SuccessAction(Document):
 		ref_doctype: DF.Link
 	# end: auto-generated types
 
-	pass
+	def on_update(self):
+		clear_boot_section("success_action")
+
+	def on_trash(self):
+		clear_boot_section("success_action")
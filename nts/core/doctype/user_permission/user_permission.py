@@ -8,6 +8,7 @@ from nts import _
 from nts.core.utils import find
 from nts.desk.form.linked_with import get_linked_doctypes
 from nts.model.document import Document
+from nts.realtime import clear_permission_cache
 from nts.utils import cstr
 
 
@@ -36,10 +37,12 @@ class UserPermission(Document):
 	def on_update(self):
 		nts.cache.hdel("user_permissions", self.user)
 		nts.publish_realtime("update_user_permissions", user=self.user, after_commit=True)
+		clear_permission_cache(self.user)
 
 	def on_trash(self):
 		nts.cache.hdel("user_permissions", self.user)
 		nts.publish_realtime("update_user_permissions", user=self.user, after_commit=True)
+		clear_permission_cache(self.user)
 
 	def validate_user_permission(self):
 		"""checks for duplicate user permission records"""
@@ -21,8 +21,6 @@ class ViewLog(Document):
 
 	@staticmethod
 	def clear_old_logs(days=180):
-		from nts.query_builder import Interval
-		from nts.query_builder.functions import Now
+		from nts.core.doctype.log_settings.log_settings import purge_old_logs
 
-		table = nts.qb.DocType("View Log")
-		nts.db.delete(table, filters=(table.creation < (Now() - Interval(days=days))))
+		purge_old_logs("View Log", days)
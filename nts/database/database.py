@@ -10,7 +10,7 @@ import traceback
 import warnings
 from collections.abc import Iterable, Sequence
 from contextlib import contextmanager, suppress
-from time import time
+from time import perf_counter, time
 from typing import TYPE_CHECKING, Any, Literal
 
 from pypika.queries import QueryBuilder, Table
@@ -18,6 +18,7 @@ from pypika.queries import QueryBuilder, Table
 import nts
 import nts.defaults
 from nts import _, _dict
+from nts.database.query_plan import run_query
 from nts.database.utils import (
 	DefaultOrderBy,
 	EmptyQueryValues,
@@ -122,6 +123,12 @@ class Database:
 		self.transaction_writes = 0
 		self.auto_commit_on_many_writes = 0
 
+		# Set by `nts.connect` when reads should be routed to replicas, see `nts.database.replica`
+		self.read_router = None
+
+		# Set inside `batch_inserts` context, see `nts.database.insert_batch`
+		self.insert_batch = None
+
 		self.value_cache = recursive_defaultdict()
 		self.logger = nts.logger("database")
 		self.logger.setLevel("WARNING")
@@ -171,6 +178,10 @@ class Database:
 	def get_database_size(self):
 		raise NotImplementedError
 
+	def get_replication_lag(self) -> float | None:
+		"""Return seconds this replica is behind its primary, `None` if replication isn't running."""
+		raise NotImplementedError
+
 	def _transform_query(self, query: Query, values: QueryValues) -> tuple:
 		return query, values
 
@@ -241,6 +252,21 @@ class Database:
 				self.explain_query(query, values)
 			return
 
+		if self.insert_batch:
+			self.insert_batch.before_query(query, query_type)
+
+		if self.read_router and (replica := self.read_router.route(query, query_type, as_iterator)):
+			return replica.sql(
+				query,
+				values,
+				as_dict=as_dict,
+				as_list=as_list,
+				debug=debug,
+				ignore_ddl=ignore_ddl,
+				update=update,
+				pluck=pluck,
+			)
+
 		# remove whitespace / indentation from start and end of query
 		# and replace ifnull in query with coalesce
 		query = IFNULL_PATTERN.sub("coalesce(", query.strip())
@@ -268,6 +294,9 @@ class Database:
 		if trace_id := get_trace_id():
 			query += f" /* nts_TRACE_ID: {trace_id} */"
 
+		if monitor := getattr(nts.local, "monitor", None):
+			query_start = perf_counter()
+
 		try:
 			self.execute_query(query, values)
 		except Exception as e:
@@ -307,6 +336,9 @@ class Database:
 			):
 				raise
 
+		if monitor:
+			monitor.add_timing("db", perf_counter() - query_start)
+
 		self.log_query(query, query_type, values, debug)
 		if debug:
 			time_end = time()
@@ -500,6 +532,8 @@ class Database:
 
 	def get_description(self):
 		"""Return result metadata."""
+		if self.read_router and self.read_router.last_db:
+			return self.read_router.last_db.get_description()
 		return self._cursor.description
 
 	@staticmethod
@@ -637,17 +671,23 @@ class Database:
 
 		if isinstance(filters, list):
 			if filters := list(f for f in filters if f is not None):
-				out = nts.qb.get_query(
-					table=doctype,
-					fields=fieldname,
-					filters=filters,
-					order_by=order_by,
-					distinct=distinct,
-					limit=limit,
-					for_update=for_update,
-					skip_locked=skip_locked,
-					wait=True,
-				).run(debug=debug, run=run, as_dict=as_dict, pluck=pluck)
+				out = run_query(
+					dict(
+						table=doctype,
+						fields=fieldname,
+						filters=filters,
+						order_by=order_by,
+						distinct=distinct,
+						limit=limit,
+						for_update=for_update,
+						skip_locked=skip_locked,
+						wait=True,
+					),
+					debug=debug,
+					run=run,
+					as_dict=as_dict,
+					pluck=pluck,
+				)
 			else:
 				out = {}
 		else:
@@ -655,7 +695,7 @@ class Database:
 				try:
 					if order_by:
 						order_by = "creation" if order_by == DefaultOrderBy else order_by
-					query = nts.qb.get_query(
+					query_kwargs = dict(
 						table=doctype,
 						filters=filters,
 						order_by=order_by,
@@ -668,7 +708,9 @@ class Database:
 					)
 					if isinstance(fieldname, str) and fieldname == "*":
 						as_dict = True
-					out = query.run(as_dict=as_dict, debug=debug, update=update, run=run, pluck=pluck)
+					out = run_query(
+						query_kwargs, as_dict=as_dict, debug=debug, update=update, run=run, pluck=pluck
+					)
 
 				except Exception as e:
 					if ignore and (
@@ -1187,6 +1229,9 @@ class Database:
 		self.before_rollback.reset()
 		self.after_rollback.reset()
 
+		if self.insert_batch:
+			self.insert_batch.flush()
+
 		self.before_commit.run()
 
 		if chain:
@@ -1382,8 +1427,24 @@ class Database:
 	def get_system_setting(self, key):
 		return nts.get_system_settings(key)
 
+	def reset_state(self):
+		"""Reset state set on this object during a job or request so that the connection can be reused by
+		another one, e.g. by background workers keeping site contexts. Pending callbacks are discarded."""
+		self.transaction_writes = 0
+		self.auto_commit_on_many_writes = 0
+		self._disable_transaction_control = 0
+		self.insert_batch = None
+		self.value_cache = recursive_defaultdict()
+		for callbacks in (self.before_commit, self.after_commit, self.before_rollback, self.after_rollback):
+			callbacks.reset()
+		if self.read_router:
+			self.read_router.reset()
+
 	def close(self):
 		"""Close database connection."""
+		if self.read_router:
+			self.read_router.close()
+
 		if self._conn:
 			self._conn.close()
 			self._cursor = None
@@ -1512,6 +1573,38 @@ class Database:
 		while value_chunk := tuple(itertools.islice(value_iterator, chunk_size)):
 			query.insert(*value_chunk).run()
 
+	@contextmanager
+	def batch_inserts(self, size: int | None = None, *, skip_failed_rows: bool = False):
+		"""Context manager to write rows inserted by `Document.insert` using multi-row `INSERT`s.
+
+		Documents are still validated and their hooks run one by one, only writing their rows is
+		deferred. See `nts.database.insert_batch` for details.
+
+		:param size: Number of queued rows after which they are written.
+		:param skip_failed_rows: Log and skip rows that can't be inserted instead of raising. Number of
+		        skipped documents is available as `skipped` on the yielded `InsertBatch`.
+
+		Usage:
+		        with nts.db.batch_inserts():
+		                for row in rows:
+		                        nts.get_doc(row).insert()
+		"""
+		from nts.database.insert_batch import DEFAULT_BATCH_SIZE, InsertBatch
+
+		if self.insert_batch:
+			# nested usage, rows are written by the outermost context
+			yield self.insert_batch
+			return
+
+		self.insert_batch = InsertBatch(
+			self, size or nts.conf.insert_batch_size or DEFAULT_BATCH_SIZE, skip_failed_rows=skip_failed_rows
+		)
+		try:
+			yield self.insert_batch
+			self.insert_batch.flush()
+		finally:
+			self.insert_batch = None
+
 	def create_sequence(self, *args, **kwargs):
 		from nts.database.sequence import create_sequence
 
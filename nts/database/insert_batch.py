@@ -0,0 +1,170 @@
+# Copyright (c) 2026, nts Technologies Pvt. Ltd. and Contributors
+# License: MIT. See LICENSE
+
+"""
+Deferred, multi-row `INSERT`s for `BaseDocument.db_insert`.
+
+Inside `with nts.db.batch_inserts():` documents are validated and all their hooks run as usual but
+their rows (parent and child) aren't written immediately. Rows are queued per table and written
+using multi-row `INSERT` statements when:
+
+- `size` rows are queued,
+- a query referring to a table with queued rows is run, so reads and writes see queued rows,
+- the transaction is committed or a savepoint is created,
+- the context manager exits.
+
+Rolling back (fully or to a savepoint) discards queued rows.
+
+Queued rows are written all or none: if writing any of them fails, rows written by the same flush
+are rolled back and the error is raised. The error may be raised by a later `insert` (or any query
+which flushes) than the one of the document it refers to.
+
+Errors like duplicate names are raised when rows are written. If a multi-row `INSERT` fails, rows
+are written one at a time so the error can be attributed to the offending row and handled by its
+document same as `BaseDocument.db_insert` does, e.g. hash collisions of child rows are retried with a
+new name and unique key violations raise `UniqueValidationError`.
+
+Rows which need conflict handling at database level (`ignore_if_duplicate` and hash named
+documents on postgres) and hash named parent documents, whose children already refer to their name,
+are always inserted immediately.
+"""
+
+import random
+import string
+from collections import defaultdict
+from typing import TYPE_CHECKING
+
+import nts
+from nts import _
+
+if TYPE_CHECKING:
+	from nts.model.base_document import BaseDocument
+
+DEFAULT_BATCH_SIZE = 1000
+
+# Queries which have to see all queued rows
+FLUSH_QUERY_TYPES = frozenset(
+	("commit", "savepoint", "release", "start", "begin", "alter", "drop", "create", "truncate", "rename")
+)
+
+
+class InsertBatch:
+	def __init__(self, db, size: int = DEFAULT_BATCH_SIZE, skip_failed_rows: bool = False):
+		self.db = db
+		self.size = size
+		self.skip_failed_rows = skip_failed_rows
+
+		# (doctype, columns) -> list of (row, document of row)
+		self.rows: dict[tuple[str, tuple[str, ...]], list[tuple[tuple, "BaseDocument"]]] = defaultdict(list)
+		self.count = 0
+		self.writing = False
+		# Number of documents (not child rows) not inserted due to `skip_failed_rows`
+		self.skipped = 0
+
+	def add(self, doc: "BaseDocument", row: dict):
+		self.rows[(doc.doctype, tuple(row))].append((tuple(row.values()), doc))
+		self.count += 1
+
+		if self.count >= self.size and not self.writing:
+			self.flush()
+
+	def before_query(self, query: str, query_type: str):
+		"""Write or discard queued rows which could affect result of `query`."""
+		if not self.count or self.writing:
+			# rows queued again while writing are written by the running flush
+			return
+
+		if query_type == "rollback":
+			self.discard()
+		elif query_type in FLUSH_QUERY_TYPES or any(f"tab{key[0]}" in query for key in self.rows):
+			self.flush()
+
+	def flush(self):
+		if not self.count or self.writing:
+			return
+
+		self.writing = True
+		save_point = get_savepoint_name()
+		try:
+			self.db.savepoint(save_point)
+			try:
+				self.write()
+			except Exception:
+				# e.g. parents shouldn't be left without their children
+				self.db.rollback(save_point=save_point)
+				self.discard()
+				raise
+			self.db.release_savepoint(save_point)
+		finally:
+			self.writing = False
+
+	def write(self):
+		# rows can be queued again while writing, e.g. after hash collisions
+		while self.count:
+			rows, self.rows, self.count = self.rows, defaultdict(list), 0
+
+			for (doctype, columns), rows_with_docs in rows.items():
+				if len(rows_with_docs) == 1 and not self.skip_failed_rows:
+					self.insert_row(doctype, columns, *rows_with_docs[0])
+				else:
+					self.insert_rows(doctype, columns, rows_with_docs)
+
+	def discard(self):
+		self.rows.clear()
+		self.count = 0
+
+	def insert_rows(self, doctype: str, columns: tuple[str, ...], rows_with_docs: list[tuple]):
+		save_point = get_savepoint_name()
+		self.db.savepoint(save_point)
+		try:
+			self.db.bulk_insert(
+				doctype, list(columns), [row for row, _doc in rows_with_docs], chunk_size=self.size
+			)
+		except Exception:
+			self.db.rollback(save_point=save_point)
+		else:
+			self.db.release_savepoint(save_point)
+			return
+
+		for row, doc in rows_with_docs:
+			if not self.skip_failed_rows:
+				self.insert_row(doctype, columns, row, doc)
+				continue
+
+			save_point = get_savepoint_name()
+			self.db.savepoint(save_point)
+			try:
+				self.insert_row(doctype, columns, row, doc)
+			except Exception:
+				self.db.rollback(save_point=save_point)
+				nts.logger("database").error(f"Failed to insert batched {doctype} row", exc_info=True)
+				if not doc.meta.istable:
+					self.skipped += 1
+			else:
+				self.db.release_savepoint(save_point)
+
+	def insert_row(self, doctype: str, columns: tuple[str, ...], row: tuple, doc: "BaseDocument"):
+		"""Write one row, errors are handled same as in `BaseDocument.db_insert`."""
+		try:
+			self.db.bulk_insert(doctype, list(columns), [row])
+		except Exception as e:
+			if self.db.is_primary_key_violation(e):
+				if doc.meta.autoname == "hash":
+					# hash collision, queued again with a new name
+					return doc._handle_hash_conflict()
+
+				nts.msgprint(
+					_("{0} {1} already exists").format(_(doctype), nts.bold(doc.name)),
+					title=_("Duplicate Name"),
+					indicator="red",
+				)
+				raise nts.DuplicateEntryError(doctype, doc.name, e)
+
+			elif self.db.is_unique_key_violation(e):
+				doc.show_unique_validation_message(e)
+
+			raise
+
+
+def get_savepoint_name() -> str:
+	return "insert_batch_" + "".join(random.sample(string.ascii_lowercase, 10))
@@ -221,6 +221,22 @@ class MariaDBDatabase(MariaDBConnectionUtil, MariaDBExceptionUtil, Database):
 
 		return db_size[0].get("database_size")
 
+	def get_replication_lag(self) -> float | None:
+		try:
+			status = self.sql("SHOW SLAVE STATUS", as_dict=True)
+		except pymysql.Error as e:
+			if e.args[0] != ER.SPECIFIC_ACCESS_DENIED_ERROR:
+				raise
+			from nts.database.replica import warn_missing_lag_privilege
+
+			warn_missing_lag_privilege(self)
+			return None
+
+		if not status:
+			# replication isn't configured on this server
+			return None
+		return status[0].get("Seconds_Behind_Master")
+
 	def log_query(self, query, query_type, values, debug):
 		mogrified_query = self._cursor._executed
 		self.last_query = mogrified_query
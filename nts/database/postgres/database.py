@@ -226,6 +226,19 @@ class PostgresDatabase(PostgresExceptionUtil, Database):
 		)
 		return db_size[0].get("database_size")
 
+	def get_replication_lag(self) -> float | None:
+		# Time since last replayed transaction is only lag if there's received WAL left to replay,
+		# otherwise primary is idle and replica is up to date.
+		lag = self.sql(
+			"""SELECT CASE
+			WHEN NOT pg_is_in_recovery() THEN NULL
+			WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+			ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+			END""",
+			pluck=True,
+		)
+		return float(lag[0]) if lag and lag[0] is not None else None
+
 	def _transform_result(self, result: list[tuple] | tuple[tuple]) -> tuple[tuple]:
 		return tuple(result) if isinstance(result, list) else result
 
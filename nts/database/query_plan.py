@@ -0,0 +1,437 @@
+# Copyright (c) 2026, nts Technologies Pvt. Ltd. and Contributors
+# License: MIT. See LICENSE
+
+"""
+Cache of compiled queries for `nts.qb.get_query`.
+
+Building a query through `Engine.get_query` parses fields, validates every filter against meta,
+resolves sort order etc. Most of the queries issued by list views and `nts.get_all` calls only
+differ in the *values* they filter on, so this module caches the rendered SQL per query shape and
+only re-binds the filter values on subsequent calls.
+
+A query shape is cacheable only if none of its filter values can change the structure of the
+generated SQL: values have to be non-empty strings or non-zero numbers (which are bound as query
+parameters) and operators have to be simple comparisons.
+
+Queries that apply permissions (`nts.get_list`, list views) render permission conditions into the
+SQL, so their cache key also includes a fingerprint of the user, their roles, user permissions and
+shared documents, see `get_permission_fingerprint`. Conditions added by permission query hooks and
+server scripts can depend on anything, queries on such doctypes are never cached and are counted as
+`bypassed_permissions` in `QueryPlanCache.statistics` (and in `nts.monitor` counters) so that the
+share of queries served by the cache can be measured.
+
+Cached plans are invalidated whenever `metadata_version` changes or meta cache is cleared.
+"""
+
+import hashlib
+import math
+from dataclasses import dataclass
+
+import nts
+from nts.monitor import add_counter_to_monitor
+from nts.utils.lru import LRUCache
+
+DEFAULT_MAXSIZE = 512
+
+# Values used as fallback by `Engine._get_ifnull_fallback`; comparisons against these generate
+# different SQL, so they can't be bound to a cached plan.
+IFNULL_FALLBACK_VALUES = frozenset(("", "0001-01-01", "00:00:00"))
+
+SCALAR_OPERATORS = frozenset(("=", "!=", "<", ">", "<=", ">=", "=<", "=>", "like", "not like"))
+MULTI_VALUE_OPERATORS = frozenset(("in", "not in"))
+
+# `Engine.get_query` arguments which never affect the generated SQL when permissions are ignored,
+# these are part of the permission fingerprint otherwise.
+IGNORED_ARGUMENTS = frozenset(("user",))
+
+_PLACEHOLDER_MARK = "\x1e"
+
+
+class UncacheableQuery(Exception):
+	pass
+
+
+@dataclass(slots=True, frozen=True)
+class CompiledQuery:
+	sql: str
+	params: dict
+	slots: tuple[tuple[str, int], ...]
+	doctype: str | None
+	fields: list
+
+	def bind(self, values: list) -> dict:
+		params = self.params.copy()
+		for param, index in self.slots:
+			params[param] = values[index]
+		return params
+
+	def run(self, values: list, *args, **kwargs):
+		"""Same as `QueryBuilder.run` for the query this plan was compiled from."""
+		from nts.query_builder.utils import get_masked_fields, mask_fields
+
+		masked_fields = None
+		if kwargs.get("as_iterator") and self.doctype and self.fields:
+			# see `execute_query`
+			masked_fields = get_masked_fields(self.doctype)
+
+		result = nts.local.db.sql(self.sql, self.bind(values), *args, **kwargs)  # nosemgrep
+
+		if result and self.doctype and self.fields:
+			as_dict = kwargs.get("as_dict", not kwargs.get("as_list", False))
+			result = mask_fields(
+				self.doctype, self.fields, result, as_dict=as_dict, masked_fields=masked_fields
+			)
+
+		return result
+
+
+class QueryPlanCache:
+	"""Per-site, process wide cache of `CompiledQuery` objects."""
+
+	def __init__(self):
+		self.plans: dict[str, LRUCache] = {}
+		self.versions: dict[str, str] = {}
+
+		# These are process wide stats, per transaction stats are logged via `nts.monitor`.
+		# These can be slightly off, these aren't guarded by a mutex.
+		self.hits = self.misses = 0
+		self.bypassed = self.bypassed_permissions = 0
+
+	@property
+	def maxsize(self) -> int:
+		return nts.conf.get("query_plan_cache_size", DEFAULT_MAXSIZE)
+
+	def get_plans(self) -> LRUCache:
+		site = nts.local.site
+		version = nts.client_cache.get_value("metadata_version")
+		if self.versions.get(site) != version:
+			self.plans.pop(site, None)
+			self.versions[site] = version
+
+		if (plans := self.plans.get(site)) is None:
+			plans = self.plans.setdefault(site, LRUCache(self.maxsize, admission=True))
+		return plans
+
+	def get(self, key) -> CompiledQuery | bool | None:
+		plans = self.get_plans()
+		try:
+			plan = plans[key]
+		except KeyError:
+			self.misses += 1
+			add_counter_to_monitor("query_plan_cache_misses")
+			return None
+
+		self.hits += 1
+		add_counter_to_monitor("query_plan_cache_hits")
+		return plan
+
+	def bypass(self, permissions: bool = False):
+		if permissions:
+			self.bypassed_permissions += 1
+			add_counter_to_monitor("query_plan_cache_bypassed_permissions")
+		else:
+			self.bypassed += 1
+			add_counter_to_monitor("query_plan_cache_bypassed")
+
+	def set(self, key, plan: CompiledQuery | bool):
+		self.get_plans()[key] = plan
+
+	def clear(self, doctype: str | None = None, site: str | None = None):
+		if not doctype:
+			if site:
+				self.plans.pop(site, None)
+			else:
+				self.plans.clear()
+			return
+
+		sites = [site] if site else list(self.plans)
+		for _site in sites:
+			if plans := self.plans.get(_site):
+				for key in [key for key in plans if key[0] == doctype]:
+					plans.pop(key)
+
+	@property
+	def statistics(self) -> dict:
+		plans = self.plans.get(getattr(nts.local, "site", None))
+		return {
+			"hits": self.hits,
+			"misses": self.misses,
+			"bypassed": self.bypassed,
+			"bypassed_permissions": self.bypassed_permissions,
+			"evictions": plans.stats.evictions if plans is not None else 0,
+			"capacity": self.maxsize,
+			"used": len(plans) if plans is not None else 0,
+			"hit_ratio": round(self.hits / (self.hits + self.misses), 2) if self.hits else None,
+			# share of all queries going through `run_query` that were served from the cache
+			"overall_hit_ratio": round(self.hits / total, 2) if (total := self.total) else None,
+		}
+
+	@property
+	def total(self) -> int:
+		return self.hits + self.misses + self.bypassed + self.bypassed_permissions
+
+	def reset_statistics(self):
+		self.hits = self.misses = 0
+		self.bypassed = self.bypassed_permissions = 0
+
+
+query_plan_cache = QueryPlanCache()
+
+
+def run_query(query_kwargs: dict, **run_kwargs):
+	"""Build and run the query described by `query_kwargs` (arguments of `nts.qb.get_query`).
+
+	Compiled SQL is reused across calls if the query shape is cacheable, otherwise this is
+	equivalent to `nts.qb.get_query(**query_kwargs).run(**run_kwargs)`.
+	"""
+	if query_plan_cache.maxsize and not (
+		nts.local.flags.in_safe_exec or nts.local.flags.in_install or nts.local.flags.in_migrate
+	):
+		try:
+			key, template, values = get_query_shape(query_kwargs)
+		except UncacheableQuery:
+			query_plan_cache.bypass(permissions=not query_kwargs.get("ignore_permissions", True))
+		else:
+			plan = query_plan_cache.get(key)
+			if plan is None:
+				# Shapes that can't be compiled are remembered too, so they aren't built twice
+				plan = compile_query(template, len(values)) or False
+				query_plan_cache.set(key, plan)
+
+			if plan:
+				return plan.run(values, **run_kwargs)
+
+	return nts.qb.get_query(**query_kwargs).run(**run_kwargs)
+
+
+def get_query_shape(query_kwargs: dict) -> tuple[tuple, dict, list]:
+	"""Return cache key, `get_query` arguments with placeholders in place of values and the values.
+
+	Raise `UncacheableQuery` if the generated SQL could depend on the values."""
+	for arg in ("update", "into", "delete"):
+		if query_kwargs.get(arg):
+			raise UncacheableQuery
+
+	table = query_kwargs.get("table")
+	if not isinstance(table, str):
+		raise UncacheableQuery
+
+	additional_operators = get_additional_filter_operators()
+	values = []
+	template = {}
+	key = [table]
+
+	for arg, value in sorted(query_kwargs.items()):
+		if arg == "table" or arg in IGNORED_ARGUMENTS:
+			template[arg] = value
+			continue
+
+		if arg in ("filters", "or_filters"):
+			value = _parametrize_filters(value, values, additional_operators)
+			key.append((arg, _freeze(value)))
+		elif arg == "fields":
+			key.append((arg, _freeze_fields(value)))
+		elif value is None or isinstance(value, str | int | float):
+			key.append((arg, value))
+		else:
+			raise UncacheableQuery
+
+		template[arg] = value
+
+	# Computed last as it needs queries, only for shapes that are otherwise cacheable
+	if not query_kwargs.get("ignore_permissions", True):
+		key.append(("permissions", get_permission_fingerprint(query_kwargs)))
+
+	return tuple(key), template, values
+
+
+def get_permission_fingerprint(query_kwargs: dict) -> str:
+	"""Return digest of the state (besides meta) which permission conditions of the query depend on.
+
+	Raise `UncacheableQuery` if the conditions can't be fingerprinted."""
+	from nts.core.doctype.server_script.server_script_utils import get_server_script_map
+
+	doctype = query_kwargs.get("parent_doctype") or query_kwargs["table"]
+	if not isinstance(doctype, str):
+		raise UncacheableQuery
+
+	hooks = nts.get_hooks("permission_query_conditions", {})
+	if hooks.get(doctype) or hooks.get("*"):
+		raise UncacheableQuery
+
+	if get_server_script_map().get("permission_query", {}).get(doctype):
+		raise UncacheableQuery
+
+	try:
+		meta = nts.get_meta(doctype)
+	except nts.DoesNotExistError:
+		raise UncacheableQuery from None
+
+	# Permissions on single doctypes are checked on the document, including controller hooks
+	if meta.issingle:
+		raise UncacheableQuery
+
+	user = query_kwargs.get("user") or nts.session.user
+	# Permission on linked doctypes of fields depends on documents of those shared with the user
+	shared_doctypes = sorted(nts.share.get_shared_doctypes(user))
+	fingerprint = (
+		user,
+		sorted(nts.get_roles(user)),
+		nts.permissions.get_user_permissions(user),
+		nts.get_system_settings("apply_strict_user_permissions"),
+		shared_doctypes,
+		sorted(nts.share.get_shared(doctype, user)) if doctype in shared_doctypes else [],
+	)
+	return hashlib.sha256(repr(fingerprint).encode()).hexdigest()
+
+
+def compile_query(template: dict, num_values: int) -> CompiledQuery | None:
+	"""Build query from `template` and record which query parameters hold which filter value."""
+	from nts.query_builder.utils import prepare_query
+
+	message_count = len(nts.local.message_log)
+	try:
+		query = nts.qb.get_query(**template)
+	except Exception:
+		# Let the actual query (built with real values) raise the error, messages logged while
+		# building this one contain placeholders.
+		del nts.local.message_log[message_count:]
+		return None
+
+	if query.__dict__.get("_child_queries"):
+		return None
+
+	sql, params = prepare_query(query)
+	if _PLACEHOLDER_MARK in sql:
+		return None
+
+	placeholders = {_placeholder(i): i for i in range(num_values)}
+	slots = []
+	for param, value in params.items():
+		if isinstance(value, str) and _PLACEHOLDER_MARK in value:
+			if (index := placeholders.get(value)) is None:
+				# value was transformed while building the query
+				return None
+			slots.append((param, index))
+
+	if {index for _, index in slots} != set(placeholders.values()):
+		return None
+
+	return CompiledQuery(
+		sql=sql,
+		params=params,
+		slots=tuple(slots),
+		doctype=query.__dict__.get("_doctype"),
+		fields=query.__dict__.get("_fields_list", []),
+	)
+
+
+def get_additional_filter_operators() -> frozenset[str]:
+	from nts.boot import get_additional_filters_from_hooks
+
+	return frozenset(operator.lower() for operator in get_additional_filters_from_hooks())
+
+
+def clear_query_plan_cache(doctype: str | None = None):
+	query_plan_cache.clear(doctype, site=getattr(nts.local, "site", None))
+
+
+def _placeholder(index: int) -> str:
+	return f"{_PLACEHOLDER_MARK}{index}{_PLACEHOLDER_MARK}"
+
+
+def _add_value(value, values: list) -> str:
+	# Falsy values (`""`, `0`) add IFNULL checks, see `Engine._should_apply_ifnull`. `bool` is
+	# excluded as it is converted to `int` before being bound.
+	if type(value) is str:
+		if value in IFNULL_FALLBACK_VALUES or _PLACEHOLDER_MARK in value:
+			raise UncacheableQuery
+	elif type(value) not in (int, float) or not value or not math.isfinite(value):
+		raise UncacheableQuery
+
+	values.append(value)
+	return _placeholder(len(values) - 1)
+
+
+def _add_operator_value(operator, value, values: list, additional_operators: frozenset[str]):
+	if not isinstance(operator, str) or operator.lower() in additional_operators:
+		raise UncacheableQuery
+
+	if operator.lower() in SCALAR_OPERATORS:
+		return _add_value(value, values)
+
+	if operator.lower() in MULTI_VALUE_OPERATORS and isinstance(value, list | tuple) and value:
+		return tuple(_add_value(v, values) for v in value)
+
+	raise UncacheableQuery
+
+
+def _parametrize_filters(filters, values: list, additional_operators: frozenset[str]):
+	if filters is None:
+		return None
+
+	if isinstance(filters, str):
+		# name of the document
+		return _add_value(filters, values)
+
+	if isinstance(filters, dict):
+		parametrized = {}
+		for field, value in filters.items():
+			if not isinstance(field, str):
+				raise UncacheableQuery
+
+			if isinstance(value, list | tuple):
+				if len(value) != 2:
+					raise UncacheableQuery
+				operator, value = value
+				parametrized[field] = (
+					operator,
+					_add_operator_value(operator, value, values, additional_operators),
+				)
+			else:
+				parametrized[field] = _add_operator_value("=", value, values, additional_operators)
+
+		return parametrized
+
+	if isinstance(filters, list | tuple):
+		parametrized = []
+		for condition in filters:
+			if not isinstance(condition, list | tuple):
+				raise UncacheableQuery
+
+			match condition:
+				case [str() as field, value]:
+					parametrized.append(
+						[field, _add_operator_value("=", value, values, additional_operators)]
+					)
+				case [str() as field, operator, value]:
+					parametrized.append(
+						[field, operator, _add_operator_value(operator, value, values, additional_operators)]
+					)
+				case [str() as doctype, str() as field, operator, value, *rest] if len(rest) <= 1:
+					value = _add_operator_value(operator, value, values, additional_operators)
+					parametrized.append([doctype, field, operator, value, *rest])
+				case _:
+					raise UncacheableQuery
+
+		return parametrized
+
+	raise UncacheableQuery
+
+
+def _freeze(value):
+	if isinstance(value, dict):
+		return ("dict", tuple((k, _freeze(v)) for k, v in value.items()))
+	if isinstance(value, list | tuple):
+		return ("list", tuple(_freeze(v) for v in value))
+	if value is None or isinstance(value, str | int | float):
+		return value
+	raise UncacheableQuery
+
+
+def _freeze_fields(fields):
+	if fields is None or isinstance(fields, str):
+		return fields
+	if isinstance(fields, list | tuple) and all(isinstance(f, str) for f in fields):
+		return tuple(fields)
+	raise UncacheableQuery
@@ -0,0 +1,205 @@
+# Copyright (c) 2026, nts Technologies Pvt. Ltd. and Contributors
+# License: MIT. See LICENSE
+
+"""
+Automatic read/write splitting across read replicas.
+
+When `route_reads_to_replicas` is enabled in site config, `SELECT` queries issued on the primary
+connection are sent to one of the configured replicas until the first write (or locking read)
+happens on the primary connection. After that every query is "pinned" to primary so a request (or
+job) always reads its own writes.
+
+Site config:
+
+	"route_reads_to_replicas": 1,
+	"read_replicas": [
+		{"host": "10.0.0.2", "port": 3306},
+		{"host": "10.0.0.3", "port": 3306, "user": "reader", "password": "..."}
+	],
+	"replica_routing_strategy": "round_robin",  # or "least_lag"
+	"replica_max_lag": 10,  # seconds, replicas lagging more than this are skipped. 0 = don't check.
+	"replica_lag_check_interval": 5,  # seconds
+
+If `read_replicas` is not set, the replica configured for `nts.read_only` (`replica_host`) is used.
+
+Checking lag on MariaDB runs `SHOW SLAVE STATUS`, which needs the `REPLICA MONITOR` privilege
+(`REPLICATION CLIENT` before MariaDB 10.5.9) that site users don't have by default:
+
+	GRANT REPLICA MONITOR ON *.* TO '<db_user>'@'%';
+
+Without it replicas are never used, unless lag checks are disabled with `"replica_max_lag": 0`.
+"""
+
+import itertools
+import re
+import time
+
+import nts
+
+DEFAULT_MAX_LAG = 10
+DEFAULT_LAG_CHECK_INTERVAL = 5
+
+# Query types after which the connection is pinned to primary.
+PINNING_QUERY_TYPES = frozenset(
+	("insert", "update", "delete", "replace", "alter", "drop", "create", "truncate", "rename", "lock")
+)
+
+# `SELECT`s which lock rows, use session state or have side effects can't be moved to a replica.
+PRIMARY_ONLY_SELECT_PATTERN = re.compile(
+	r"\bfor\s+update\b|\bfor\s+share\b|\block\s+in\s+share\s+mode\b|\bnextval\s*\(|\bsetval\s*\("
+	r"|\bget_lock\s*\(|\brelease_lock\s*\(|\blast_insert_id\s*\(|\bfound_rows\s*\(|@",
+	flags=re.IGNORECASE,
+)
+
+_round_robin = itertools.count()
+
+# (host, port, user) of replicas whose lag couldn't be checked for lack of privileges
+_missing_lag_privilege: set[tuple] = set()
+
+# (site, host, port) -> (lag in seconds or None if replica is unusable, time.monotonic() of check)
+_replica_lag: dict[tuple, tuple[float | None, float]] = {}
+
+
+class ReadReplicaRouter:
+	"""Decides which connection a query on the primary `Database` object should be executed on."""
+
+	def __init__(self, primary):
+		self.primary = primary
+		self.replicas = get_replica_configs()
+		self.strategy = nts.conf.get("replica_routing_strategy") or "round_robin"
+		self.max_lag = nts.conf.get("replica_max_lag", DEFAULT_MAX_LAG)
+		self.lag_check_interval = nts.conf.get("replica_lag_check_interval", DEFAULT_LAG_CHECK_INTERVAL)
+
+		self.connections = {}
+		self.pinned = False
+		# Connection used for the last query, `None` if it was primary.
+		self.last_db = None
+
+	def route(self, query: str, query_type: str, as_iterator: bool = False):
+		"""Return replica connection to execute `query` on or `None` if it should run on primary."""
+		self.last_db = None
+
+		if query_type in PINNING_QUERY_TYPES:
+			self.pinned = True
+
+		if (
+			self.pinned
+			or query_type != "select"
+			or as_iterator  # unbuffered cursors are set up on the primary connection
+			or not self.replicas
+			or self.primary.transaction_writes
+		):
+			return None
+
+		if PRIMARY_ONLY_SELECT_PATTERN.search(query):
+			# e.g. rows locked for update, reads after it should see the same state
+			self.pin_to_primary()
+			return None
+
+		self.last_db = self.get_replica()
+		return self.last_db
+
+	def pin_to_primary(self):
+		self.pinned = True
+
+	def get_replica(self):
+		for replica in self.get_candidates():
+			key = get_replica_key(replica)
+			if not self.is_healthy(replica):
+				continue
+			if db := self.connections.get(key):
+				return db
+			try:
+				db = self.connections[key] = connect(replica)
+			except Exception:
+				nts.logger("database").warning(f"Could not connect to read replica {key}", exc_info=True)
+				_replica_lag[key] = (None, time.monotonic())
+				continue
+			return db
+
+	def get_candidates(self) -> list[dict]:
+		if self.strategy == "least_lag":
+			return sorted(self.replicas, key=lambda r: _replica_lag.get(get_replica_key(r), (0, 0))[0] or 0)
+
+		start = next(_round_robin) % len(self.replicas)
+		return self.replicas[start:] + self.replicas[:start]
+
+	def is_healthy(self, replica: dict) -> bool:
+		key = get_replica_key(replica)
+		lag, checked_at = _replica_lag.get(key, (0, None))
+
+		if checked_at is None or time.monotonic() - checked_at > self.lag_check_interval:
+			# With lag checks disabled this only retries replicas which failed to connect.
+			lag = self.check_lag(replica) if self.max_lag else 0
+			_replica_lag[key] = (lag, time.monotonic())
+
+		return lag is not None and (not self.max_lag or lag <= self.max_lag)
+
+	def check_lag(self, replica: dict) -> float | None:
+		key = get_replica_key(replica)
+		try:
+			db = self.connections.get(key) or connect(replica)
+			self.connections[key] = db
+			return db.get_replication_lag()
+		except Exception:
+			nts.logger("database").warning(f"Could not check lag of read replica {key}", exc_info=True)
+			return None
+
+	def reset(self):
+		"""Unpin from primary, replica connections are kept."""
+		self.pinned = False
+		self.last_db = None
+
+	def close(self):
+		for db in self.connections.values():
+			db.close()
+		self.connections.clear()
+		self.last_db = None
+
+
+def get_replica_configs() -> list[dict]:
+	conf = nts.local.conf
+	if replicas := conf.get("read_replicas"):
+		return [nts._dict(r) for r in replicas]
+
+	if not conf.replica_host:
+		return []
+
+	replica = nts._dict(host=conf.replica_host, port=conf.replica_db_port)
+	if conf.different_credentials_for_replica:
+		replica.user = conf.replica_db_user or conf.replica_db_name
+		replica.password = conf.replica_db_password
+	return [replica]
+
+
+def warn_missing_lag_privilege(db):
+	"""Log once per process that lag of replica `db` can't be checked due to missing privileges."""
+	key = (db.host, db.port, db.user)
+	if key in _missing_lag_privilege:
+		return
+
+	_missing_lag_privilege.add(key)
+	nts.logger("database").warning(
+		f"Could not check replication lag of read replica {db.host}:{db.port}, reads won't be routed to it."
+		f" User {db.user} needs REPLICA MONITOR (or REPLICATION CLIENT) privilege, see nts.database.replica."
+	)
+
+
+def get_replica_key(replica: dict) -> tuple:
+	return (nts.local.site, replica.get("host"), replica.get("port"))
+
+
+def connect(replica: dict):
+	from nts.database import get_db
+
+	conf = nts.local.conf
+	db = get_db(
+		socket=None,
+		host=replica.get("host"),
+		port=replica.get("port"),
+		user=replica.get("user") or conf.db_user,
+		password=replica.get("password") or conf.db_password,
+		cur_db_name=conf.db_name,
+	)
+	# Not patched by recorder, routed queries are recorded by the primary `Database` object.
+	return db
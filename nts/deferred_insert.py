@@ -1,9 +1,11 @@
 import json
+import time
 from typing import TYPE_CHECKING, Union
 
 import redis
 
 import nts
+from nts.monitor import add_counter_to_monitor
 from nts.utils import cstr
 
 if TYPE_CHECKING:
@@ -11,6 +13,12 @@ if TYPE_CHECKING:
 
 queue_prefix = "insert_queue_for_"
 
+# Queue items (each can hold many records) moved from redis and inserted in one transaction.
+DRAIN_BATCH_SIZE = 500
+# Leave remaining records for next run so one busy doctype doesn't starve others.
+MAX_RECORDS_PER_RUN = 10000
+STATISTICS_KEY = "deferred_insert_statistics"
+
 
 def deferred_insert(doctype: str, records: list[dict | "Document"] | str):
 	if isinstance(records, dict | list):
@@ -26,34 +34,74 @@ def deferred_insert(doctype: str, records: list[dict | "Document"] | str):
 
 
 def save_to_db():
-	queue_keys = nts.cache.get_keys(queue_prefix)
-	for key in queue_keys:
-		record_count = 0
-		queue_key = get_key_name(key)
-		doctype = get_doctype_name(key)
-		while nts.cache.llen(queue_key) > 0 and record_count <= 10000:
-			records = nts.cache.lpop(queue_key)
-			records = json.loads(records.decode("utf-8"))
-			if isinstance(records, dict):
-				record_count += 1
-				insert_record(records, doctype)
-				continue
-			for record in records:
-				record_count += 1
-				insert_record(record, doctype)
-				if record_count % 100 == 0:
-					nts.db.commit()
+	for key in nts.cache.get_keys(queue_prefix):
+		save_queue_to_db(key, get_doctype_name(key))
 
-			if record_count % 100 == 0:
-				nts.db.commit()
 
+def save_queue_to_db(key: bytes, doctype: str):
+	"""Drain queue stored at `key` in batches and insert records using multi-row INSERTs."""
+	started = time.monotonic()
+	inserted = failed = 0
 
-def insert_record(record: dict | "Document", doctype: str):
+	while inserted + failed < MAX_RECORDS_PER_RUN and (items := pop_items(key, DRAIN_BATCH_SIZE)):
+		records = []
+		for item in items:
+			item = json.loads(item)
+			if isinstance(item, dict):
+				records.append(item)
+			else:
+				records.extend(item)
+
+		with nts.db.batch_inserts(skip_failed_rows=True) as insert_batch:
+			for record in records:
+				if insert_record(record, doctype):
+					inserted += 1
+				else:
+					failed += 1
+		# rows which failed only when written
+		inserted -= insert_batch.skipped
+		failed += insert_batch.skipped
+		nts.db.commit()
+
+	if not (inserted or failed):
+		return
+
+	duration = time.monotonic() - started
+	stats = {
+		"inserted": inserted,
+		"failed": failed,
+		"duration": round(duration, 3),
+		"records_per_second": round(inserted / duration, 1) if duration else None,
+		"pending": nts.cache.llen(get_key_name(key)),
+		"timestamp": nts.utils.now(),
+	}
+	nts.cache.hset(STATISTICS_KEY, doctype, stats)
+	add_counter_to_monitor("deferred_insert_records", inserted)
+	nts.logger("deferred_insert").info({"doctype": doctype, **stats})
+
+
+def get_statistics() -> dict[str, dict]:
+	"""Return statistics of last `save_to_db` run for each doctype, used to size the job interval."""
+	return nts.cache.hgetall(STATISTICS_KEY)
+
+
+def pop_items(key: bytes, count: int) -> list[bytes]:
+	"""Atomically remove and return up to `count` items from the start of queue at `key`."""
+	with nts.cache.pipeline(transaction=True) as pipeline:
+		pipeline.lrange(key, 0, count - 1)
+		pipeline.ltrim(key, count, -1)
+		items, _ = pipeline.execute()
+	return items
+
+
+def insert_record(record: dict | "Document", doctype: str) -> bool:
 	try:
 		record.update({"doctype": doctype})
 		nts.get_doc(record).insert()
+		return True
 	except Exception as e:
 		nts.logger().error(f"Error while inserting deferred {doctype} record: {e}")
+		return False
 
 
 def get_key_name(key: str) -> str:
@@ -44,11 +44,9 @@ class NotificationLog(Document):
 
 	@staticmethod
 	def clear_old_logs(days=180):
-		from nts.query_builder import Interval
-		from nts.query_builder.functions import Now
+		from nts.core.doctype.log_settings.log_settings import purge_old_logs
 
-		table = nts.qb.DocType("Notification Log")
-		nts.db.delete(table, filters=(table.creation < (Now() - Interval(days=days))))
+		purge_old_logs("Notification Log", days)
 
 
 def get_permission_query_conditions(for_user):
@@ -21,11 +21,9 @@ class RouteHistory(Document):
 
 	@staticmethod
 	def clear_old_logs(days=30):
-		from nts.query_builder import Interval
-		from nts.query_builder.functions import Now
+		from nts.core.doctype.log_settings.log_settings import purge_old_logs
 
-		table = nts.qb.DocType("Route History")
-		nts.db.delete(table, filters=(table.creation < (Now() - Interval(days=days))))
+		purge_old_logs("Route History", days)
 
 
 @nts.whitelist()
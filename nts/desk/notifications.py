@@ -39,8 +39,9 @@ def get_notifications():
 	notification_count = {}
 	notification_percent = {}
 
+	counts = nts.cache.hget_names([f"notification_count:{name}" for name in groups], nts.session.user)
 	for name in groups:
-		count = nts.cache.hget("notification_count:" + name, nts.session.user)
+		count = counts[f"notification_count:{name}"]
 		if count is not None:
 			notification_count[name] = count
 
@@ -13,6 +13,7 @@ from typing import TYPE_CHECKING
 
 import nts
 from nts import _, are_emails_muted, safe_encode, task
+from nts.core.doctype.log_settings.log_settings import purge_old_logs
 from nts.core.utils import html2text
 from nts.database.database import savepoint
 from nts.email.doctype.email_account.email_account import EmailAccount
@@ -21,8 +22,7 @@ from nts.email.ntsmail import ntsMail
 from nts.email.queue import get_unsubcribed_url, get_unsubscribe_message
 from nts.email.smtp import SMTPServer
 from nts.model.document import Document
-from nts.query_builder import DocType, Interval
-from nts.query_builder.functions import Now
+from nts.query_builder import DocType
 from nts.utils import (
 	add_days,
 	cint,
@@ -213,26 +213,8 @@ class EmailQueue(Document):
 
 	@staticmethod
 	def clear_old_logs(days=30):
-		"""Remove low priority older than 31 days in Outbox or configured in Log Settings.
-		Note: Used separate query to avoid deadlock
-		"""
-		days = days or 31
-		email_queue = nts.qb.DocType("Email Queue")
-		email_recipient = nts.qb.DocType("Email Queue Recipient")
-
-		# Delete queue table
-		(
-			nts.qb.from_(email_queue).delete().where(email_queue.creation < (Now() - Interval(days=days)))
-		).run()
-
-		# delete child tables, note that this has potential to leave some orphan
-		# child table behind if modified time was later than parent doc (rare).
-		# But it's safe since child table doesn't contain links.
-		(
-			nts.qb.from_(email_recipient)
-			.delete()
-			.where(email_recipient.creation < (Now() - Interval(days=days)))
-		).run()
+		"""Remove low priority older than 31 days in Outbox or configured in Log Settings."""
+		purge_old_logs("Email Queue", days or 31, child_doctypes=("Email Queue Recipient",))
 
 
 from nts.deprecation_dumpster import send_mail as _send_mail
@@ -2,6 +2,7 @@
 # License: MIT. See LICENSE
 
 import nts
+from nts.core.doctype.log_settings.log_settings import purge_old_logs
 from nts.model.document import Document
 
 
@@ -23,9 +24,4 @@ class UnhandledEmail(Document):
 
 	@staticmethod
 	def clear_old_logs(days=30):
-		nts.db.delete(
-			"Unhandled Email",
-			{
-				"creation": ("<", nts.utils.add_days(nts.utils.nowdate(), -1 * days)),
-			},
-		)
+		purge_old_logs("Unhandled Email", days)
@@ -1,10 +1,12 @@
 # Copyright (c) 2022, nts Technologies Pvt. Ltd. and Contributors
 # License: MIT. See LICENSE
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import timedelta
 
 import nts
 from nts import _, msgprint
-from nts.utils import cint, cstr, get_url, now_datetime
+from nts.utils import CallbackManager, cint, cstr, get_url, now_datetime
 from nts.utils.data import getdate
 from nts.utils.verified_command import get_signed_params, verify_request
 
@@ -12,6 +14,9 @@ from nts.utils.verified_command import get_signed_params, verify_request
 # This usually indicates a systemic failure so we shouldn't keep trying to send emails.
 EMAIL_QUEUE_BATCH_FAILURE_THRESHOLD_PERCENT = 0.33
 EMAIL_QUEUE_BATCH_FAILURE_THRESHOLD_COUNT = 10
+# Threads sending from one email account at a time when `email_queue_workers` is set, mail servers
+# usually limit concurrent connections of an account.
+EMAIL_QUEUE_WORKERS_PER_ACCOUNT = 4
 
 
 def get_emails_sent_this_month(email_account=None):
@@ -130,9 +135,10 @@ def flush():
 	"""flush email queue, every time: called from scheduler.
 
 	This should not be called outside of background jobs.
-	"""
-	from nts.email.doctype.email_queue.email_queue import EmailQueue
 
+	Emails are sent one by one, reusing connection to mail server of each email account. With
+	`email_queue_workers` set in site config, emails are sent by that many threads in parallel.
+	"""
 	# To avoid running jobs inside unit tests
 	if nts.are_emails_muted():
 		msgprint(_("Emails are muted"))
@@ -145,20 +151,117 @@ def flush():
 		return
 
 	failed_email_queues = []
+	workers = cint(nts.conf.email_queue_workers)
+	if workers > 1:
+		with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="nts-email-queue") as executor:
+			for names in get_sending_tasks(email_queue_batch, workers):
+				executor.submit(
+					send_emails_in_thread,
+					nts.local.site,
+					nts.local.sites_path,
+					nts.session.user,
+					names,
+					len(email_queue_batch),
+					failed_email_queues,
+				)
+	else:
+		send_emails([row.name for row in email_queue_batch], len(email_queue_batch), failed_email_queues)
+
+	if has_too_many_failures(failed_email_queues, len(email_queue_batch)):
+		nts.throw(_("Email Queue flushing aborted due to too many failures."))
+
+
+def send_emails(names: list[str], batch_size: int, failed_email_queues: list[str]):
+	"""Send emails of Email Queues `names` and add names of the ones which failed to `failed_email_queues`.
+
+	Sending stops when too many emails of the batch have failed."""
+	from nts.email.doctype.email_queue.email_queue import EmailQueue
+
+	connections = OutgoingConnections()
+	try:
+		for name in names:
+			if has_too_many_failures(failed_email_queues, batch_size):
+				return
+
+			try:
+				email_queue: EmailQueue = nts.get_doc("Email Queue", name, for_update=True)
+				email_queue.send(**connections.get(email_queue))
+			except Exception:
+				nts.get_doc("Email Queue", name).log_error()
+				failed_email_queues.append(name)
+	finally:
+		connections.close()
+
+
+def send_emails_in_thread(site, sites_path, user, names, batch_size, failed_email_queues):
+	nts.init(site, sites_path=sites_path, cached_config=True)
+	try:
+		nts.connect()
+		nts.set_user(user)
+		# Thread has its own job, connections to mail servers closed "after job" are closed when the
+		# thread is done instead of piling up on the job running flush.
+		nts.local.job = nts._dict(
+			site=site, method="nts.email.queue.flush", user=user, after_job=CallbackManager()
+		)
+		try:
+			send_emails(names, batch_size, failed_email_queues)
+		finally:
+			nts.local.job.after_job.run()
+	except Exception:
+		nts.logger("email").error("Failed to send emails from email queue", exc_info=True)
+	finally:
+		nts.destroy()
+
+
+def get_sending_tasks(email_queue_batch: list[dict], workers: int) -> list[list[str]]:
+	"""Split batch into lists of Email Queues, each sent by a thread.
+
+	Emails of an email account are split among at most `EMAIL_QUEUE_WORKERS_PER_ACCOUNT` lists, so
+	that no more than these many threads send from an account at a time."""
+	by_account = defaultdict(list)
 	for row in email_queue_batch:
+		by_account[row.email_account or row.sender].append(row.name)
+
+	tasks = []
+	for names in by_account.values():
+		count = min(workers, EMAIL_QUEUE_WORKERS_PER_ACCOUNT, len(names))
+		tasks.extend(names[i::count] for i in range(count))
+	return tasks
+
+
+def has_too_many_failures(failed_email_queues: list[str], batch_size: int) -> bool:
+	return (
+		len(failed_email_queues) / batch_size > EMAIL_QUEUE_BATCH_FAILURE_THRESHOLD_PERCENT
+		and len(failed_email_queues) > EMAIL_QUEUE_BATCH_FAILURE_THRESHOLD_COUNT
+	)
+
+
+class OutgoingConnections:
+	"""Connections to outgoing mail servers by email account, reused for all emails sent from an account."""
+
+	def __init__(self):
+		self.smtp_servers = {}
+		self.mail_clients = {}
+
+	def get(self, email_queue) -> dict:
+		"""Keyword arguments for `EmailQueue.send` to use existing connection of email account."""
 		try:
-			email_queue: EmailQueue = nts.get_doc("Email Queue", row.name, for_update=True)
-			email_queue.send()
+			email_account = email_queue.get_email_account(raise_error=True)
+			if email_account.service == "nts Mail":
+				if email_account.name not in self.mail_clients:
+					self.mail_clients[email_account.name] = email_account.get_nts_mail_client()
+				return {"nts_mail_client": self.mail_clients[email_account.name]}
+
+			if email_account.name not in self.smtp_servers:
+				self.smtp_servers[email_account.name] = email_account.get_smtp_server()
+			return {"smtp_server_instance": self.smtp_servers[email_account.name]}
 		except Exception:
-			nts.get_doc("Email Queue", row.name).log_error()
-			failed_email_queues.append(row.name)
+			# `send` fails with same error and records it on the email queue
+			return {}
 
-			if (
-				len(failed_email_queues) / len(email_queue_batch)
-				> EMAIL_QUEUE_BATCH_FAILURE_THRESHOLD_PERCENT
-				and len(failed_email_queues) > EMAIL_QUEUE_BATCH_FAILURE_THRESHOLD_COUNT
-			):
-				nts.throw(_("Email Queue flushing aborted due to too many failures."))
+	def close(self):
+		for smtp_server in self.smtp_servers.values():
+			smtp_server.quit()
 
 
 def get_queue():
@@ -166,7 +269,7 @@ def get_queue():
 
 	return nts.db.sql(
 		f"""select
-			name, sender
+			name, sender, email_account
 		from
 			`tabEmail Queue`
 		where
@@ -248,6 +248,7 @@ scheduler_events = {
 		"nts.oauth.delete_oauth2_data",
 		"nts.website.doctype.web_page.web_page.check_publish_status",
 		"nts.desk.utils.delete_old_exported_report_files",
+		"nts.model.meta_snapshot.update_meta_snapshot",
 	],
 	"daily": [
 		"nts.desk.doctype.event.event.send_event_digest",
@@ -37,11 +37,9 @@ class IntegrationRequest(Document):
 			self.name = self.flags._name
 
 	def clear_old_logs(days=30):
-		from nts.query_builder import Interval
-		from nts.query_builder.functions import Now
+		from nts.core.doctype.log_settings.log_settings import purge_old_logs
 
-		table = nts.qb.DocType("Integration Request")
-		nts.db.delete(table, filters=(table.creation < (Now() - Interval(days=days))))
+		purge_old_logs("Integration Request", days)
 
 	def update_status(self, params, status):
 		data = json.loads(self.data)
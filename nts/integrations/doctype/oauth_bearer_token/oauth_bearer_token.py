@@ -2,9 +2,8 @@
 # License: MIT. See LICENSE
 
 import nts
+from nts.core.doctype.log_settings.log_settings import purge_old_logs
 from nts.model.document import Document
-from nts.query_builder import Interval
-from nts.query_builder.functions import Now
 from nts.utils.data import add_to_date
 
 
@@ -33,8 +32,4 @@ class OAuthBearerToken(Document):
 
 	@staticmethod
 	def clear_old_logs(days=30):
-		table = nts.qb.DocType("OAuth Bearer Token")
-		nts.db.delete(
-			table,
-			filters=(table.expiration_time < (Now() - Interval(days=days))),
-		)
+		purge_old_logs("OAuth Bearer Token", days, date_field="expiration_time")
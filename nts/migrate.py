@@ -22,6 +22,7 @@ from nts.core.doctype.scheduled_job_type.scheduled_job_type import sync_jobs
 from nts.database.schema import add_column
 from nts.deferred_insert import save_to_db as flush_deferred_inserts
 from nts.desk.notifications import clear_notifications
+from nts.model.meta_snapshot import build_meta_snapshot
 from nts.modules.patch_handler import PatchType
 from nts.modules.utils import sync_customizations
 from nts.search.website_search import build_index_for_all_routes
@@ -196,6 +197,11 @@ class SiteMigration:
 			for fn in nts.get_hooks("after_migrate", app_name=app):
 				nts.get_attr(fn)()
 
+	def build_meta_snapshot(self):
+		"""Build metas of all doctypes once, so that workers don't have to build them after migration"""
+		print("Building meta snapshot...")
+		build_meta_snapshot()
+
 	def required_services_running(self) -> bool:
 		"""Return True if all required services are running. Return False and print
 		instructions to stdout when required services are not available.
@@ -272,6 +278,7 @@ class SiteMigration:
 				self.pre_schema_updates()
 				self.run_schema_updates()
 				self.post_schema_updates()
+				self.build_meta_snapshot()
 			finally:
 				self.tearDown()
 				nts.destroy()
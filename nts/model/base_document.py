@@ -737,6 +737,17 @@ class BaseDocument:
 			ignore_virtual=True,
 		)
 
+		if (
+			nts.db.insert_batch
+			and not conflict_handler
+			and not ignore_if_duplicate
+			and not (self.meta.autoname == "hash" and not self.meta.istable)
+		):
+			# written later using a multi-row INSERT, see `Database.batch_inserts`
+			nts.db.insert_batch.add(self, d)
+			self.set("__islocal", False)
+			return
+
 		columns = list(d)
 		try:
 			name = nts.db.sql(
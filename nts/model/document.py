@@ -26,6 +26,7 @@ from nts.model.docstatus import DocStatus
 from nts.model.naming import set_new_name, validate_name
 from nts.model.utils import is_virtual_doctype, simple_singledispatch
 from nts.model.workflow import set_workflow_state_on_action, validate_workflow
+from nts.monitor import measure
 from nts.types import DF
 from nts.types.filter import FilterSignature
 from nts.utils import compare, cstr, date_diff, file_lock, flt, get_table_name, now
@@ -40,6 +41,7 @@ if TYPE_CHECKING:
 
 DOCUMENT_LOCK_EXPIRY = 3 * 60 * 60  # All locks expire in 3 hours automatically
 DOCUMENT_LOCK_SOFT_EXPIRY = 30 * 60  # Let users force-unlock after 30 minutes
+GET_DOCS_BATCH_SIZE = 1000  # Max documents loaded per query by `get_docs`
 
 
 type _SingleDocument = "Document"
@@ -156,6 +158,105 @@ def get_lazy_doc(
 	raise ImportError(doctype)
 
 
+def get_docs(
+	doctype: str,
+	names: Iterable[str],
+	*,
+	for_update: bool | None = None,
+	check_permission: str | bool | None = None,
+) -> list["Document"]:
+	"""Load multiple documents of `doctype`, in order of `names`.
+
+	Same as `[nts.get_doc(doctype, name) for name in names]` except that all parents are fetched
+	using one query and each child table using one `parent IN (...)` query, instead of one query per
+	document per child table.
+
+	Raise `nts.DoesNotExistError` if any of the documents doesn't exist.
+
+	Usage:
+	        for invoice in nts.get_docs("Sales Invoice", names, check_permission="read"):
+	                ...
+	"""
+	names = list(dict.fromkeys(names))
+	controller = get_controller(doctype)
+
+	if (
+		doctype == "DocType"
+		or is_virtual_doctype(doctype)
+		or nts.get_meta(doctype).issingle
+		# controllers with custom loading logic or state set up in constructor
+		or controller.__init__ is not Document.__init__
+		or controller.load_from_db is not Document.load_from_db
+		or controller.load_children_from_db is not Document.load_children_from_db
+		or controller._load_child_table_from_db is not Document._load_child_table_from_db
+	):
+		return [
+			get_doc(doctype, name, for_update=for_update, check_permission=check_permission) for name in names
+		]
+
+	for_update_clause = "FOR UPDATE" if for_update and nts.db.db_type != "sqlite" else ""
+	rows = {}
+	children = {}
+	for batch in nts.utils.create_batch(names, GET_DOCS_BATCH_SIZE):
+		rows.update(
+			(cstr(row.name), row)
+			for row in nts.db.sql(
+				"SELECT * FROM {table_name} WHERE `name` IN ({names}) {for_update}".format(
+					table_name=get_table_name(doctype, wrap_in_backticks=True),
+					names=", ".join(["%s"] * len(batch)),
+					for_update=for_update_clause,
+				),
+				batch,
+				as_dict=True,
+			)
+		)
+		_load_children_for_docs(doctype, list(batch), children, for_update_clause)
+
+	docs = []
+	for name in names:
+		if (row := rows.get(cstr(name))) is None:
+			nts.throw(
+				_("{0} {1} not found").format(_(doctype), name),
+				nts.DoesNotExistError(doctype=doctype),
+			)
+
+		doc = controller.__new__(controller)
+		doc.doctype = doctype
+		doc.name = row.name
+		doc.flags = nts._dict(for_update=for_update or False)
+		doc._load_from_db_row(row, children.get(cstr(row.name), {}))
+		docs.append(get_doc_permission_check(doc, check_permission))
+
+	return docs
+
+
+def _load_children_for_docs(doctype: str, names: list[str], children: dict, for_update_clause: str):
+	"""Fetch child rows of `names` in `children` as parent -> fieldname -> rows."""
+	table_fields = {}
+	for df in nts.get_meta(doctype).get_table_fields():
+		if not is_virtual_doctype(df.options):
+			table_fields.setdefault(df.options, []).append(df.fieldname)
+
+	parents = [str(name) for name in names]
+	for child_doctype, fieldnames in table_fields.items():
+		rows = nts.db.sql(
+			"""SELECT * FROM {table_name}
+			WHERE `parent` IN ({parents})
+				AND `parenttype`= %s
+				AND `parentfield` IN ({fieldnames})
+			ORDER BY `idx` ASC {for_update}""".format(
+				table_name=get_table_name(child_doctype, wrap_in_backticks=True),
+				parents=", ".join(["%s"] * len(parents)),
+				fieldnames=", ".join(["%s"] * len(fieldnames)),
+				for_update=for_update_clause,
+			),
+			(*parents, doctype, *fieldnames),
+			as_dict=True,
+		)
+		for row in rows:
+			children.setdefault(row.parent, {}).setdefault(row.parentfield, []).append(row)
+
+
 def get_doc_permission_check(doc: "Document", check_permission: str | bool | None = None) -> "Document":
 	"""
 	Checks permissions for the given document, if specified.
@@ -283,11 +384,30 @@ class Document(BaseDocument):
 
 		self.load_children_from_db()
 
+		return self._after_load_from_db()
+
+	def _load_from_db_row(self, d: dict, children: dict[str, list[dict]]) -> "Self":
+		"""Same as `load_from_db` with parent row and child rows (fieldname -> rows) already
+		fetched, used by `get_docs`."""
+		self.flags.ignore_children = True
+		super().__init__(d)
+		self.flags.pop("ignore_children", None)
+
+		for fieldname, child_doctype in self._table_fieldnames.items():
+			if is_virtual_doctype(child_doctype):
+				self.__dict__.pop(fieldname, None)
+				continue
+
+			self.set(fieldname, children.get(fieldname, []))
+
+		return self._after_load_from_db()
+
+	def _after_load_from_db(self) -> "Self":
 		# sometimes __setup__ can depend on child values, hence calling again at the end
 		if hasattr(self, "__setup__"):
 			self.__setup__()
 
-		if not is_doctype:
+		if self.doctype != "DocType":
 			self.mask_fields()
 
 		return self
@@ -968,14 +1088,11 @@ class Document(BaseDocument):
 					d.reset_values_if_no_permlevel_access(has_access_to, high_permlevel_fields)
 
 	def get_permlevel_access(self, permission_type="write"):
-		allowed_permlevels = []
-		roles = nts.get_roles()
-
-		for perm in self.get_permissions():
-			if perm.role in roles and perm.get(permission_type) and perm.permlevel not in allowed_permlevels:
-				allowed_permlevels.append(perm.permlevel)
+		from nts.permissions import get_permission_matrix
 
-		return allowed_permlevels
+		# same as `get_permissions`
+		meta = nts.get_meta(self.parenttype) if self.meta.istable else self.meta
+		return get_permission_matrix(meta, nts.get_roles()).get_permlevels(permission_type)
 
 	def has_permlevel_access_to(self, fieldname, df=None, permission_type="read"):
 		if not df:
@@ -1178,11 +1295,12 @@ class Document(BaseDocument):
 				return method_object(*args, **kwargs)
 
 		fn.__name__ = str(method)
-		out = Document.hook(fn)(self, *args, **kwargs)
+		with measure("run_method"):
+			out = Document.hook(fn)(self, *args, **kwargs)
 
-		self.run_notifications(method)
-		run_webhooks(self, method)
-		run_server_script_for_doc_event(self, method)
+			self.run_notifications(method)
+			run_webhooks(self, method)
+			run_server_script_for_doc_event(self, method)
 
 		return out
 
@@ -2162,7 +2280,7 @@ def new_doc(
 
 def get_cached_doc(*args: Any, **kwargs: Any) -> "Document":
 	"""Identical to `nts.get_doc`, but return from cache if available."""
-	if (key := can_cache_doc(args)) and (doc := nts.cache.get_value(key)):
+	if (key := can_cache_doc(args)) and (doc := nts.client_cache.get_document(args[0], key)):
 		return doc
 
 	# Not found in cache, fetch from DB
@@ -2178,7 +2296,7 @@ def get_cached_doc(*args: Any, **kwargs: Any) -> "Document":
 
 
 def _set_document_in_cache(key: str, doc: "Document") -> None:
-	nts.cache.set_value(key, doc, expires_in_sec=3600)
+	nts.client_cache.set_document(doc.doctype, key, doc)
 
 
 def can_cache_doc(args) -> str | None:
@@ -2207,9 +2325,12 @@ def clear_document_cache(doctype: str, name: str | None = None) -> None:
 
 	def clear_in_redis():
 		if name is not None:
-			nts.cache.delete_value(get_document_cache_key(doctype, name))
+			key = get_document_cache_key(doctype, name)
+			nts.cache.delete_value(key)
+			nts.client_cache.clear_documents(doctype, key)
 		else:
 			nts.cache.delete_keys(get_document_cache_key(doctype, ""))
+			nts.client_cache.clear_documents(doctype)
 
 	clear_in_redis()
 	if hasattr(nts.db, "after_commit"):
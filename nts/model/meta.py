@@ -38,6 +38,7 @@ from nts.model.base_document import (
 	BaseDocument,
 )
 from nts.model.document import Document
+from nts.model.meta_snapshot import get_meta_from_snapshot, reset_meta_version
 from nts.model.utils import is_single_doctype
 from nts.model.workflow import get_workflow_name
 from nts.modules import load_doctype_module
@@ -79,12 +80,12 @@ def get_meta(doctype: "str | DocType", cached: bool = True) -> "_Meta":
 	Returns:
 	    Meta object for the given doctype.
 	"""
-	if (
-		cached
-		and isinstance(doctype, str)
-		and (meta := nts.client_cache.get_value(f"doctype_meta::{doctype}"))
-	):
-		return meta
+	if cached and isinstance(doctype, str):
+		if meta := get_meta_from_snapshot(doctype):
+			return meta
+
+		if meta := nts.client_cache.get_value(f"doctype_meta::{doctype}"):
+			return meta
 
 	meta = Meta(doctype)
 
@@ -94,11 +95,16 @@ def get_meta(doctype: "str | DocType", cached: bool = True) -> "_Meta":
 
 
 def clear_meta_cache(doctype: str = "*"):
+	from nts.database.query_plan import clear_query_plan_cache
+
+	reset_meta_version()
 	key = f"doctype_meta::{doctype}"
 	if doctype == "*":
 		nts.client_cache.delete_keys(key)
+		clear_query_plan_cache()
 	else:
 		nts.client_cache.delete_value(key)
+		clear_query_plan_cache(doctype)
 
 
 def load_meta(doctype):
@@ -718,14 +724,11 @@ class Meta(Document):
 		return permitted_fieldnames
 
 	def get_permlevel_access(self, permission_type="read", parenttype=None, *, user=None):
-		has_access_to = []
-		roles = set(nts.get_roles(user))
-		for perm in self.get_permissions(parenttype):
-			if perm.role in roles and perm.get(permission_type):
-				if perm.permlevel not in has_access_to:
-					has_access_to.append(perm.permlevel)
-
-		return has_access_to
+		from nts.permissions import get_permission_matrix
+
+		# same as `get_permissions`
+		meta = nts.get_meta(parenttype) if self.istable and parenttype else self
+		return get_permission_matrix(meta, nts.get_roles(user)).get_permlevels(permission_type)
 
 	def get_permissions(self, parenttype=None):
 		if self.istable and parenttype:
@@ -0,0 +1,186 @@
+# Copyright (c) 2026, nts Technologies Pvt. Ltd. and Contributors
+# License: MIT. See LICENSE
+
+"""
+Snapshot of metas of all doctypes shared by all workers of a site.
+
+Building `Meta` is expensive and every worker otherwise keeps its own copy of every meta it has
+used (fetched from Redis and unpickled). Instead, metas of all doctypes are built and pickled once
+per *metadata version* into a single file in site directory. Workers memory-map this file, so its
+pages are shared by all processes through OS page cache, and unpickle only the metas they need,
+keeping a bounded number of them in memory.
+
+Metadata version is a random token stored in Redis which is reset whenever meta of any doctype is
+cleared from cache. A snapshot is only used if it was built for current version, otherwise
+`get_meta` falls back to building `Meta` and storing it in client cache.
+
+File format:
+
+	MAGIC | offset of index | length of index | pickled metas ... | pickled index
+
+Index maps doctype to offset and length of its pickled meta.
+"""
+
+import mmap
+import os
+import pickle
+import struct
+import time
+from contextlib import suppress
+
+import nts
+from nts.utils.lru import LRUCache
+
+META_VERSION_KEY = "meta_snapshot_version"
+SNAPSHOT_DIRECTORY = "meta_snapshots"
+SNAPSHOT_SUFFIX = ".snapshot"
+MAGIC = b"NTSMETA1"
+HEADER = struct.Struct("<8sQQ")
+
+# Max number of unpickled metas kept in memory per worker, others are unpickled again when needed.
+MAX_LOADED_METAS = 256
+# Interval (seconds) after which a worker checks again for a snapshot that didn't exist.
+RECHECK_INTERVAL = 60
+
+# site -> snapshot attached by this process
+_SNAPSHOTS: dict[str, "MetaSnapshot"] = {}
+
+
+class MetaSnapshot:
+	"""Read only view of a snapshot file for a metadata version."""
+
+	__slots__ = ("buffer", "checked_at", "index", "metas", "version")
+
+	def __init__(self, version: str):
+		self.version = version
+		self.buffer: mmap.mmap | None = None
+		self.index: dict[str, tuple[int, int]] = {}
+		self.metas = LRUCache(MAX_LOADED_METAS, name="meta_snapshot")
+		self.checked_at = 0.0
+
+	def attach(self, path: str) -> bool:
+		self.checked_at = time.monotonic()
+		try:
+			with open(path, "rb") as f:
+				buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+		except (FileNotFoundError, ValueError):  # ValueError: empty file
+			return False
+
+		magic, index_offset, index_length = HEADER.unpack_from(buffer)
+		if magic != MAGIC:
+			buffer.close()
+			return False
+
+		self.index = pickle.loads(buffer[index_offset : index_offset + index_length])
+		self.buffer = buffer
+		return True
+
+	@property
+	def attached(self) -> bool:
+		return self.buffer is not None
+
+	def get(self, doctype: str):
+		if (meta := self.metas.get(doctype)) is not None:
+			return meta
+
+		if (location := self.index.get(doctype)) is None:
+			return None
+
+		offset, length = location
+		meta = pickle.loads(self.buffer[offset : offset + length])
+		self.metas[doctype] = meta
+		return meta
+
+
+def get_meta_from_snapshot(doctype: str):
+	"""Return meta of `doctype` from snapshot of current metadata version, `None` if not available."""
+	version = get_meta_version()
+	site = nts.local.site
+
+	snapshot = _SNAPSHOTS.get(site)
+	if snapshot is None or snapshot.version != version:
+		snapshot = _SNAPSHOTS[site] = MetaSnapshot(version)
+		snapshot.attach(get_snapshot_path(version))
+	elif not snapshot.attached and time.monotonic() - snapshot.checked_at > RECHECK_INTERVAL:
+		snapshot.attach(get_snapshot_path(version))
+
+	if snapshot.attached:
+		return snapshot.get(doctype)
+
+
+def get_meta_version() -> str:
+	return nts.client_cache.get_value(META_VERSION_KEY, generator=nts.generate_hash)
+
+
+def reset_meta_version():
+	"""Invalidate current snapshot, called whenever meta of any doctype changes."""
+	nts.client_cache.delete_value(META_VERSION_KEY)
+
+
+def get_snapshot_path(version: str) -> str:
+	return nts.get_site_path(SNAPSHOT_DIRECTORY, f"{version}{SNAPSHOT_SUFFIX}")
+
+
+def build_meta_snapshot(doctypes: list[str] | None = None) -> str | None:
+	"""Build snapshot for current metadata version.
+
+	Return path of the snapshot or `None` if metadata changed while building it."""
+	from nts.model.meta import CACHE_PROPERTIES, Meta
+
+	version = get_meta_version()
+	if doctypes is None:
+		doctypes = nts.get_all("DocType", pluck="name", order_by="name")
+
+	path = get_snapshot_path(version)
+	os.makedirs(os.path.dirname(path), exist_ok=True)
+	temp_path = f"{path}.{os.getpid()}.tmp"
+	index = {}
+
+	with open(temp_path, "wb") as f:
+		f.seek(HEADER.size)
+		for doctype in doctypes:
+			try:
+				meta = Meta(doctype)
+				# precompute field maps so that workers don't have to
+				for prop in CACHE_PROPERTIES:
+					getattr(meta, prop)
+			except Exception:
+				nts.logger("meta_snapshot").exception(f"Failed to build meta of {doctype}")
+				continue
+
+			data = pickle.dumps(meta, protocol=pickle.HIGHEST_PROTOCOL)
+			index[doctype] = (f.tell(), len(data))
+			f.write(data)
+
+		data = pickle.dumps(index, protocol=pickle.HIGHEST_PROTOCOL)
+		index_offset = f.tell()
+		f.write(data)
+		f.seek(0)
+		f.write(HEADER.pack(MAGIC, index_offset, len(data)))
+
+	if get_meta_version() != version:
+		os.remove(temp_path)
+		return None
+
+	os.replace(temp_path, path)
+	remove_old_snapshots(keep=path)
+	return path
+
+
+def remove_old_snapshots(keep: str | None = None):
+	directory = nts.get_site_path(SNAPSHOT_DIRECTORY)
+	if not os.path.isdir(directory):
+		return
+
+	for filename in os.listdir(directory):
+		path = os.path.join(directory, filename)
+		if path != keep and filename.endswith(SNAPSHOT_SUFFIX):
+			# processes which have attached this snapshot can still read it
+			with suppress(FileNotFoundError):
+				os.remove(path)
+
+
+def update_meta_snapshot():
+	"""Build snapshot if metadata changed since last snapshot was built."""
+	if not os.path.exists(get_snapshot_path(get_meta_version())):
+		build_meta_snapshot()
@@ -4,9 +4,11 @@
 
 import copy
 import json
+from collections.abc import Iterator
 from typing import Any
 
 import nts
+from nts.database.query_plan import run_query
 from nts.database.utils import DefaultOrderBy, FilterValue
 from nts.deprecation_dumpster import deprecation_warning
 from nts.model.utils import is_virtual_doctype
@@ -57,7 +59,8 @@ class DatabaseQuery:
 		*,
 		parent_doctype: str | None = None,
 		ignore_user_permissions: bool = False,
-	) -> list:
+		as_iterator: bool = False,
+	) -> list | Iterator:
 		"""Execute a database query using the Query Builder engine.
 
 		Args:
@@ -93,10 +96,14 @@ class DatabaseQuery:
 			parent_doctype: Parent doctype for child table queries.
 			ignore_user_permissions: Ignore user permissions for the query.
 				Useful for link search queries when the link field has `ignore_user_permissions` set.
+			as_iterator: Return an iterator over results instead of fetching all of them at once.
+				Use with `nts.db.unbuffered_cursor()` to stream large result sets. Child table
+				fields can't be fetched in this mode.
 
 		Returns:
 			Query results as list of dicts (default) or list of lists (as_list=True).
 			If pluck is specified, returns list of field values.
+			If as_iterator is set, returns an iterator over the same rows.
 			If run=False, returns query object instead of results.
 
 		Raises:
@@ -122,7 +129,7 @@ class DatabaseQuery:
 
 		# Handle virtual doctypes before any other processing
 		if is_virtual_doctype(self.doctype):
-			return self._handle_virtual_doctype(
+			result = self._handle_virtual_doctype(
 				fields,
 				filters,
 				or_filters,
@@ -140,6 +147,7 @@ class DatabaseQuery:
 				pluck,
 				parent_doctype,
 			)
+			return iter(result) if as_iterator else result
 
 		# Handle deprecated parameters
 		if limit_start:
@@ -177,7 +185,7 @@ class DatabaseQuery:
 			get_table_columns(self.doctype)
 		except nts.db.TableMissingError:
 			if ignore_ddl:
-				return []
+				return iter(()) if as_iterator else []
 			else:
 				raise
 
@@ -200,20 +208,23 @@ class DatabaseQuery:
 			"db_query_compat": True,
 		}
 
-		query = nts.qb.get_query(**kwargs)
-
 		if not run:
-			return query
+			return nts.qb.get_query(**kwargs)
 
-		# Run the query
+		# Run the query, reusing compiled SQL for queries of the same shape
+		# `as_iterator` needs an explicit row format, see `Database._return_as_iterator`
+		iterator_kwargs = {"as_iterator": True, "as_list": as_list} if as_iterator else {}
 		if pluck:
-			result = query.run(debug=debug, as_dict=True, pluck=pluck)
+			result = run_query(kwargs, debug=debug, as_dict=True, pluck=pluck, **iterator_kwargs)
 		else:
-			result = query.run(debug=debug, as_dict=not as_list, update=update)
+			result = run_query(kwargs, debug=debug, as_dict=not as_list, update=update, **iterator_kwargs)
 
 		# Add comment count if requested and not as_list
 		if sbool(with_comment_count) and not as_list and self.doctype:
-			self._add_comment_count(result)
+			if as_iterator:
+				result = self._iter_with_comment_count(result)
+			else:
+				self._add_comment_count(result)
 
 		# Save user settings if requested
 		if save_user_settings:
@@ -248,6 +259,12 @@ class DatabaseQuery:
 			elif isinstance(row, dict):
 				row["_comment_count"] = 0
 
+	def _iter_with_comment_count(self, result: Iterator) -> Iterator:
+		"""Lazy version of `_add_comment_count` for results fetched with `as_iterator`."""
+		for row in result:
+			self._add_comment_count([row])
+			yield row
+
 	def _save_user_settings(
 		self,
 		user_settings: dict[str, Any] | None,
@@ -49,9 +49,7 @@ def mask_dict_results(result, masked_fields):
 		Result with masked field values
 	"""
 	for row in result:
-		for field in masked_fields:
-			if field.fieldname in row:
-				row[field.fieldname] = mask_field_value(field, row[field.fieldname])
+		mask_dict_row(row, masked_fields)
 	return result
 
 
@@ -66,12 +64,40 @@ def mask_list_results(result, masked_fields, field_index_map):
 	Returns:
 		List of tuples with masked field values
 	"""
-	masked_result = []
+	return [mask_list_row(row, masked_fields, field_index_map) for row in result]
+
+
+def iter_masked_results(result, masked_fields, field_index_map=None):
+	"""Lazily mask rows of an iterator, e.g. one returned by `nts.db.sql(..., as_iterator=True)`.
+
+	Args:
+		result: Iterator over dictionaries or tuples/lists
+		masked_fields: List of DocField objects with masking configuration
+		field_index_map: Dict mapping field names to their position in rows, `None` for dict rows
+
+	Yields:
+		Rows with masked field values
+	"""
 	for row in result:
-		row = list(row)  # Convert tuple to list for modification
-		for field in masked_fields:
-			if field.fieldname in field_index_map:
-				idx = field_index_map[field.fieldname]
-				row[idx] = mask_field_value(field, row[idx])
-		masked_result.append(tuple(row))  # Convert back to tuple
-	return masked_result
+		if field_index_map is not None:
+			yield mask_list_row(row, masked_fields, field_index_map)
+		elif isinstance(row, dict):
+			yield mask_dict_row(row, masked_fields)
+		else:
+			yield row
+
+
+def mask_dict_row(row, masked_fields):
+	for field in masked_fields:
+		if field.fieldname in row:
+			row[field.fieldname] = mask_field_value(field, row[field.fieldname])
+	return row
+
+
+def mask_list_row(row, masked_fields, field_index_map):
+	row = list(row)  # Convert tuple to list for modification
+	for field in masked_fields:
+		if field.fieldname in field_index_map:
+			idx = field_index_map[field.fieldname]
+			row[idx] = mask_field_value(field, row[idx])
+	return tuple(row)  # Convert back to tuple
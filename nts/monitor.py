@@ -6,6 +6,8 @@ import json
 import os
 import traceback
 import uuid
+from contextlib import contextmanager, nullcontext
+from time import perf_counter
 
 import rq
 
@@ -34,6 +36,26 @@ def add_data_to_monitor(**kwargs) -> None:
 		nts.local.monitor.add_custom_data(**kwargs)
 
 
+def add_counter_to_monitor(name: str, value: int = 1) -> None:
+	"""Increment a named counter logged along with the current transaction."""
+	if monitor := getattr(nts.local, "monitor", None):
+		monitor.increment_counter(name, value)
+
+
+def measure(name: str):
+	"""Context manager to add time spent in a block to the timing breakdown of current transaction.
+
+	Nested blocks with the same name are only measured once.
+
+	Usage:
+	        with nts.monitor.measure("pdf"):
+	                ...
+	"""
+	if monitor := getattr(nts.local, "monitor", None):
+		return monitor.measure(name)
+	return nullcontext()
+
+
 def get_trace_id() -> str | None:
 	"""Get unique ID for current transaction."""
 	if monitor := getattr(nts.local, "monitor", None):
@@ -45,9 +67,13 @@ def log_file():
 
 
 class Monitor:
-	__slots__ = ("data",)
+	__slots__ = ("active_timers", "data", "timings")
 
 	def __init__(self, transaction_type, method, kwargs):
+		# name -> [count, duration in seconds]
+		self.timings: dict[str, list] = {}
+		self.active_timers: set[str] = set()
+
 		try:
 			self.data = nts._dict(
 				{
@@ -92,12 +118,44 @@ class Monitor:
 		if self.data:
 			self.data.update(kwargs)
 
+	def increment_counter(self, name: str, value: int = 1):
+		counters = self.data.setdefault("counters", {})
+		counters[name] = counters.get(name, 0) + value
+
+	def add_timing(self, name: str, duration: float):
+		"""Add `duration` (seconds) to time spent in `name` (e.g. "db", "redis")."""
+		if timing := self.timings.get(name):
+			timing[0] += 1
+			timing[1] += duration
+		else:
+			self.timings[name] = [1, duration]
+
+	@contextmanager
+	def measure(self, name: str):
+		if name in self.active_timers:
+			yield
+			return
+
+		self.active_timers.add(name)
+		start = perf_counter()
+		try:
+			yield
+		finally:
+			self.active_timers.discard(name)
+			self.add_timing(name, perf_counter() - start)
+
 	def dump(self, response=None):
 		try:
 			timediff = datetime.datetime.now(datetime.UTC) - self.data.timestamp
 			# Obtain duration in microseconds
 			self.data.duration = int(timediff.total_seconds() * 1000000)
 
+			if self.timings:
+				self.data.timings = {
+					name: {"count": count, "duration": int(duration * 1000000)}
+					for name, (count, duration) in self.timings.items()
+				}
+
 			if self.data.transaction_type == "request":
 				if response:
 					self.data.request.status_code = response.status_code
@@ -111,10 +169,22 @@ class Monitor:
 					if limiter.rejected:
 						self.data.request.reset = limiter.reset
 
+				if response and nts.conf.monitor_server_timing:
+					response.headers["Server-Timing"] = self.get_server_timing()
+
 			self.store()
 		except Exception:
 			traceback.print_exc()
 
+	def get_server_timing(self) -> str:
+		"""Timing breakdown in format of `Server-Timing` header, durations are in milliseconds."""
+		metrics = [
+			f'{name};desc="{timing["count"]} calls";dur={timing["duration"] / 1000:.3f}'
+			for name, timing in self.data.get("timings", {}).items()
+		]
+		metrics.append(f"total;dur={self.data.duration / 1000:.3f}")
+		return ", ".join(metrics)
+
 	def store(self):
 		serialized = json.dumps(self.data, sort_keys=True, default=str, separators=(",", ":"))
 		length = nts.cache.rpush(MONITOR_REDIS_KEY, serialized)
@@ -2,6 +2,8 @@
 # License: MIT. See LICENSE
 import copy
 import functools
+import hashlib
+from dataclasses import dataclass
 
 import nts
 import nts.share
@@ -39,6 +41,8 @@ ADMIN_ROLE = "Administrator"
 # These roles are automatically assigned based on user type
 AUTOMATIC_ROLES = (GUEST_ROLE, ALL_USER_ROLE, SYSTEM_USER_ROLE, ADMIN_ROLE)
 
+PERMISSION_MATRIX_KEY = "permission_matrix"
+
 
 def print_has_permission_check_logs(func):
 	@functools.wraps(func)
@@ -293,29 +297,20 @@ def get_role_permissions(doctype_meta, user=None, is_owner=None, debug=False):
 		return allow_everything(doctype_meta.name)
 
 	if not nts.local.role_permissions.get(cache_key) or debug:
-		perms = nts._dict(if_owner={})
-
 		roles = nts.get_roles(user)
 		debug and _debug_log("User has following roles: " + str(roles))
 
-		def is_perm_applicable(perm):
-			return perm.role in roles and cint(perm.permlevel) == 0
-
-		def has_permission_without_if_owner_enabled(ptype):
-			return any(p.get(ptype, 0) and not p.get("if_owner", 0) for p in applicable_permissions)
-
-		applicable_permissions = list(filter(is_perm_applicable, getattr(doctype_meta, "permissions", [])))
-		has_if_owner_enabled = any(p.get("if_owner", 0) for p in applicable_permissions)
-		perms["has_if_owner_enabled"] = has_if_owner_enabled
+		matrix = get_permission_matrix(doctype_meta, roles)
+		perms = nts._dict(if_owner={}, has_if_owner_enabled=matrix.has_if_owner_enabled)
 
 		for ptype in get_rights(doctype_meta.name):
-			pvalue = any(p.get(ptype, 0) for p in applicable_permissions)
+			pvalue = matrix.has_permission(ptype)
 			# check if any perm object allows perm type
 			perms[ptype] = cint(pvalue)
 			if (
 				pvalue
-				and has_if_owner_enabled
-				and not has_permission_without_if_owner_enabled(ptype)
+				and matrix.has_if_owner_enabled
+				and not matrix.has_permission(ptype, ignore_if_owner=True)
 				and ptype != "create"
 			):
 				perms["if_owner"][ptype] = cint(pvalue and is_owner)
@@ -329,6 +324,81 @@ def get_role_permissions(doctype_meta, user=None, is_owner=None, debug=False):
 	return nts.local.role_permissions[cache_key]
 
 
+@dataclass(slots=True, frozen=True)
+class PermissionMatrix:
+	"""Rights granted to a set of roles by permission rules of a doctype.
+
+	Masks have bit `n` set if the right is granted at permlevel `n`."""
+
+	# ptype -> permlevels granted by any rule
+	permlevels: dict[str, int]
+	# ptype -> permlevels granted by rules without "If Owner"
+	unconditional_permlevels: dict[str, int]
+	# any permlevel 0 rule has "If Owner"
+	has_if_owner_enabled: bool
+
+	def has_permission(self, ptype: str, permlevel: int = 0, *, ignore_if_owner: bool = False) -> bool:
+		masks = self.unconditional_permlevels if ignore_if_owner else self.permlevels
+		return bool(masks.get(ptype, 0) & (1 << permlevel))
+
+	def get_permlevels(self, ptype: str) -> list[int]:
+		mask = self.permlevels.get(ptype, 0)
+		return [permlevel for permlevel in range(mask.bit_length()) if mask & (1 << permlevel)]
+
+
+def get_permission_matrix(doctype_meta, roles: list[str]) -> PermissionMatrix:
+	"""Return compiled permission rules of `doctype_meta` applicable to `roles`.
+
+	Matrices are stored in client cache per doctype and set of roles (not per user), these are
+	cleared along with doctype cache, i.e. when DocPerm or Custom DocPerm change. A change in roles of
+	a user changes its set of roles, so that doesn't need invalidation."""
+	if isinstance(doctype_meta, str):
+		doctype_meta = nts.get_meta(doctype_meta)
+
+	roles = frozenset(roles)
+	return nts.client_cache.get_value(
+		f"{PERMISSION_MATRIX_KEY}::{doctype_meta.name}::{_get_role_set_key(roles)}",
+		generator=lambda: build_permission_matrix(doctype_meta, roles),
+	)
+
+
+def build_permission_matrix(doctype_meta, roles: frozenset[str]) -> PermissionMatrix:
+	applicable_permissions = [p for p in getattr(doctype_meta, "permissions", []) if p.role in roles]
+	permlevels = {}
+	unconditional_permlevels = {}
+
+	for ptype in get_rights(doctype_meta.name):
+		mask = unconditional_mask = 0
+		for perm in applicable_permissions:
+			if perm.get(ptype, 0):
+				bit = 1 << cint(perm.permlevel)
+				mask |= bit
+				if not perm.get("if_owner", 0):
+					unconditional_mask |= bit
+
+		if mask:
+			permlevels[ptype] = mask
+		if unconditional_mask:
+			unconditional_permlevels[ptype] = unconditional_mask
+
+	return PermissionMatrix(
+		permlevels=permlevels,
+		unconditional_permlevels=unconditional_permlevels,
+		has_if_owner_enabled=any(
+			p.get("if_owner", 0) and not cint(p.permlevel) for p in applicable_permissions
+		),
+	)
+
+
+@functools.lru_cache(maxsize=1024)
+def _get_role_set_key(roles: frozenset[str]) -> str:
+	return hashlib.sha1("\n".join(sorted(roles)).encode(), usedforsecurity=False).hexdigest()[:16]
+
+
+def clear_permission_matrix(doctype: str | None = None):
+	nts.client_cache.delete_keys(f"{PERMISSION_MATRIX_KEY}::{doctype or ''}*")
+
+
 def get_user_permissions(user):
 	from nts.core.doctype.user_permission.user_permission import get_user_permissions
 
@@ -59,6 +59,7 @@ nts.Application = class Application {
 
 		this.show_notices();
 		this.show_notes();
+		this.load_lazy_boot_sections();
 
 		if (nts.ui.startup_setup_dialog && !nts.boot.setup_complete) {
 			nts.ui.startup_setup_dialog.pre_show();
@@ -90,6 +91,22 @@ nts.Application = class Application {
 		this.sidebar = new nts.ui.Sidebar({});
 	}
 
+	load_lazy_boot_sections() {
+		// sections of boot info that aren't required to render desk
+		// these are revalidated by browser using ETags, so unchanged sections aren't downloaded again
+		for (let section of nts.boot.lazy_boot_sections || []) {
+			nts.call({
+				method: "nts.boot.get_boot_section",
+				args: { section },
+				type: "GET",
+				cache: true,
+				callback: (r) => {
+					nts.boot[section] = r.message;
+				},
+			});
+		}
+	}
+
 	setup_theme() {
 		nts.ui.keys.add_shortcut({
 			shortcut: "shift+ctrl+g",
@@ -157,7 +157,8 @@ nts.ui.form.Toolbar = class Toolbar {
 					// handle document renaming queued action
 					if (input_name != docname) {
 						nts.realtime.on("list_update", (data) => {
-							if (data.doctype == doctype && data.name == input_name) {
+							const names = data.names || [data.name];
+							if (data.doctype == doctype && names.includes(input_name)) {
 								reload_form(input_name);
 								nts.show_alert({
 									message: __("Document renamed from {0} to {1}", [
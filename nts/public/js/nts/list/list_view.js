@@ -1714,7 +1714,15 @@ nts.views.ListView = class ListView extends nts.views.BaseList {
 				return;
 			}
 
-			this.pending_document_refreshes.push(data);
+			if (!data.name && !data.names) {
+				// too many documents were updated at once, see `publish_realtime`
+				this.refresh();
+				return;
+			}
+
+			for (let name of data.names || [data.name]) {
+				this.pending_document_refreshes.push({ ...data, name });
+			}
 			this.debounced_refresh();
 		});
 		this.realtime_events_setup = true;
@@ -261,7 +261,10 @@ nts.views.ReportView = class ReportView extends nts.views.ListView {
 	}
 
 	on_update(data) {
-		if (this.doctype === data.doctype && data.name) {
+		if (this.doctype === data.doctype && !data.name) {
+			// many documents were updated at once, see `publish_realtime`
+			this.refresh();
+		} else if (this.doctype === data.doctype) {
 			// flash row when doc is updated by some other user
 			const flash_row = data.user !== nts.session.user;
 			if (this.data.find((d) => d.name === data.name)) {
@@ -1,5 +1,5 @@
 import inspect
-from collections.abc import Callable
+from collections.abc import Callable, Iterator
 from enum import Enum
 from importlib import import_module
 from typing import Any, get_type_hints
@@ -82,32 +82,32 @@ def Table(*args, **kwargs):
 def mask_fields(
 	doctype: str,
 	fields: list[Any],
-	result: list[dict] | list[tuple],
+	result: list[dict] | list[tuple] | Iterator,
 	as_dict: bool = True,
-) -> list[dict] | list[tuple]:
+	masked_fields: list | None = None,
+) -> list[dict] | list[tuple] | Iterator:
 	"""Mask fields in the result based on the doctype's masked fields.
 
 	Args:
 		doctype: Name of the DocType being queried
 		fields: List of field objects from the query
-		result: Query results as list of dicts or tuples
+		result: Query results as list of dicts or tuples, or an iterator over them
 		as_dict: Whether results are dictionaries (True) or tuples (False)
+		masked_fields: Pre-computed result of `get_masked_fields`
 
 	Returns:
-		Result with masked field values applied based on user permissions
+		Result with masked field values applied based on user permissions.
+		Iterators are masked lazily and returned as iterators.
 	"""
-	from nts.database.query import CORE_DOCTYPES
-	from nts.model.utils.mask import mask_dict_results, mask_list_results
-
-	# We can't query meta for core doctypes here
-	if doctype in CORE_DOCTYPES:
-		return result
+	from nts.model.utils.mask import iter_masked_results, mask_dict_results, mask_list_results
 
-	masked_fields = nts.get_meta(doctype).get_masked_fields()
+	if masked_fields is None:
+		masked_fields = get_masked_fields(doctype)
 
 	if not masked_fields:
 		return result
 
+	field_index_map = None
 	if not as_dict:
 		field_index_map = {}
 		for idx, field in enumerate(fields):
@@ -117,16 +117,41 @@ def mask_fields(
 			elif name := getattr(field, "name", None):
 				field_index_map[name] = idx
 
+	if not isinstance(result, list | tuple):
+		return iter_masked_results(result, masked_fields, field_index_map)
+
+	if field_index_map is not None:
 		return mask_list_results(result, masked_fields, field_index_map)
 
 	# Handle as_dict format
 	return mask_dict_results(result, masked_fields)
 
 
+def get_masked_fields(doctype: str) -> list:
+	"""Return fields of `doctype` that should be masked for the current user."""
+	from nts.database.query import CORE_DOCTYPES
+
+	# We can't query meta for core doctypes here
+	if doctype in CORE_DOCTYPES:
+		return []
+
+	return nts.get_meta(doctype).get_masked_fields()
+
+
 def execute_query(query, *args, **kwargs):
 	dt = query.__dict__.get("_doctype")
 	fields = query.__dict__.get("_fields_list", [])
 	child_queries = query._child_queries
+	masked_fields = None
+
+	if kwargs.get("as_iterator"):
+		if child_queries:
+			nts.throw(nts._("Child table fields can not be fetched with `as_iterator`"))
+		if dt and fields:
+			# Resolve these before running the query, no other query can be run on an unbuffered
+			# cursor until its result is consumed.
+			masked_fields = get_masked_fields(dt)
+
 	query, params = prepare_query(query)
 	result = nts.local.db.sql(query, params, *args, **kwargs)  # nosemgrep
 
@@ -135,7 +160,7 @@ def execute_query(query, *args, **kwargs):
 
 	if result and dt and fields:
 		as_dict = kwargs.get("as_dict", not kwargs.get("as_list", False))
-		result = mask_fields(dt, fields, result, as_dict=as_dict)
+		result = mask_fields(dt, fields, result, as_dict=as_dict, masked_fields=masked_fields)
 
 	return result
 
@@ -11,6 +11,45 @@ import nts
 from nts import _
 from nts.utils import cint
 
+# Scripts are executed atomically by redis, so concurrent requests can't race between reading and
+# updating counters, and each check costs a single round trip.
+
+# KEYS[1]: counter, ARGV[1]: increment, ARGV[2]: window (seconds)
+INCREMENT_COUNTER_SCRIPT = """
+local counter = redis.call("INCRBY", KEYS[1], ARGV[1])
+if redis.call("TTL", KEYS[1]) == -1 then
+	redis.call("EXPIRE", KEYS[1], ARGV[2])
+end
+return counter
+"""
+
+# Sliding window counter: requests in previous window are weighted by how much of it still overlaps
+# with the sliding window. Rejected requests aren't counted.
+# KEYS[1]: counter of current window, KEYS[2]: counter of previous window
+# ARGV[1]: limit, ARGV[2]: window (seconds), ARGV[3]: elapsed fraction of current window
+# Returns count including this request, -1 if limit is reached.
+SLIDING_WINDOW_SCRIPT = """
+local current = tonumber(redis.call("GET", KEYS[1]) or "0")
+local previous = tonumber(redis.call("GET", KEYS[2]) or "0")
+if math.floor(previous * (1 - tonumber(ARGV[3]))) + current >= tonumber(ARGV[1]) then
+	return -1
+end
+current = redis.call("INCR", KEYS[1])
+if current == 1 then
+	redis.call("EXPIRE", KEYS[1], 2 * tonumber(ARGV[2]))
+end
+return current
+"""
+
+_scripts = {}
+
+
+def run_script(script: str, keys: list, args: list):
+	"""Run lua script on redis. Script is loaded once and then called by its SHA."""
+	if script not in _scripts:
+		_scripts[script] = nts.cache.register_script(script)
+	return _scripts[script](keys=keys, args=args, client=nts.cache)
+
 
 def apply():
 	rate_limit = nts.conf.rate_limit
@@ -53,11 +92,7 @@ class RateLimiter:
 
 		self.window_number, self.spent = divmod(int(self.start), self.window)
 		self.key = nts.cache.make_key(f"rate-limit-counter-{self.window_number}")
-		self.counter = cint(nts.cache.get(self.key))
-		if not self.counter:
-			# This is the first request in this window
-			nts.cache.incrby(self.key, 0)
-			nts.cache.expire(self.key, self.window)
+		self.counter = cint(run_script(INCREMENT_COUNTER_SCRIPT, [self.key], [0, self.window]))
 
 		self.remaining = max(self.limit - self.counter, 0)
 		self.reset = self.window - self.spent
@@ -76,7 +111,7 @@ class RateLimiter:
 
 	def update(self):
 		self.record_request_end()
-		nts.cache.incrby(self.key, self.duration)
+		run_script(INCREMENT_COUNTER_SCRIPT, [self.key], [self.duration, self.window])
 
 	def headers(self):
 		self.record_request_end()
@@ -153,15 +188,13 @@ def rate_limit(
 
 			cache_key = nts.cache.make_key(f"rl:{nts.form_dict.cmd}:{identity}")
 
-			if not callable(seconds):
+			if callable(seconds):
+				_seconds = seconds()
+			else:
+				_seconds = seconds
 				cache_key += f":{seconds}".encode()
 
-			value = nts.cache.get(cache_key)
-			if not value:
-				nts.cache.setex(cache_key, seconds, 0)
-
-			value = nts.cache.incrby(cache_key, 1)
-			if value > _limit:
+			if not increment_sliding_window(cache_key, _limit, _seconds):
 				nts.throw(
 					_("You hit the rate limit because of too many requests. Please try after sometime."),
 					nts.RateLimitExceededError,
@@ -172,3 +205,12 @@ def rate_limit(
 		return wrapper
 
 	return ratelimit_decorator
+
+
+def increment_sliding_window(key: bytes, limit: int, seconds: int) -> bool:
+	"""Count a request against `key` if less than `limit` requests were made in last `seconds`.
+
+	Return `False` if the limit is reached."""
+	window_number, spent = divmod(time.time(), seconds)
+	keys = [key + f":{int(window_number)}".encode(), key + f":{int(window_number) - 1}".encode()]
+	return run_script(SLIDING_WINDOW_SCRIPT, keys, [limit, seconds, spent / seconds]) != -1
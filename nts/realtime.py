@@ -6,8 +6,17 @@ from contextlib import suppress
 import redis
 
 import nts
+from nts import _
+from nts.monitor import add_counter_to_monitor
+from nts.utils import create_batch
 from nts.utils.data import cstr
 
+# `list_update` events of a doctype for more documents than this (in one transaction) are sent
+# without names, clients reload the whole list instead.
+MAX_LIST_UPDATE_NAMES = 100
+# Max events sent to realtime server in one message
+MAX_EVENTS_PER_MESSAGE = 500
+
 
 def publish_progress(percent, title=None, doctype=None, docname=None, description=None, task_id=None):
 	publish_realtime(
@@ -72,23 +81,68 @@ def publish_realtime(
 
 	if after_commit:
 		if not hasattr(nts.local, "_realtime_log"):
-			nts.local._realtime_log = []
+			nts.local._realtime_log = RealtimeLog()
 			nts.db.after_commit.add(flush_realtime_log)
 			nts.db.after_rollback.add(clear_realtime_log)
 
-		params = [event, message, room]
-		if params not in nts.local._realtime_log:
-			nts.local._realtime_log.append(params)
+		nts.local._realtime_log.add(event, message, room)
 	else:
 		emit_via_redis(event, message, room)
 
 
+class RealtimeLog:
+	"""Events published in current transaction, these are sent together after commit.
+
+	Duplicate events are sent once and `list_update` events of a doctype are merged into one
+	event with names of all updated documents."""
+
+	__slots__ = ("coalesced", "events", "list_updates")
+
+	def __init__(self):
+		# (event, room, message as JSON) -> (event, message, room)
+		self.events: dict[tuple, tuple] = {}
+		# room (of doctype) -> name -> message
+		self.list_updates: dict[str, dict] = {}
+		self.coalesced = 0
+
+	def add(self, event: str, message: dict, room: str):
+		if event == "list_update" and "name" in message:
+			updates = self.list_updates.setdefault(room, {})
+			if updates:
+				# only one event is sent per doctype
+				self.coalesced += 1
+			updates[message["name"]] = message
+			return
+
+		key = (event, room, nts.as_json(message, indent=None))
+		if key in self.events:
+			self.coalesced += 1
+		else:
+			self.events[key] = (event, message, room)
+
+	def get_events(self) -> list[tuple]:
+		events = list(self.events.values())
+		for room, updates in self.list_updates.items():
+			if len(updates) == 1:
+				events.extend(("list_update", message, room) for message in updates.values())
+				continue
+
+			last_update = next(reversed(updates.values()))
+			message = {"doctype": last_update.get("doctype"), "user": last_update.get("user")}
+			if len(updates) <= MAX_LIST_UPDATE_NAMES:
+				message["names"] = list(updates)
+			events.append(("list_update", message, room))
+
+		return events
+
+
 def flush_realtime_log():
 	if not hasattr(nts.local, "_realtime_log"):
 		return
-	for args in nts.local._realtime_log:
-		nts.realtime.emit_via_redis(*args)
 
+	realtime_log = nts.local._realtime_log
+	emit_many_via_redis(realtime_log.get_events())
+	add_counter_to_monitor("realtime_events_coalesced", realtime_log.coalesced)
 	clear_realtime_log()
 
 
@@ -113,6 +167,39 @@ def emit_via_redis(event, message, room):
 				{"event": event, "message": message, "room": room, "namespace": nts.local.site}
 			),
 		)
+		add_counter_to_monitor("realtime_events_published")
+
+
+def emit_many_via_redis(events: list[tuple | list]):
+	"""Publish multiple real-time updates using a single round trip to redis
+
+	Events are sent in batches of `MAX_EVENTS_PER_MESSAGE`, realtime server emits each event of a
+	batch to its room.
+
+	:param events: list of (event, message, room)"""
+	from nts.utils.background_jobs import get_redis_connection_without_auth
+
+	if not events:
+		return
+
+	with suppress(redis.exceptions.ConnectionError):
+		pipeline = get_redis_connection_without_auth().pipeline(transaction=False)
+		for batch in create_batch(events, MAX_EVENTS_PER_MESSAGE):
+			pipeline.publish(
+				"events",
+				nts.as_json(
+					{
+						"events": [
+							{"event": event, "message": message, "room": room}
+							for event, message, room in batch
+						],
+						"namespace": nts.local.site,
+					},
+					indent=None,
+				),
+			)
+		pipeline.execute()
+		add_counter_to_monitor("realtime_events_published", len(events))
 
 
 @nts.whitelist(allow_guest=True)
@@ -121,6 +208,63 @@ def has_permission(doctype: str, name: str) -> bool:
 	return True
 
 
+# Max number of documents checked in one `has_permissions` call
+MAX_PERMISSION_CHECKS = 50
+
+
+@nts.whitelist(allow_guest=True)
+def has_permissions(docs: str | list) -> list[bool]:
+	"""Check permission for many documents at once, used by realtime server for batching checks.
+
+	:param docs: JSON list of `[doctype, name]`, `name` is empty for checking doctype permission."""
+	docs = nts.parse_json(docs)
+	if len(docs) > MAX_PERMISSION_CHECKS:
+		nts.throw(_("Can not check permissions for more than {0} documents").format(MAX_PERMISSION_CHECKS))
+
+	return [_has_permission(doctype, name) for doctype, name in docs]
+
+
+def _has_permission(doctype: str, name: str) -> bool:
+	try:
+		return nts.has_permission(doctype, doc=name or None)
+	except nts.DoesNotExistError:
+		nts.clear_last_message()
+		return False
+
+
+def clear_permission_cache(user: str | None = None):
+	"""Clear permissions cached by realtime server for `user` or all users of current site.
+
+	Cleared once current transaction is committed, so that the realtime server doesn't cache
+	permissions read before the change is visible. Clears are sent once per user per transaction."""
+	if not hasattr(nts.db, "after_commit"):
+		emit_via_redis("clear_permission_cache", {"user": user}, None)
+		return
+
+	if not hasattr(nts.local, "_permission_cache_users"):
+		nts.local._permission_cache_users = set()
+		nts.db.after_commit.add(flush_permission_cache_clears)
+		nts.db.after_rollback.add(discard_permission_cache_clears)
+
+	nts.local._permission_cache_users.add(user)
+
+
+def flush_permission_cache_clears():
+	if not hasattr(nts.local, "_permission_cache_users"):
+		return
+
+	users = nts.local._permission_cache_users
+	discard_permission_cache_clears()
+	# clearing for all users covers individual users
+	for user in [None] if None in users else users:
+		emit_via_redis("clear_permission_cache", {"user": user}, None)
+
+
+def discard_permission_cache_clears():
+	if hasattr(nts.local, "_permission_cache_users"):
+		del nts.local._permission_cache_users
+
+
 @nts.whitelist(allow_guest=True)
 def get_user_info():
 	user_type = nts.session.data.user_type
@@ -5,8 +5,12 @@ import functools
 import inspect
 import io
 import json
+import os
 import pstats
+import random
 import re
+import sys
+import threading
 import time
 import typing
 from collections import Counter
@@ -18,7 +22,7 @@ import sqlparse
 import nts
 from nts import _
 from nts.database.utils import is_query_type
-from nts.utils import now_datetime
+from nts.utils import flt, now_datetime, nowdate
 
 RECORDER_INTERCEPT_FLAG = "recorder-intercept"
 RECORDER_CONFIG_FLAG = "recorder-config"
@@ -27,6 +31,25 @@ RECORDER_REQUEST_HASH = "recorder-requests"
 TRACEBACK_PATH_PATTERN = re.compile(".*/apps/")
 RECORDER_AUTO_DISABLE = 10 * 60
 
+# Same query shape run from the same line more than this many times is reported as N+1 query
+N_PLUS_ONE_THRESHOLD = 10
+# Data access layers, N+1 queries are attributed to the first caller outside these
+N_PLUS_ONE_IGNORED_PATHS = (
+	"nts/__init__.py",
+	"nts/database/",
+	"nts/model/",
+	"nts/query_builder/",
+	"nts/recorder.py",
+	"nts/utils/caching.py",
+)
+
+# Sampling profiler, see `SamplingRecorder`
+PROFILE_KEY_PREFIX = "recorder-profile"
+PROFILE_RETENTION = 7 * 24 * 60 * 60
+DEFAULT_SAMPLE_INTERVAL = 10  # ms
+MAX_STACK_DEPTH = 128
+TRACE_ID_PATTERN = re.compile(r" /\* nts_TRACE_ID: [^*]* \*/$")
+
 
 if typing.TYPE_CHECKING:
 	from nts.database.database import Database
@@ -59,12 +82,15 @@ class RecorderConfig:
 		nts.cache.delete_value(RECORDER_CONFIG_FLAG)
 
 
-def record_sql(*args, **kwargs):
+def record_sql(db: "Database", *args, **kwargs):
 	start_time = time.monotonic()
-	result = nts.db._sql(*args, **kwargs)
+	result = db._sql(*args, **kwargs)
 	end_time = time.monotonic()
 
-	query = getattr(nts.db, "last_query", None)
+	# reads routed to a replica are run by the replica's `Database` object
+	if (router := getattr(db, "read_router", None)) and router.last_db:
+		db = router.last_db
+	query = getattr(db, "last_query", None)
 	if not query or isinstance(result, str):
 		# run=0, doesn't actually run the query so last_query won't be present
 		return result
@@ -132,6 +158,7 @@ def post_process():
 				except Exception:
 					pass
 		mark_duplicates(request)
+		request["n_plus_one_queries"] = find_n_plus_one_queries(request["calls"])
 		nts.cache.hset(RECORDER_REQUEST_HASH, request["uuid"], request)
 
 	config.delete()
@@ -151,6 +178,49 @@ def mark_duplicates(request):
 		call["normalized_copies"] = normalized_duplicates[call["normalized_query"]]
 
 
+def find_n_plus_one_queries(calls: list[dict], threshold: int = N_PLUS_ONE_THRESHOLD) -> list[dict]:
+	"""Find queries of same shape executed more than `threshold` times from the same line.
+
+	This is usually caused by running a query in a loop (e.g. `nts.db.get_value` for each row)
+	instead of fetching all the required data at once. Calls need to have a captured stack for
+	finding the line, otherwise only the shape of queries is compared."""
+	groups = {}
+	for call in calls:
+		query = call.get("normalized_query") or normalize_query(call["query"])
+		caller = get_query_caller(call.get("stack") or [])
+		key = (query, caller["filename"], caller["lineno"]) if caller else (query, None, None)
+		if group := groups.get(key):
+			group["count"] += 1
+			group["duration"] += call.get("duration") or 0
+		else:
+			groups[key] = {
+				"query": query,
+				"count": 1,
+				"duration": call.get("duration") or 0,
+				**(caller or {}),
+			}
+
+	n_plus_one = [group for group in groups.values() if group["count"] > threshold]
+	for group in n_plus_one:
+		group["duration"] = flt(group["duration"], 3)
+	return sorted(n_plus_one, key=lambda group: group["count"], reverse=True)
+
+
+def get_query_caller(stack: list[dict]) -> dict | None:
+	"""Innermost frame of the stack outside data access layers."""
+	for frame in reversed(stack):
+		if not any(path in frame["filename"] for path in N_PLUS_ONE_IGNORED_PATHS):
+			return frame
+
+
+def format_n_plus_one_queries(n_plus_one: list[dict]) -> str:
+	return "\n".join(
+		f"{query.get('filename')}:{query.get('lineno')} ({query.get('function')}) "
+		f"ran {query['count']} times: {query['query']}"
+		for query in n_plus_one
+	)
+
+
 def normalize_query(query: str) -> str:
 	"""Attempt to normalize query by removing variables.
 	This gives a different view of similar duplicate queries.
@@ -188,6 +258,12 @@ def record(force=False):
 		# Explicitly set it once so next requests can use client-side cache
 		nts.client_cache.set_value(RECORDER_INTERCEPT_FLAG, False)
 
+	if (sample_rate := flt(nts.conf.profiler_sample_rate)) and random.random() < sample_rate:
+		recorder = SamplingRecorder()
+		if recorder._recording:
+			nts.local._recorder = recorder
+			return recorder
+
 
 def dump():
 	if hasattr(nts.local, "_recorder"):
@@ -284,16 +360,173 @@ class Recorder:
 		self._unpatch_sql()
 
 	def _patch_sql(self, db: "Database"):
-		if not self.config.record_sql:
+		if not self.config.record_sql or db in self.patched_databases:
 			return
 
-		nts.db._sql = nts.db.sql
-		nts.db.sql = record_sql
+		db._sql = db.sql
+		db.sql = functools.partial(record_sql, db)
 		self.patched_databases.append(db)
 
 	def _unpatch_sql(self):
 		for db in self.patched_databases:
 			db.sql = db._sql
+		self.patched_databases = []
+
+
+class SamplingRecorder(Recorder):
+	"""Low overhead recorder meant to run permanently in production for a sample of requests and jobs.
+
+	Enabled by setting `profiler_sample_rate` in site config, e.g. 0.01 to profile 1% of requests and
+	jobs. Instead of storing every call, it aggregates time spent in normalized queries and call stacks
+	sampled every `profiler_sample_interval` ms (default 10) per endpoint or job method and day.
+	See `get_profile`.
+	"""
+
+	def __init__(self):
+		self.config = RecorderConfig(capture_stack=False, explain=False)
+		self.calls = []
+		self.profiler = None
+		self.force = False
+		self.patched_databases = []
+		self._recording = True
+
+		if nts.request:
+			self.event_type = "HTTP Request"
+			self.path = get_endpoint()
+		elif nts.job:
+			self.event_type = "Background Job"
+			self.path = nts.job.method
+		else:
+			self._recording = False
+			return
+
+		self.start_time = time.monotonic()
+		self._patch_sql(nts.db)
+
+		interval = (nts.conf.profiler_sample_interval or DEFAULT_SAMPLE_INTERVAL) / 1000
+		self.thread_id = threading.get_ident()
+		get_stack_sampler(interval).add(self.thread_id)
+
+	def cleanup(self):
+		get_stack_sampler().remove(self.thread_id)
+		self._unpatch_sql()
+
+	def dump(self):
+		if not self._recording:
+			return
+
+		stacks = get_stack_sampler().remove(self.thread_id)
+		self._unpatch_sql()
+		self._recording = False
+		duration = (time.monotonic() - self.start_time) * 1000
+
+		# normalized query -> [count, duration]
+		queries = {}
+		for call in self.calls:
+			query = normalize_query(TRACE_ID_PATTERN.sub("", call["query"]))
+			stats = queries.setdefault(query, [0, 0.0])
+			stats[0] += 1
+			stats[1] += call["duration"]
+
+		keys = get_profile_keys(self.path)
+		with nts.cache.pipeline(transaction=False) as pipeline:
+			pipeline.zincrby(keys.endpoints, duration, self.path)
+			pipeline.hincrby(keys.summary, "count", 1)
+			pipeline.hincrbyfloat(keys.summary, "duration", duration)
+			pipeline.hincrby(keys.summary, "queries", len(self.calls))
+			pipeline.hincrbyfloat(keys.summary, "query_duration", sum(stats[1] for stats in queries.values()))
+			for query, (count, query_duration) in queries.items():
+				pipeline.hincrby(keys.query_counts, query, count)
+				pipeline.zincrby(keys.queries, query_duration, query)
+			for stack, count in stacks.items():
+				pipeline.hincrby(keys.stacks, stack, count)
+			for key in keys:
+				pipeline.expire(key, PROFILE_RETENTION)
+			pipeline.execute()
+
+
+def get_endpoint() -> str:
+	"""Path of current request, without document names for REST API calls."""
+	path = nts.request.path
+	if path.startswith("/api/resource/"):
+		path = "/".join(path.split("/")[:4])
+	elif path.startswith("/api/v2/document/"):
+		path = "/".join(path.split("/")[:5])
+	return f"{nts.request.method} {path}"
+
+
+class ProfileKeys(typing.NamedTuple):
+	endpoints: bytes  # endpoint -> total duration
+	summary: bytes  # count, duration, queries, query_duration
+	queries: bytes  # normalized query -> total duration
+	query_counts: bytes  # normalized query -> count
+	stacks: bytes  # collapsed stack -> number of samples
+
+
+def get_profile_keys(endpoint: str, date: str | None = None) -> ProfileKeys:
+	prefix = f"{PROFILE_KEY_PREFIX}:{date or nowdate()}"
+	return ProfileKeys(
+		nts.cache.make_key(f"{prefix}:endpoints"),
+		*(nts.cache.make_key(f"{prefix}:{endpoint}:{key}") for key in ProfileKeys._fields[1:]),
+	)
+
+
+class StackSampler:
+	"""Samples call stacks of threads being profiled from a background thread.
+
+	Stacks are collapsed to `root;caller;function` format used by flamegraph tools."""
+
+	def __init__(self, interval: float):
+		self.interval = interval
+		self.pid = os.getpid()
+		# thread id -> collapsed stack -> number of samples
+		self.threads: dict[int, Counter] = {}
+		self.lock = threading.Lock()
+		self.active = threading.Event()
+		threading.Thread(target=self.run, name="nts-stack-sampler", daemon=True).start()
+
+	def add(self, thread_id: int):
+		with self.lock:
+			self.threads[thread_id] = Counter()
+		self.active.set()
+
+	def remove(self, thread_id: int) -> Counter:
+		with self.lock:
+			stacks = self.threads.pop(thread_id, Counter())
+			if not self.threads:
+				self.active.clear()
+		return stacks
+
+	def run(self):
+		while self.active.wait():
+			time.sleep(self.interval)
+			frames = sys._current_frames()
+			with self.lock:
+				for thread_id, stacks in self.threads.items():
+					if frame := frames.get(thread_id):
+						stacks[collapse_stack(frame)] += 1
+			del frames
+
+
+_stack_sampler: StackSampler | None = None
+
+
+def get_stack_sampler(interval: float = DEFAULT_SAMPLE_INTERVAL / 1000) -> StackSampler:
+	global _stack_sampler
+
+	# threads don't survive fork
+	if _stack_sampler is None or _stack_sampler.pid != os.getpid():
+		_stack_sampler = StackSampler(interval)
+	return _stack_sampler
+
+
+def collapse_stack(frame) -> str:
+	stack = []
+	while frame and len(stack) < MAX_STACK_DEPTH:
+		code = frame.f_code
+		stack.append(f"{frame.f_globals.get('__name__')}:{code.co_qualname}")
+		frame = frame.f_back
+	return ";".join(reversed(stack))
 
 
 def do_not_record(function):
@@ -387,6 +620,49 @@ def delete(*args, **kwargs):
 	nts.cache.delete_value(RECORDER_REQUEST_HASH)
 
 
+@nts.whitelist()
+@do_not_record
+@administrator_only
+def get_profile(endpoint: str | None = None, date: str | None = None, *args, **kwargs):
+	"""Aggregated profile of sampled requests and jobs on a day (default: today).
+
+	Without `endpoint`, return summary of all profiled endpoints sorted by total time spent. Otherwise
+	return its summary, top queries by total time and stack samples in flamegraph collapsed format."""
+	if not endpoint:
+		keys = get_profile_keys("", date)
+		endpoints = nts.cache.zrevrange(keys.endpoints, 0, -1)
+		with nts.cache.pipeline(transaction=False) as pipeline:
+			for name in endpoints:
+				pipeline.hgetall(get_profile_keys(nts.safe_decode(name), date).summary)
+			summaries = pipeline.execute()
+		return [
+			{"endpoint": nts.safe_decode(name), **_decode_summary(summary)}
+			for name, summary in zip(endpoints, summaries, strict=True)
+		]
+
+	keys = get_profile_keys(endpoint, date)
+	with nts.cache.pipeline(transaction=False) as pipeline:
+		pipeline.hgetall(keys.summary)
+		pipeline.zrevrange(keys.queries, 0, 99, withscores=True)
+		pipeline.hgetall(keys.query_counts)
+		pipeline.hgetall(keys.stacks)
+		summary, queries, query_counts, stacks = pipeline.execute()
+
+	return {
+		"endpoint": endpoint,
+		**_decode_summary(summary),
+		"queries": [
+			{"query": nts.safe_decode(query), "duration": duration, "count": int(query_counts.get(query, 0))}
+			for query, duration in queries
+		],
+		"flamegraph": "\n".join(f"{nts.safe_decode(stack)} {int(count)}" for stack, count in stacks.items()),
+	}
+
+
+def _decode_summary(summary: dict) -> dict:
+	return {nts.safe_decode(key): flt(nts.safe_decode(value), 3) for key, value in summary.items()}
+
+
 def record_queries(func: Callable):
 	"""Decorator to profile a specific function using recorder."""
 
@@ -12,6 +12,7 @@ class TestConfig:
 	pdb_on_exceptions: tuple | None = None
 	selected_categories: list[str] = field(default_factory=list)
 	skip_before_tests: bool = False
+	n_plus_one_threshold: int | None = None
 
 
 @dataclass
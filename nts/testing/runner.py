@@ -5,6 +5,7 @@ The TestRunner class extends unittest.TextTestRunner and provides additional fun
 - Categorization of tests (unit, integration, functional)
 - Priority-based execution of test categories
 - Profiling capabilities
+- Optional failure of tests running N+1 queries
 - Integration with nts's configuration and environment setup
 
 Key components:
@@ -20,6 +21,7 @@ It can be customized through the TestConfig object passed during initialization.
 
 import contextlib
 import cProfile
+import functools
 import logging
 import pstats
 import unittest
@@ -86,6 +88,7 @@ class TestRunner(unittest.TextTestRunner):
 
 				self._prepare_category(category, suite, app)
 				self._apply_debug_decorators(suite)
+				self._apply_n_plus_one_detection(suite)
 
 				with self._profile():
 					logger.info(f"Starting tests for app: {app}, category: {category}")
@@ -117,6 +120,25 @@ class TestRunner(unittest.TextTestRunner):
 					debug_on(*self.cfg.pdb_on_exceptions)(getattr(test, test._testMethodName)),
 				)
 
+	def _apply_n_plus_one_detection(self, suite):
+		if not self.cfg.n_plus_one_threshold:
+			return
+
+		from nts.tests.classes import IntegrationTestCase
+
+		def detect_n_plus_one(test, method):
+			@functools.wraps(method)
+			def wrapper(*args, **kwargs):
+				with test.assertNoNPlusOneQueries(self.cfg.n_plus_one_threshold):
+					return method(*args, **kwargs)
+
+			return wrapper
+
+		for test in self._iterate_suite(suite):
+			if isinstance(test, IntegrationTestCase):
+				method = getattr(test, test._testMethodName)
+				setattr(test, test._testMethodName, detect_n_plus_one(test, method))
+
 	@contextlib.contextmanager
 	def _profile(self):
 		if self.cfg.profile:
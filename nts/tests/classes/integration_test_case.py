@@ -137,6 +137,33 @@ class IntegrationTestCase(UnitTestCase):
 		finally:
 			nts.db.__class__.sql = orig_sql
 
+	@contextmanager
+	def assertNoNPlusOneQueries(self, threshold: int | None = None):
+		"""Fail if queries of same shape are executed more than `threshold` times from the same line."""
+		from nts.recorder import (
+			N_PLUS_ONE_THRESHOLD,
+			find_n_plus_one_queries,
+			format_n_plus_one_queries,
+			get_current_stack_frames,
+		)
+
+		calls = []
+
+		def _sql_with_stack(*args, **kwargs):
+			ret = orig_sql(*args, **kwargs)
+			if not isinstance(ret, str):
+				calls.append({"query": str(args[0].last_query), "stack": list(get_current_stack_frames())})
+			return ret
+
+		try:
+			orig_sql = nts.db.__class__.sql
+			nts.db.__class__.sql = _sql_with_stack
+			yield
+			if n_plus_one := find_n_plus_one_queries(calls, threshold or N_PLUS_ONE_THRESHOLD):
+				self.fail("N+1 queries detected:\n" + format_n_plus_one_queries(n_plus_one))
+		finally:
+			nts.db.__class__.sql = orig_sql
+
 	@contextmanager
 	def assertRedisCallCounts(self, count: int, *, exact=False) -> AbstractContextManager[None]:
 		from nts.utils.redis_wrapper import RedisWrapper
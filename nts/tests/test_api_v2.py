@@ -71,6 +71,21 @@ class TestResourceAPIV2(ntsAPITestCase):
 		self.assertIsInstance(json.data, list)
 		self.assertIsInstance(json.data[0], list)
 
+	def test_get_list_stream(self):
+		response = self.get(self.resource(self.DOCTYPE), {"sid": self.sid, "limit": 2, "stream": "json"})
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(len(response.json["data"]), 2)
+		self.assertTrue(response.json["has_next_page"])
+
+		response = self.get(
+			self.resource(self.DOCTYPE),
+			{"sid": self.sid, "limit": 0, "stream": "ndjson", "fields": '["name"]'},
+		)
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(response.headers["Content-Type"], "application/x-ndjson")
+		names = [nts.parse_json(line)["name"] for line in response.text.splitlines()]
+		self.assertEqual(len(names), nts.db.count(self.DOCTYPE))
+
 	def test_get_list_fields(self):
 		# test 6: fetch response with fields
 		response = self.get(self.resource(self.DOCTYPE), {"sid": self.sid, "fields": '["description"]'})
@@ -1,20 +1,28 @@
 import time
 from contextlib import contextmanager
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 
 from rq import Queue
+from rq.timeouts import JobTimeoutException
 from werkzeug.local import Local
 
 import nts
+import nts.utils.background_jobs
 from nts.core.doctype.rq_job.rq_job import remove_failed_jobs
+from nts.model.meta_snapshot import reset_meta_version
 from nts.tests import IntegrationTestCase
 from nts.utils.background_jobs import (
 	RQ_JOB_FAILURE_TTL,
 	RQ_RESULTS_TTL,
+	SITE_CONTEXT_IDLE_TIMEOUT,
+	SITE_CONTEXT_MAX_SITES,
+	SiteContext,
 	create_job_id,
 	execute_job,
 	generate_qname,
+	get_batched_calls_key,
 	get_redis_conn,
+	run_batched_calls,
 )
 
 
@@ -75,12 +83,162 @@ class TestBackgroundJobs(IntegrationTestCase):
 			self.assertEqual(r, "pong")
 			self.assertLess(_test_JOB_HOOK.get("before_job"), _test_JOB_HOOK.get("after_job"))
 
+	def test_site_contexts(self):
+		def run_job():
+			execute_job(
+				site=site,
+				method="nts.handler.ping",
+				event=None,
+				job_name="nts.handler.ping",
+				is_async=True,
+				kwargs={},
+			)
+
+		site = nts.local.site
+		with (
+			freeze_local(),
+			patch.object(nts.utils.background_jobs, "_site_contexts", None),
+		):
+			nts.utils.background_jobs.enable_site_contexts()
+			contexts = nts.utils.background_jobs._site_contexts
+
+			run_job()
+			context = contexts[site]
+			run_job()
+			self.assertIs(contexts[site], context)
+			self.assertEqual(context.jobs, 2)
+			self.assertFalse(hasattr(nts.local, "site"))
+
+			# metadata changed
+			with nts.init_site(site):
+				reset_meta_version()
+			run_job()
+			self.assertIsNot(contexts[site], context)
+			contexts[site].db.close()
+
+	def test_site_context_eviction(self):
+		site = nts.local.site
+		with (
+			freeze_local(),
+			patch.object(nts.utils.background_jobs, "_site_contexts", None),
+		):
+			nts.utils.background_jobs.enable_site_contexts()
+			contexts = nts.utils.background_jobs._site_contexts
+
+			idle = SiteContext(MagicMock(), "")
+			idle.last_used -= SITE_CONTEXT_IDLE_TIMEOUT + 1
+			contexts["idle.localhost"] = idle
+			others = {}
+			for i in range(SITE_CONTEXT_MAX_SITES):
+				others[i] = contexts[f"site{i}.localhost"] = SiteContext(MagicMock(), "")
+
+			execute_job(
+				site=site,
+				method="nts.handler.ping",
+				event=None,
+				job_name="nts.handler.ping",
+				is_async=True,
+				kwargs={},
+			)
+
+			# idle and least recently used sites are closed to stay within limit
+			idle.db.close.assert_called_once()
+			others[0].db.close.assert_called_once()
+			others[1].db.close.assert_not_called()
+			self.assertEqual(len(contexts), SITE_CONTEXT_MAX_SITES)
+			self.assertEqual(list(contexts)[-1], site)
+			contexts[site].db.close()
+
+	def test_site_context_state_reset(self):
+		def run_job(method):
+			return execute_job(
+				site=site, method=method, event=None, job_name=method, is_async=True, kwargs={}
+			)
+
+		site = nts.local.site
+		with (
+			freeze_local(),
+			patch.object(nts.utils.background_jobs, "_site_contexts", None),
+		):
+			nts.utils.background_jobs.enable_site_contexts()
+			contexts = nts.utils.background_jobs._site_contexts
+
+			self.assertEqual(run_job("nts.tests.test_background_jobs.write_with_read_router"), (True, 1))
+			# read only job on same connection isn't pinned to primary
+			self.assertEqual(run_job("nts.tests.test_background_jobs.get_db_state"), (False, 0))
+			contexts[site].db.close()
+
+	def test_batched_calls(self):
+		self.addCleanup(_test_BATCHED_CALLS.clear)
+		method = "nts.tests.test_background_jobs.batched_function"
+		with patch("nts.utils.background_jobs.enqueue") as enqueue, patch("time.sleep") as sleep:
+			for value in (1, "fail"):
+				nts.enqueue(method, queue="short", batch_key="test", value=value)
+			nts.enqueue(method, queue="short", batch_key="other", value="discarded")
+			nts.db.rollback()
+			enqueue.assert_not_called()
+
+			for value in (1, "fail"):
+				nts.enqueue(method, queue="short", batch_key="test", value=value)
+			nts.db.commit()
+			nts.enqueue(method, queue="short", batch_key="test", value=2)
+			nts.db.commit()
+			# calls of second transaction are run by job queued for first one
+			enqueue.assert_called_once()
+			lock_key = get_batched_calls_key(method, "short", "test") + b"|queued"
+			self.assertTrue(nts.cache.exists(lock_key, shared=True))
+
+			run_batched_calls(method, "short", "test")
+			self.assertEqual(_test_BATCHED_CALLS, [1, "fail", 2])
+			# failed call is retried in another job, after a backoff
+			self.assertEqual(enqueue.call_count, 2)
+			sleep.assert_called_once_with(1)
+			run_batched_calls(method, "short", "test")
+			self.assertEqual(_test_BATCHED_CALLS, [1, "fail", 2, "fail"])
+			self.assertEqual(enqueue.call_count, 2)
+
+	def test_interrupted_batched_calls(self):
+		self.addCleanup(_test_BATCHED_CALLS.clear)
+		method = "nts.tests.test_background_jobs.batched_function"
+		with patch("nts.utils.background_jobs.enqueue") as enqueue:
+			for value in (1, "timeout", 2, 3):
+				nts.enqueue(method, queue="short", batch_key="test", value=value)
+			nts.db.commit()
+
+			self.assertRaises(JobTimeoutException, run_batched_calls, method, "short", "test")
+			# calls not started are run by next job
+			self.assertEqual(enqueue.call_count, 2)
+			run_batched_calls(method, "short", "test")
+			self.assertEqual(_test_BATCHED_CALLS, [1, "timeout", 2, 3])
+
 
 def fail_function():
 	return 1 / 0
 
 
 _test_JOB_HOOK = {}
+_test_BATCHED_CALLS = []
+
+
+def write_with_read_router():
+	from nts.database.replica import ReadReplicaRouter
+
+	nts.db.read_router = ReadReplicaRouter(nts.db)
+	nts.db.auto_commit_on_many_writes = 1
+	nts.db.sql("update `tabDefaultValue` set defvalue = defvalue where 1 = 0")
+	return get_db_state()
+
+
+def get_db_state():
+	return nts.db.read_router.pinned, nts.db.auto_commit_on_many_writes
+
+
+def batched_function(value):
+	_test_BATCHED_CALLS.append(value)
+	if value == "fail" and _test_BATCHED_CALLS.count("fail") == 1:
+		raise nts.RetryBackgroundJobError
+	if value == "timeout":
+		raise JobTimeoutException
 
 
 def before_job(*args, **kwargs):
@@ -1,5 +1,11 @@
 import nts
-from nts.boot import get_user_pages_or_reports
+from nts.boot import (
+	LAZY_BOOT_SECTIONS,
+	get_boot_section,
+	get_bootinfo,
+	get_cached_boot_section,
+	get_user_pages_or_reports,
+)
 from nts.desk.doctype.note.note import _get_unseen_notes, get_unseen_notes, mark_as_seen
 from nts.tests import IntegrationTestCase
 
@@ -28,6 +34,27 @@ class TestBootData(IntegrationTestCase):
 		unseen_notes = [d.title for d in get_unseen_notes()]
 		self.assertListEqual(unseen_notes, [])
 
+	def test_lazy_boot_sections(self):
+		bootinfo = get_bootinfo()
+		self.assertListEqual(bootinfo.lazy_boot_sections, list(LAZY_BOOT_SECTIONS))
+		self.assertDictEqual(bootinfo.letter_heads, {})
+
+		nts.delete_doc("Success Action", "ToDo", ignore_missing=True)
+		nts.clear_cache(user="Administrator")
+		etag, success_actions = get_cached_boot_section("success_action")
+		self.assertEqual(get_boot_section("success_action"), success_actions)
+
+		# cached until the section is invalidated
+		with self.assertQueryCount(0):
+			self.assertEqual(get_cached_boot_section("success_action")[0], etag)
+
+		nts.get_doc(doctype="Success Action", ref_doctype="ToDo").insert()
+		new_etag, success_actions = get_cached_boot_section("success_action")
+		self.assertNotEqual(new_etag, etag)
+		self.assertIn("ToDo", [d.ref_doctype for d in success_actions])
+
+		self.assertRaises(nts.ValidationError, get_boot_section, "user")
+
 
 class TestPermissionQueries(IntegrationTestCase):
 	@classmethod
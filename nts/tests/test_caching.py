@@ -1,12 +1,14 @@
+import threading
 import time
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 
 import nts
 from nts.core.doctype.doctype.test_doctype import new_doctype
 from nts.tests import IntegrationTestCase
 from nts.tests.test_api import ntsAPITestCase
 from nts.tests.utils import whitelist_for_tests
-from nts.utils.caching import redis_cache, request_cache, site_cache
+from nts.utils.caching import redis_cache, request_cache, single_flight, site_cache
+from nts.utils.lru import LRUCache
 
 CACHE_TTL = 4
 external_service = MagicMock(return_value=30)
@@ -89,6 +91,65 @@ class TestCachingUtils(IntegrationTestCase):
 
 			self.assertEqual(external_service.call_count, 2)
 
+	def test_request_cache_maxsize(self):
+		calls = []
+
+		@request_cache(maxsize=2)
+		def square(x):
+			calls.append(x)
+			return x * x
+
+		for x in (1, 2, 1, 3, 1, 2):
+			square(x)
+
+		# 2 is least recently used when 3 is added
+		self.assertEqual(calls, [1, 2, 3, 2])
+		self.assertEqual(square.cache_statistics()["evictions"], 2)
+
+
+class TestLRUCache(IntegrationTestCase):
+	def test_lru_eviction(self):
+		cache = LRUCache(2)
+		cache["a"] = 1
+		cache["b"] = 2
+		cache["a"]
+		cache["c"] = 3
+
+		self.assertEqual(cache.keys(), ["a", "c"])
+		self.assertEqual(cache.statistics["evictions"], 1)
+		self.assertEqual(cache.statistics["hits"], 1)
+
+	def test_size_limit(self):
+		cache = LRUCache(max_bytes=10, sizeof=len)
+		cache["a"] = "xxxx"
+		cache["b"] = "yyyy"
+		cache["c"] = "zzzz"
+
+		self.assertEqual(cache.keys(), ["b", "c"])
+		self.assertEqual(cache.used_bytes, 8)
+		self.assertFalse(cache.set("d", "x" * 11))
+		self.assertNotIn("d", cache)
+
+	def test_tinylfu_admission(self):
+		cache = LRUCache(2, admission=True)
+		for key in ("a", "b"):
+			for _ in range(3):
+				cache.get(key)
+			cache[key] = key
+
+		# one-off keys don't evict frequently used keys
+		for i in range(10):
+			if cache.get(i) is None:
+				cache[i] = i
+		self.assertEqual(sorted(cache.keys()), ["a", "b"])
+		self.assertEqual(cache.statistics["rejections"], 10)
+
+		# but keys that become popular do
+		for _ in range(5):
+			if cache.get("c") is None:
+				cache["c"] = "c"
+		self.assertIn("c", cache)
+
 
 class TestSiteCache(ntsAPITestCase):
 	def test_site_cache(self):
@@ -105,6 +166,23 @@ class TestSiteCache(ntsAPITestCase):
 		self.get(f"/api/method/{api_with_ttl}")
 		self.assertEqual(register_with_external_service.call_count, 3)
 
+	def test_site_cache_lru(self):
+		calls = []
+
+		@site_cache(maxsize=2)
+		def square(x):
+			calls.append(x)
+			return x * x
+
+		for x in (1, 2, 1, 3, 1, 2):
+			square(x)
+
+		self.assertEqual(calls, [1, 2, 3, 2])
+		statistics = square.cache_statistics()
+		self.assertEqual(statistics["evictions"], 2)
+		self.assertEqual(statistics["hits"], 2)
+		square.clear_cache()
+
 
 class TestRedisCache(ntsAPITestCase):
 	def test_redis_cache(self):
@@ -226,6 +304,60 @@ class TestRedisCache(ntsAPITestCase):
 			self.assertEqual(calculate_area(1), PI)
 			self.assertEqual(function_call_count, 2)
 
+	def test_redis_cache_stale_while_revalidate(self):
+		function_call_count = 0
+
+		@redis_cache(ttl=1, stale_ttl=60)
+		def get_count() -> int:
+			nonlocal function_call_count
+			function_call_count += 1
+			return function_call_count
+
+		get_count.clear_cache()
+		self.assertEqual(get_count(), 1)
+		time.sleep(1.1)
+		nts.local.cache.clear()
+
+		# Another worker is regenerating the value, stale value is served meanwhile
+		with patch.object(nts.cache, "acquire_revalidation_lock", return_value=False):
+			self.assertEqual(get_count(), 1)
+		self.assertEqual(function_call_count, 1)
+
+		nts.local.cache.clear()
+		self.assertEqual(get_count(), 2)
+		nts.local.cache.clear()
+		self.assertEqual(get_count(), 2)
+		get_count.clear_cache()
+
+	def test_single_flight(self):
+		calls = []
+		started = threading.Event()
+		release = threading.Event()
+
+		def generate():
+			calls.append(1)
+			started.set()
+			release.wait(5)
+			return "value"
+
+		results = []
+		leader = threading.Thread(target=lambda: results.append(single_flight("sf-test", generate)))
+		leader.start()
+		started.wait(5)
+		followers = [
+			threading.Thread(target=lambda: results.append(single_flight("sf-test", generate)))
+			for _ in range(3)
+		]
+		for t in followers:
+			t.start()
+		time.sleep(0.1)
+		release.set()
+		for t in (leader, *followers):
+			t.join()
+
+		self.assertEqual(len(calls), 1)
+		self.assertEqual(results, ["value"] * 4)
+
 
 class TestDocumentCache(ntsAPITestCase):
 	TEST_DOCTYPE = "User"
@@ -362,6 +494,47 @@ class TestRedisWrapper(ntsAPITestCase):
 	def test_backward_compat_cache(self):
 		self.assertEqual(nts.cache, nts.cache())
 
+	def test_get_many_set_many(self):
+		keys = [f"test_many_{i}" for i in range(3)]
+		nts.cache.delete_value(keys)
+		nts.cache.set_many({keys[0]: 0, keys[1]: {"a": 1}}, expires_in_sec=60)
+		nts.local.cache.clear()
+
+		with self.assertRedisCallCounts(1, exact=True):
+			values = nts.cache.get_many(keys)
+		self.assertEqual(values, {keys[0]: 0, keys[1]: {"a": 1}, keys[2]: None})
+
+		# served from request local cache now
+		with self.assertRedisCallCounts(0):
+			self.assertEqual(nts.cache.get_many(keys[:2]), {keys[0]: 0, keys[1]: {"a": 1}})
+		nts.cache.delete_value(keys)
+
+	def test_pipeline(self):
+		nts.cache.set_value("test_pipeline_local", "local")
+		with nts.cache.pipeline(transaction=False) as pipeline:
+			pipeline.set_value("test_pipeline", [1, 2], user="test@example.com")
+			pipeline.get_value("test_pipeline_local")
+			pipeline.set("test_pipeline_raw", "raw")
+			pipeline.get_value("test_pipeline", user="test@example.com")
+			pipeline.delete_value("test_pipeline", user="test@example.com")
+			results = pipeline.execute()
+
+		self.assertEqual(results[1], "local")
+		self.assertTrue(results[2])
+		self.assertEqual(results[3], [1, 2])
+		self.assertEqual(nts.cache.get("test_pipeline_raw"), b"raw")
+		nts.cache.delete("test_pipeline_raw")
+		nts.cache.delete_value("test_pipeline_local")
+
+	def test_hget_names(self):
+		for i in range(3):
+			nts.cache.hset(f"test_hget_names_{i}", "key", i)
+		nts.local.cache.clear()
+
+		names = [f"test_hget_names_{i}" for i in range(4)]
+		self.assertEqual(nts.cache.hget_names(names, "key"), dict(zip(names, [0, 1, 2, None], strict=True)))
+		nts.cache.delete_value(names)
+
 
 class TestHttpCache(ntsAPITestCase):
 	def test_http_headers(self):
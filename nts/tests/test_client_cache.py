@@ -1,8 +1,9 @@
 import time
+from unittest.mock import patch
 
 import nts
 from nts.tests import IntegrationTestCase
-from nts.utils.redis_wrapper import ClientCache
+from nts.utils.redis_wrapper import ClientCache, DocumentStore
 
 TEST_KEY = "42"
 
@@ -116,3 +117,49 @@ class TestClientCache(IntegrationTestCase):
 		nts.client_cache.get_doc("User", "Guest")
 		with self.assertRedisCallCounts(0):
 			nts.client_cache.get_doc("User", "Guest")
+
+	@patch.dict(nts.conf, {"local_document_cache": {"User": {}}})
+	def test_local_document_cache(self):
+		cache = ClientCache()
+		with patch.object(nts, "client_cache", cache):
+			nts.clear_document_cache("User", "Guest")
+			nts.get_cached_doc("User", "Guest")  # DB -> Redis
+			nts.get_cached_doc("User", "Guest")  # Redis -> worker memory
+			with self.assertRedisCallCounts(0):
+				self.assertEqual(nts.get_cached_doc("User", "Guest").name, "Guest")
+
+			stats = cache.document_cache_statistics["User"]
+			self.assertEqual(stats.hits, 1)
+			self.assertEqual(stats.used, 1)
+			self.assertGreater(stats.used_bytes, 0)
+
+			nts.clear_document_cache("User", "Guest")
+			self.assertEqual(cache.document_cache_statistics["User"].used, 0)
+
+			# Invalidation by another client
+			nts.get_cached_doc("User", "Guest")
+			nts.get_cached_doc("User", "Guest")
+			nts.cache.delete_value(nts.get_document_cache_key("User", "Guest"))
+			time.sleep(0.1)
+			self.assertEqual(cache.document_cache_statistics["User"].used, 0)
+
+	def test_document_store_eviction(self):
+		store = DocumentStore("User", maxsize=2, max_bytes=100, ttl=60)
+
+		def put(key, size):
+			store.reserve(key)
+			store.put(key, key, size)
+
+		put(b"a", 10)
+		put(b"b", 10)
+		store.get(b"a")
+		put(b"c", 10)
+		self.assertEqual(list(store.entries), [b"a", b"c"])
+
+		put(b"d", 85)  # evicts by size
+		self.assertEqual(list(store.entries), [b"c", b"d"])
+		self.assertEqual(store.used_bytes, 95)
+		self.assertEqual(store.statistics.evictions, 2)
+
+		put(b"e", 101)
+		self.assertNotIn(b"e", store.entries)
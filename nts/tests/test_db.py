@@ -582,6 +582,79 @@ class TestDB(IntegrationTestCase):
 
 		nts.db.delete("ToDo", {"description": test_body})
 
+	def test_batch_inserts(self):
+		test_body = f"test_batch_inserts - {random_string(10)}"
+
+		with nts.db.batch_inserts():
+			for i in range(5):
+				nts.get_doc(doctype="Tag", name=f"{test_body} {i}").insert()
+			self.assertGreaterEqual(nts.db.insert_batch.count, 5)
+
+			# queries referring to the table see queued rows
+			self.assertEqual(nts.db.count("Tag", {"name": ("like", f"{test_body}%")}), 5)
+			self.assertFalse(nts.db.insert_batch.count)
+
+			# hash named parents are inserted immediately, their children may refer to name
+			nts.get_doc(doctype="Note", title=test_body).insert()
+			self.assertFalse(nts.db.insert_batch.count)
+
+			# rolling back discards queued rows
+			nts.db.savepoint("test_batch_inserts")
+			nts.get_doc(doctype="Tag", name=test_body).insert()
+			nts.db.rollback(save_point="test_batch_inserts")
+
+		self.assertIsNone(nts.db.insert_batch)
+		self.assertFalse(nts.db.exists("Tag", test_body))
+
+		with self.assertRaises(nts.DuplicateEntryError), nts.db.batch_inserts():
+			nts.get_doc(doctype="Tag", name=test_body).db_insert()
+			nts.get_doc(doctype="Tag", name=test_body).db_insert()
+
+		# rows are written all or none, parents aren't left without their children
+		with self.assertRaises(nts.DuplicateEntryError), nts.db.batch_inserts():
+			nts.get_doc(doctype="Tag", name=f"{test_body} new").db_insert()
+			nts.get_doc(doctype="Tag", name=f"{test_body} 0").db_insert()
+			nts.get_doc(
+				doctype="Has Role",
+				name=random_string(10),
+				parent=f"{test_body} new",
+				parenttype="User",
+				parentfield="roles",
+				role="System Manager",
+			).db_insert()
+		self.assertFalse(nts.db.exists("Tag", f"{test_body} new"))
+		self.assertFalse(nts.db.exists("Has Role", {"parent": f"{test_body} new"}))
+
+		with nts.db.batch_inserts(skip_failed_rows=True) as insert_batch:
+			nts.get_doc(doctype="Tag", name=f"{test_body} 0").db_insert()
+			nts.get_doc(doctype="Tag", name=f"{test_body} skipped").db_insert()
+		self.assertEqual(insert_batch.skipped, 1)
+		self.assertTrue(nts.db.exists("Tag", f"{test_body} skipped"))
+
+		with self.assertRaises(nts.UniqueValidationError), nts.db.batch_inserts():
+			for track_field in ("status", "priority"):
+				nts.get_doc(
+					doctype="Milestone Tracker",
+					name=f"{test_body} {track_field}",
+					document_type="ToDo",
+					track_field=track_field,
+				).db_insert()
+
+		# hash collision of a child row is retried with a new name
+		existing_name = nts.get_all("Has Role", limit=1, pluck="name")[0]
+		with nts.db.batch_inserts():
+			has_role = nts.get_doc(
+				doctype="Has Role",
+				name=existing_name,
+				parent=test_body,
+				parenttype="User",
+				parentfield="roles",
+				role="System Manager",
+			)
+			has_role.db_insert()
+		self.assertNotEqual(has_role.name, existing_name)
+		self.assertTrue(nts.db.exists("Has Role", {"parent": test_body}))
+
 	def test_bulk_update(self):
 		test_body = f"test_bulk_update - {random_string(10)}"
 
@@ -1104,6 +1177,31 @@ class TestReplicaConnections(IntegrationTestCase):
 			outer()
 			self.assertEqual(write_connection, db_id())
 
+	def test_routing_reads_to_replicas(self):
+		from nts.database.replica import ReadReplicaRouter
+
+		with patch.dict(nts.local.conf, {"replica_host": "127.0.0.1", "replica_max_lag": 0}):
+			nts.db.read_router = router = ReadReplicaRouter(nts.db)
+			try:
+				nts.db.sql("select name from tabUser limit 1")
+				self.assertIsNotNone(router.last_db)
+				self.assertIsNot(router.last_db, nts.db)
+
+				nts.db.sql("select name from tabUser limit 1 for update")
+				self.assertIsNone(router.last_db)
+				# reads after locking rows stay on primary
+				self.assertTrue(router.pinned)
+				nts.db.sql("select name from tabUser limit 1")
+				self.assertIsNone(router.last_db)
+
+				nts.db.set_value("User", "Administrator", "bio", "replica test")
+				self.assertTrue(router.pinned)
+				self.assertEqual(nts.db.get_value("User", "Administrator", "bio"), "replica test")
+				self.assertIsNone(router.last_db)
+			finally:
+				nts.db.read_router = None
+				router.close()
+
 
 class TestConcurrency(IntegrationTestCase):
 	@timeout(5, "There shouldn't be any lock wait")
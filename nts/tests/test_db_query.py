@@ -837,6 +837,23 @@ class TestDBQuery(IntegrationTestCase):
 		owners = DatabaseQuery("DocType").execute(filters={"name": "DocType"}, pluck="owner")
 		self.assertEqual(owners, ["Administrator"])
 
+	def test_as_iterator(self):
+		filters = {"module": "Core"}
+		expected = nts.get_all("DocType", filters=filters, fields=["name", "module"], order_by="name")
+
+		with nts.db.unbuffered_cursor():
+			result = nts.get_all(
+				"DocType", filters=filters, fields=["name", "module"], order_by="name", as_iterator=True
+			)
+			self.assertNotIsInstance(result, list)
+			self.assertEqual(list(result), expected)
+
+		names = nts.get_all("DocType", filters=filters, order_by="name", pluck="name", as_iterator=True)
+		self.assertEqual(list(names), [d.name for d in expected])
+
+		rows = nts.get_all("DocType", filters=filters, order_by="name", as_list=True, as_iterator=True)
+		self.assertEqual([row[0] for row in rows], [d.name for d in expected])
+
 	def test_prepare_select_args(self):
 		# nts.get_all inserts modified field into order_by clause
 		# test to make sure this is inserted into select field when postgres
@@ -1,5 +1,5 @@
 import nts
-from nts.deferred_insert import deferred_insert, save_to_db
+from nts.deferred_insert import deferred_insert, get_statistics, save_to_db
 from nts.tests import IntegrationTestCase
 
 
@@ -16,3 +16,19 @@ class TestDeferredInsert(IntegrationTestCase):
 		nts.clear_cache()  # deferred_insert cache keys are supposed to be persistent
 		save_to_db()
 		self.assertTrue(nts.db.exists("Route History", route_history))
+
+	def test_bulk_drain(self):
+		routes = [{"route": nts.generate_hash(), "user": "Administrator"} for _ in range(5)]
+		deferred_insert("Route History", routes[:2])
+		deferred_insert("Route History", routes[2])
+		deferred_insert("Route History", routes[3:])
+		deferred_insert("Route History", [{"route": nts.generate_hash(), "user": nts.generate_hash()}])
+
+		save_to_db()
+		for route in routes:
+			self.assertTrue(nts.db.exists("Route History", route))
+
+		stats = get_statistics()[b"Route History"]
+		self.assertEqual(stats["inserted"], 5)
+		self.assertEqual(stats["failed"], 1)
+		self.assertEqual(stats["pending"], 0)
@@ -43,6 +43,31 @@ class TestDocument(IntegrationTestCase):
 		self.assertTrue(isinstance(d.permissions, list))
 		self.assertTrue(filter(lambda d: d.fieldname == "email", d.fields))
 
+	def test_get_docs(self):
+		names = ["Guest", "Administrator"]
+		docs = nts.get_docs("User", names)
+
+		self.assertEqual([d.name for d in docs], names)
+		for doc in docs:
+			self.assertIsInstance(doc, User)
+			self.assertEqual(doc.as_dict(), nts.get_doc("User", doc.name).as_dict())
+			self.assertTrue(all(d.parent_doc is doc for d in doc.roles))
+
+		child_doctypes = {df.options for df in nts.get_meta("User").get_table_fields()}
+		with self.assertQueryCount(1 + len(child_doctypes), query_type=("select",)):
+			nts.get_docs("User", names)
+
+		self.assertRaises(nts.DoesNotExistError, nts.get_docs, "User", ["Guest", "nonexistent@example.com"])
+
+	def test_get_docs_with_custom_constructor(self):
+		file = nts.get_doc({"doctype": "File", "file_name": "test_get_docs.txt", "content": "test"}).insert()
+		(doc,) = nts.get_docs("File", [file.name])
+
+		# set in `File.__init__`
+		self.assertEqual(doc.content, b"")
+		self.assertFalse(doc.decode)
+		self.assertEqual(doc.as_dict(), nts.get_doc("File", file.name).as_dict())
+
 	def test_load_single(self):
 		d = nts.get_doc("Website Settings", "Website Settings")
 		self.assertEqual(d.name, "Website Settings")
@@ -3,7 +3,8 @@
 
 import email
 import re
-from unittest.mock import patch
+import smtplib
+from unittest.mock import MagicMock, patch
 
 import requests
 
@@ -82,6 +83,79 @@ class TestEmail(IntegrationTestCase):
 		self.assertEqual(len(queue_recipients), 2)
 		self.assertTrue("Unsubscribe" in nts.safe_decode(nts.flags.sent_mail))
 
+	def test_sending_tasks(self):
+		from nts.email.queue import EMAIL_QUEUE_WORKERS_PER_ACCOUNT, get_sending_tasks
+
+		batch = [nts._dict(name=f"a{i}", sender="a@example.com", email_account="A") for i in range(10)]
+		batch += [nts._dict(name="b", sender="b@example.com", email_account=None)]
+
+		tasks = get_sending_tasks(batch, workers=8)
+		self.assertEqual(len(tasks), EMAIL_QUEUE_WORKERS_PER_ACCOUNT + 1)
+		self.assertIn(["b"], tasks)
+		self.assertCountEqual([name for names in tasks for name in names], [row.name for row in batch])
+		# emails of an account are sent in order by each thread
+		self.assertEqual(tasks[0], ["a0", "a4", "a8"])
+
+	def test_flush_in_threads(self):
+		from nts.email.queue import flush
+
+		def queue_emails(recipients):
+			for recipient in recipients:
+				nts.sendmail(recipients=[recipient], sender="admin@example.com", subject="Test", message="Hi")
+			# threads read the queue using their own connections
+			nts.db.commit()
+
+		def delete_emails():
+			nts.db.delete("Email Queue")
+			nts.db.delete("Email Queue Recipient")
+			nts.db.commit()
+
+		def sendmail(from_addr, to_addrs, msg):
+			if to_addrs.startswith("fail"):
+				raise smtplib.SMTPRecipientsRefused({to_addrs: (550, b"No such user")})
+
+		def flush_with_smtp():
+			# emails are only sent to SMTP server outside of tests
+			with patch.object(nts, "in_test", False):
+				flush()
+
+		def get_statuses():
+			# statuses are committed by threads
+			nts.db.rollback()
+			return dict(nts.get_all("Email Queue Recipient", fields=["recipient", "status"], as_list=True))
+
+		self.addCleanup(delete_emails)
+		smtp = MagicMock()
+		smtp.return_value.login.return_value = (235, b"Authentication successful")
+		smtp.return_value.noop.return_value = (250, b"OK")
+		smtp.return_value.sendmail.side_effect = sendmail
+
+		with (
+			patch("smtplib.SMTP", smtp),
+			patch("smtplib.SMTP_SSL", smtp),
+			patch.dict(nts.conf, {"email_queue_workers": 2}),
+		):
+			queue_emails([f"ok{i}@example.com" for i in range(4)] + ["fail@example.com"])
+			flush_with_smtp()
+
+			statuses = get_statuses()
+			self.assertEqual(statuses.pop("fail@example.com"), "Not Sent")
+			self.assertEqual(set(statuses.values()), {"Sent"})
+			self.assertEqual(smtp.return_value.sendmail.call_count, 5)
+			# one connection per thread, closed when the thread is done
+			self.assertEqual(smtp.call_count, 2)
+			smtp.return_value.quit.assert_called()
+
+			delete_emails()
+			smtp.return_value.sendmail.reset_mock()
+			queue_emails([f"fail{i}@example.com" for i in range(20)])
+			with self.assertRaises(nts.ValidationError):
+				flush_with_smtp()
+
+			# threads stop sending once more than 10 emails of the batch have failed
+			self.assertIn(smtp.return_value.sendmail.call_count, (11, 12))
+			self.assertEqual(set(get_statuses().values()), {"Not Sent"})
+
 	def test_cc_header(self):
 		# test if sending with cc's makes it into header
 		nts.sendmail(
@@ -0,0 +1,31 @@
+import os
+
+import nts
+from nts.model.meta_snapshot import (
+	build_meta_snapshot,
+	get_meta_from_snapshot,
+	get_meta_version,
+	get_snapshot_path,
+)
+from nts.tests import IntegrationTestCase
+
+
+class TestMetaSnapshot(IntegrationTestCase):
+	def test_meta_snapshot(self):
+		nts.clear_cache(doctype="ToDo")
+		path = build_meta_snapshot(["User", "ToDo"])
+		self.assertEqual(path, get_snapshot_path(get_meta_version()))
+
+		meta = get_meta_from_snapshot("ToDo")
+		self.assertEqual(meta.name, "ToDo")
+		self.assertEqual(meta.get_valid_columns(), nts.get_meta("ToDo", cached=False).get_valid_columns())
+		self.assertIs(nts.get_meta("ToDo"), meta)
+		self.assertIsNone(get_meta_from_snapshot("Note"))
+
+		# any change in metadata invalidates the snapshot
+		nts.clear_cache(doctype="Note")
+		self.assertIsNone(get_meta_from_snapshot("ToDo"))
+		self.assertEqual(nts.get_meta("ToDo").name, "ToDo")
+
+		build_meta_snapshot(["ToDo"])
+		self.assertFalse(os.path.exists(path))
@@ -88,3 +88,22 @@ class TestMonitor(IntegrationTestCase):
 		nts.db.sql("select 1")
 		self.assertIn(get_trace_id(), str(nts.db.last_query))
 		nts.monitor.stop(response)
+
+	def test_timing_breakdown(self):
+		nts.conf.monitor_server_timing = 1
+		set_request(method="GET", path="/api/method/nts.ping")
+		response = build_response("json")
+		nts.monitor.start()
+		nts.db.sql("select 1")
+		nts.db.sql("select 2")
+		nts.cache.get_value("test_timing_breakdown")
+		nts.render_template("{{ 1 + 1 }}", {})
+		nts.monitor.stop(response)
+		nts.conf.monitor_server_timing = 0
+
+		log = nts.parse_json(nts.cache.lrange(MONITOR_REDIS_KEY, 0, -1)[0].decode())
+		self.assertGreaterEqual(log.timings["db"]["count"], 2)
+		self.assertGreaterEqual(log.timings["redis"]["count"], 1)
+		self.assertEqual(log.timings["render_template"]["count"], 1)
+		self.assertIn("db;", response.headers["Server-Timing"])
+		self.assertIn("total;dur=", response.headers["Server-Timing"])
@@ -21,6 +21,7 @@ from nts.permissions import (
 	clear_user_permissions_for_doctype,
 	get_doc_permissions,
 	get_doctypes_with_read,
+	get_permission_matrix,
 	remove_user_permission,
 	update_permission_property,
 )
@@ -80,6 +81,19 @@ class TestPermissions(IntegrationTestCase):
 		post = nts.get_doc("Test Blog Post", "_Test Blog Post")
 		self.assertTrue(post.has_permission("read"))
 
+	def test_realtime_permission_batch(self):
+		from nts.realtime import has_permissions
+
+		docs = [
+			["Test Blog Post", "_Test Blog Post"],
+			["Test Blog Post", ""],
+			["Test Blog Post", "_Test Blog Post that does not exist"],
+			["DocType", "User"],
+		]
+		nts.set_user("test2@example.com")
+		self.assertEqual(has_permissions(nts.as_json(docs)), [True, True, False, False])
+		self.assertRaises(nts.ValidationError, has_permissions, [["DocType", "User"]] * 51)
+
 	def test_select_permission(self):
 		# grant only select perm to blog post
 		add_permission("Test Blog Post", "Sales User", 0)
@@ -481,6 +495,33 @@ class TestPermissions(IntegrationTestCase):
 				f"A post from {post.blogger} is not expected.",
 			)
 
+	def test_permission_matrix(self):
+		update("Test Blog Post", "Blogger", 0, "if_owner", 1)
+		update("Test Blog Post", "Blogger", 0, "write", 1)
+		add("Test Blog Post", "Blogger", 1)
+		update("Test Blog Post", "Blogger", 1, "read", 1)
+		nts.clear_cache(doctype="Test Blog Post")
+
+		matrix = get_permission_matrix("Test Blog Post", ["Blogger", ALL_USER_ROLE])
+		self.assertTrue(matrix.has_if_owner_enabled)
+		self.assertTrue(matrix.has_permission("write"))
+		self.assertFalse(matrix.has_permission("write", ignore_if_owner=True))
+		self.assertEqual(matrix.get_permlevels("read"), [0, 1])
+		self.assertEqual(matrix.get_permlevels("delete"), [])
+
+		# same set of roles share the matrix
+		self.assertIs(get_permission_matrix("Test Blog Post", [ALL_USER_ROLE, "Blogger"]), matrix)
+
+		nts.set_user("test2@example.com")
+		self.assertEqual(nts.get_meta("Test Blog Post").get_permlevel_access("read"), [0, 1])
+
+		# changing permission rules invalidates the matrix
+		nts.set_user("Administrator")
+		update("Test Blog Post", "Blogger", 1, "read", 0)
+		nts.clear_cache(doctype="Test Blog Post")
+		matrix = get_permission_matrix("Test Blog Post", ["Blogger", ALL_USER_ROLE])
+		self.assertEqual(matrix.get_permlevels("read"), [0])
+
 	def test_if_owner_permission_overrides_properly(self):
 		# check if user is not granted access if the user is not the owner of the doc
 		# Blogger has only read access on the blog post unless he is the owner of the blog
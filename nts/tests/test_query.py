@@ -1,4 +1,5 @@
 import itertools
+from unittest.mock import patch
 
 import nts
 from nts.core.doctype.doctype.test_doctype import new_doctype
@@ -2299,6 +2300,107 @@ class TestQuery(IntegrationTestCase):
 		self.assertEqual(engine._get_ifnull_fallback("Patch Log", "patch"), "''")
 
 
+class TestQueryPlanCache(IntegrationTestCase):
+	def setUp(self):
+		from nts.database.query_plan import query_plan_cache
+
+		self.cache = query_plan_cache
+		self.cache.clear()
+		self.cache.reset_statistics()
+
+	def test_plan_is_reused_across_values(self):
+		from nts.database.query_plan import run_query
+
+		query = {"table": "User", "fields": ["name", "first_name"], "filters": {"name": "Administrator"}}
+		self.assertEqual(run_query(query, as_dict=True), nts.qb.get_query(**query).run(as_dict=True))
+		self.assertEqual(self.cache.misses, 1)
+
+		query["filters"] = {"name": "Guest"}
+		result = run_query(query, as_dict=True)
+		self.assertEqual(self.cache.hits, 1)
+		self.assertEqual(result[0].name, "Guest")
+
+		query["filters"] = {"name": ("in", ["Administrator", "Guest"])}
+		self.assertEqual(len(run_query(query, as_dict=True)), 2)
+		self.assertEqual(self.cache.misses, 2)
+
+	def test_value_dependent_shapes_are_not_cached(self):
+		from nts.database.query_plan import UncacheableQuery, get_query_shape
+
+		for filters in (
+			{"name": ""},
+			{"name": None},
+			{"enabled": 0},
+			{"enabled": True},
+			{"enabled": ("in", [1, 0])},
+			{"name": ("in", [])},
+			{"creation": ("between", ["2020-01-01", "2020-12-31"])},
+			[["name", "is", "set"]],
+		):
+			with self.assertRaises(UncacheableQuery, msg=filters):
+				get_query_shape({"table": "User", "filters": filters})
+
+		# permission query hook
+		with self.assertRaises(UncacheableQuery):
+			get_query_shape({"table": "User", "filters": {"name": "x"}, "ignore_permissions": False})
+
+	def test_numeric_values_are_bound(self):
+		from nts.database.query_plan import run_query
+
+		query = {"table": "User", "fields": ["name"], "filters": {"enabled": 1}, "order_by": "name"}
+		self.assertEqual(run_query(query, pluck="name"), nts.qb.get_query(**query).run(pluck="name"))
+
+		query["filters"] = {"enabled": ("!=", 2)}
+		run_query(query, pluck="name")
+		query["filters"] = {"enabled": ("!=", 1)}
+		self.assertEqual(run_query(query, pluck="name"), nts.qb.get_query(**query).run(pluck="name"))
+		self.assertEqual(self.cache.hits, 1)
+
+	def test_permission_queries_are_counted_as_bypassed(self):
+		from nts.database.query_plan import run_query
+
+		query = {"table": "User", "filters": {"name": "Administrator"}, "ignore_permissions": False}
+		run_query(query)
+		run_query({**query, "ignore_permissions": True})
+		run_query({**query, "ignore_permissions": True})
+
+		statistics = self.cache.statistics
+		self.assertEqual(statistics["bypassed_permissions"], 1)
+		self.assertEqual(statistics["overall_hit_ratio"], 0.33)
+
+	def test_permission_queries_are_cached_per_fingerprint(self):
+		from nts.database.query_plan import get_query_shape, run_query
+
+		query = {"table": "Role", "fields": ["name"], "filters": {"name": "System Manager"}}
+		permission_query = {**query, "ignore_permissions": False}
+		self.assertEqual(run_query(permission_query, pluck="name"), ["System Manager"])
+		permission_query["filters"] = {"name": "Guest"}
+		self.assertEqual(run_query(permission_query, pluck="name"), ["Guest"])
+		self.assertEqual(self.cache.hits, 1)
+
+		key = get_query_shape(permission_query)[0]
+		self.assertNotEqual(key, get_query_shape(query)[0])
+		self.assertNotEqual(key, get_query_shape({**permission_query, "user": "Guest"})[0])
+		with patch(
+			"nts.permissions.get_user_permissions",
+			return_value={"Role": [nts._dict(doc="Guest", applicable_for=None)]},
+		):
+			self.assertNotEqual(key, get_query_shape(permission_query)[0])
+
+		self.assertNotEqual(
+			get_query_shape({**query, "validate_filters": True})[0], get_query_shape(query)[0]
+		)
+
+	def test_get_all_uses_plan_cache(self):
+		nts.get_all("User", filters={"user_type": "System User"})
+		nts.get_all("User", filters={"user_type": "Website User"})
+		self.assertEqual(self.cache.hits, 1)
+
+		nts.clear_cache(doctype="User")
+		nts.get_all("User", filters={"user_type": "System User"})
+		self.assertEqual(self.cache.misses, 2)
+
+
 # This function is used as a permission query condition hook
 def test_permission_hook_condition(user):
 	return "`tabDashboard Settings`.`name` = 'Administrator'"
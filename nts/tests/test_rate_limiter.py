@@ -7,7 +7,7 @@ from werkzeug.wrappers import Response
 
 import nts
 import nts.rate_limiter
-from nts.rate_limiter import RateLimiter
+from nts.rate_limiter import RateLimiter, increment_sliding_window
 from nts.tests import IntegrationTestCase
 from nts.utils import cint
 
@@ -117,3 +117,21 @@ class TestRateLimiter(IntegrationTestCase):
 		time.sleep(1.1)
 		self.assertFalse(nts.cache.exists(limiter.key, shared=True))
 		nts.cache.delete(limiter.key)
+
+	def test_window_without_expiry(self):
+		limiter = RateLimiter(1000, 10)
+		nts.cache.persist(limiter.key)
+		limiter.update()
+		self.assertTrue(0 < nts.cache.ttl(limiter.key) <= 10)
+		nts.cache.delete(limiter.key)
+
+	def test_sliding_window(self):
+		key = nts.cache.make_key(f"rl:test_sliding_window:{nts.generate_hash()}")
+		for _ in range(3):
+			self.assertTrue(increment_sliding_window(key, 3, 3600))
+		self.assertFalse(increment_sliding_window(key, 3, 3600))
+
+		# rejected requests aren't counted
+		window_number = int(time.time() // 3600)
+		self.assertEqual(cint(nts.cache.get(key + f":{window_number}".encode())), 3)
+		nts.cache.delete(key + f":{window_number}".encode())
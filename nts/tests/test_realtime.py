@@ -0,0 +1,57 @@
+from unittest.mock import patch
+
+import nts
+from nts.realtime import MAX_LIST_UPDATE_NAMES, clear_permission_cache, get_doctype_room
+from nts.tests import IntegrationTestCase
+
+
+class TestRealtime(IntegrationTestCase):
+	def tearDown(self):
+		nts.db.rollback()
+
+	def test_coalesce_events_after_commit(self):
+		for name in ("a", "b", "a"):
+			nts.publish_realtime("list_update", {"doctype": "ToDo", "name": name}, after_commit=True)
+		nts.publish_realtime("list_update", {"doctype": "Note", "name": "a"}, after_commit=True)
+		for _ in range(3):
+			nts.publish_realtime("doc_update", {"name": "a"}, doctype="ToDo", docname="a", after_commit=True)
+
+		realtime_log = nts.local._realtime_log
+		events = realtime_log.get_events()
+		self.assertEqual(len(events), 3)
+		self.assertIn(("list_update", {"doctype": "Note", "name": "a"}, get_doctype_room("Note")), events)
+		self.assertIn(
+			("list_update", {"doctype": "ToDo", "user": None, "names": ["a", "b"]}, get_doctype_room("ToDo")),
+			events,
+		)
+		self.assertEqual(realtime_log.coalesced, 4)
+
+		nts.db.rollback()
+		self.assertFalse(hasattr(nts.local, "_realtime_log"))
+
+	def test_list_update_without_names(self):
+		for i in range(MAX_LIST_UPDATE_NAMES + 1):
+			nts.publish_realtime("list_update", {"doctype": "ToDo", "name": str(i)}, after_commit=True)
+
+		((event, message, _room),) = nts.local._realtime_log.get_events()
+		self.assertEqual(event, "list_update")
+		self.assertNotIn("names", message)
+
+	def test_clear_permission_cache_once_after_commit(self):
+		with patch("nts.realtime.emit_via_redis") as emit:
+			for user in ("a@example.com", "a@example.com", "b@example.com"):
+				clear_permission_cache(user)
+			emit.assert_not_called()
+			nts.db.commit()
+			self.assertEqual(emit.call_count, 2)
+
+			clear_permission_cache("a@example.com")
+			clear_permission_cache()
+			nts.db.commit()
+			self.assertEqual(emit.call_count, 3)
+			emit.assert_called_with("clear_permission_cache", {"user": None}, None)
+
+			clear_permission_cache("a@example.com")
+			nts.db.rollback()
+			nts.db.commit()
+			self.assertEqual(emit.call_count, 3)
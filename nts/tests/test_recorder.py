@@ -80,6 +80,27 @@ class TestRecorder(IntegrationTestCase):
 
 		self.assertNotEqual(len(request["calls"]), 0)
 
+	def test_record_reads_routed_to_replica(self):
+		from unittest.mock import patch
+
+		from nts.database.replica import ReadReplicaRouter
+
+		with patch.dict(nts.local.conf, {"replica_host": "127.0.0.1", "replica_max_lag": 0}):
+			nts.db.read_router = router = ReadReplicaRouter(nts.db)
+			try:
+				nts.db.sql("select name from tabUser where name = 'Administrator'")
+				self.assertIsNotNone(router.last_db)
+				nts.db.sql("select name from tabUser where name = 'Guest'")
+			finally:
+				nts.db.read_router = None
+				router.close()
+
+		self.stop_recording()
+		request = nts.recorder.get(nts.recorder.get()[0]["uuid"])
+		self.assertEqual(len(request["calls"]), 2)
+		self.assertIn("Administrator", request["calls"][0]["query"])
+		self.assertIn("Guest", request["calls"][1]["query"])
+
 	def test_explain(self):
 		nts.db.sql("SELECT * FROM tabDocType")
 		nts.db.sql("COMMIT")
@@ -168,3 +189,56 @@ class TestQueryNormalization(IntegrationTestCase):
 
 		for query, normalized in test_cases.items():
 			self.assertEqual(normalize_query(query), normalized)
+
+
+class TestSamplingRecorder(IntegrationTestCase):
+	def setUp(self):
+		nts.client_cache.set_value(nts.recorder.RECORDER_INTERCEPT_FLAG, False)
+		nts.conf.profiler_sample_rate = 1
+		set_request(method="GET", path="/api/resource/ToDo/test-sampling")
+
+	def tearDown(self):
+		nts.conf.profiler_sample_rate = 0
+		nts.cache.delete(*nts.recorder.get_profile_keys("GET /api/resource/ToDo"))
+
+	def test_sampling_recorder(self):
+		recorder = nts.recorder.record()
+		self.assertIsInstance(recorder, nts.recorder.SamplingRecorder)
+
+		for name in ("a", "b"):
+			nts.db.sql("select name from tabToDo where name = %s", name)
+		time.sleep(0.1)
+		nts.recorder.dump()
+
+		(endpoint,) = nts.recorder.get_profile()
+		self.assertEqual(endpoint["endpoint"], "GET /api/resource/ToDo")
+		self.assertEqual(endpoint["count"], 1)
+
+		profile = nts.recorder.get_profile("GET /api/resource/ToDo")
+		query = next(q for q in profile["queries"] if "tabToDo" in q["query"])
+		self.assertEqual(query["query"], "select name from tabToDo where name = ?")
+		self.assertEqual(query["count"], 2)
+		self.assertIn("test_sampling_recorder", profile["flamegraph"])
+
+
+class TestNPlusOneDetection(IntegrationTestCase):
+	def test_n_plus_one_detection(self):
+		with self.assertRaises(AssertionError) as context:
+			with self.assertNoNPlusOneQueries(threshold=3):
+				for name in ("a", "b", "c", "d"):
+					nts.db.get_value("User", name)  # N+1 query
+		self.assertIn("ran 4 times", str(context.exception))
+		self.assertIn("test_recorder.py", str(context.exception))
+
+		with self.assertNoNPlusOneQueries(threshold=3):
+			nts.get_all("User", filters={"name": ("in", ["a", "b", "c", "d"])})
+
+	def test_find_n_plus_one_queries(self):
+		calls = [
+			{"query": f"select name from tabUser where name = '{i}'", "stack": [], "duration": 1}
+			for i in range(5)
+		]
+		(n_plus_one,) = nts.recorder.find_n_plus_one_queries(calls, threshold=4)
+		self.assertEqual(n_plus_one["count"], 5)
+		self.assertEqual(n_plus_one["query"], "select name from tabUser where name = ?")
+		self.assertFalse(nts.recorder.find_n_plus_one_queries(calls, threshold=5))
@@ -10,7 +10,9 @@ from nts.utils import add_days, get_datetime
 from nts.utils.doctor import purge_pending_jobs
 from nts.utils.scheduler import (
 	DEFAULT_SCHEDULER_TICK,
+	SCHEDULED_JOBS_INDEX_KEY,
 	enqueue_events,
+	index_scheduled_jobs,
 	is_dormant,
 	schedule_jobs_based_on_activity,
 	sleep_duration,
@@ -51,6 +53,23 @@ class TestScheduler(IntegrationTestCase):
 			enqueued_jobs,
 		)
 
+	def test_scheduled_jobs_index(self):
+		job = get_test_job(method="nts.tests.test_scheduler.test_method", frequency="Daily")
+		job.db_set("last_execution", "2010-01-01 00:00:00", update_modified=False)
+		index_scheduled_jobs([job])
+		member = f"{nts.local.site}|{job.name}"
+		self.assertLess(nts.cache.zscore(SCHEDULED_JOBS_INDEX_KEY, member), time.time())
+
+		self.assertEqual(enqueue_events([job.name, "Deleted Job"]), [job.method])
+		self.assertIsNone(nts.cache.zscore(SCHEDULED_JOBS_INDEX_KEY, f"{nts.local.site}|Deleted Job"))
+
+		# indexed with next execution time when job runs
+		job.execute()
+		self.assertGreater(nts.cache.zscore(SCHEDULED_JOBS_INDEX_KEY, member), time.time())
+
+		job.delete()
+		self.assertIsNone(nts.cache.zscore(SCHEDULED_JOBS_INDEX_KEY, member))
+
 	def test_queue_peeking(self):
 		job = get_test_job()
 
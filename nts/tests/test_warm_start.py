@@ -0,0 +1,36 @@
+import os
+
+import nts
+from nts.tests import IntegrationTestCase
+from nts.utils import warm_start
+
+
+class TestWarmStart(IntegrationTestCase):
+	def test_warm_start_cache(self):
+		warm_start.clear()
+		self.assertIn("core", warm_start.get_app_modules()["nts"])
+		self.assertIn("nts.core.doctype.user.user", warm_start.get_controller_modules())
+		self.assertTrue(os.path.exists(warm_start.get_cache_path()))
+
+		apps = nts.get_installed_apps(_ensure_on_bench=True)
+		self.assertIsNone(warm_start.get_hooks(apps))
+		nts.client_cache.delete_value("app_hooks")
+		hooks = nts.get_hooks()
+		self.assertEqual(warm_start.get_hooks(apps), dict(hooks))
+
+		# loaded from file by new processes
+		warm_start._loaded.clear()
+		self.assertEqual(warm_start.get_hooks(apps), dict(hooks))
+
+	def test_cache_key(self):
+		apps = nts.get_all_apps(with_internal_apps=False)
+		key = warm_start.get_cache_key(apps)
+		self.assertEqual(key, warm_start.get_cache_key(apps))
+
+		hooks_path = nts.get_app_path("nts", "hooks.py")
+		mtime = os.stat(hooks_path).st_mtime
+		try:
+			os.utime(hooks_path, (mtime + 1, mtime + 1))
+			self.assertNotEqual(key, warm_start.get_cache_key(apps))
+		finally:
+			os.utime(hooks_path, (mtime, mtime))
@@ -1,4 +1,5 @@
 import os
+import pickle
 import random
 import signal
 import socket
@@ -31,6 +32,7 @@ from nts.utils import CallbackManager, cint, get_bench_id, get_sites
 from nts.utils.caching import site_cache
 from nts.utils.commands import log
 from nts.utils.data import sbool
+from nts.utils.local import release_local
 from nts.utils.redis_queue import RedisQueue
 
 # TTL to keep RQ job logs in redis for.
@@ -40,12 +42,20 @@ RQ_RESULTS_TTL = 10 * 60
 
 RQ_MAX_JOBS = 5000  # Restart NOFORK workers after every N number of jobs
 RQ_MAX_JOBS_JITTER = 50  # Random difference in max jobs to avoid restarting at same time
+SITE_CONTEXT_MAX_JOBS = 500  # Reconnect to site DB after every N jobs, see `SiteContext`
+SITE_CONTEXT_MAX_SITES = 8  # Keep DB connections of only these many recently served sites per worker
+SITE_CONTEXT_IDLE_TIMEOUT = 5 * 60  # Close DB connection of a site after it hasn't run jobs for N seconds
 
 MAX_QUEUED_JOBS = 500  # nts.enqueue will start failing when these many jobs exist in queue.
 # When too many jobs are pending in queue, order can be selectively flipped to LIFO to give better
 # response latencies to interactive jobs.
 QUEUE_STARVATION_THRESHOLD = 16
 
+MAX_BATCHED_CALLS_PER_JOB = 500  # Calls run by one batched job, rest are run by next job
+# Calls taken out of redis at a time by a batched job, at most these many are lost if the worker dies
+BATCHED_CALLS_CHUNK_SIZE = 20
+BATCHED_JOB_LOCK_TTL = 10 * 60  # Expire marker of queued batched job in case the job is lost
+
 
 _redis_queue_conn = None
 
@@ -89,6 +99,7 @@ def enqueue(
 	job_id: str | None = None,
 	deduplicate=False,
 	at_front_when_starved=False,
+	batch_key: str | None = None,
 	**kwargs,
 ) -> Job | Any:
 	"""
@@ -112,6 +123,9 @@ def enqueue(
 	:param job_id: Assigning unique job id, which can be checked using `is_job_enqueued`
 	:param at_front_when_starved: If the queue appears to be starved then new jobs are
 	automatically inserted in LIFO fashion.
+	:param batch_key: Run this call together with other calls of same method in same queue having
+	same key in one job. Calls are queued after current transaction is committed and run in order,
+	each in its own transaction, see `run_batched_calls`. Nothing is returned.
 	"""
 	# To handle older implementations
 	is_async = kwargs.pop("async", is_async)
@@ -153,6 +167,16 @@ def enqueue(
 	if call_directly:
 		return nts.call(method, **kwargs)
 
+	# Prepare a more readable name than <function $name at $address>
+	if isinstance(method, Callable):
+		method_name = f"{method.__module__}.{method.__qualname__}"
+	else:
+		method_name = method
+
+	if batch_key is not None and is_async:
+		add_batched_call(method_name, queue, batch_key, kwargs, timeout)
+		return
+
 	try:
 		q = get_queue(queue, is_async=is_async)
 	except ConnectionError:
@@ -168,12 +192,6 @@ def enqueue(
 	if not timeout:
 		timeout = get_queues_timeout().get(queue) or 300
 
-	# Prepare a more readable name than <function $name at $address>
-	if isinstance(method, Callable):
-		method_name = f"{method.__module__}.{method.__qualname__}"
-	else:
-		method_name = method
-
 	queue_args = {
 		"site": nts.local.site,
 		"user": nts.session.user,
@@ -236,13 +254,150 @@ def run_doc_method(doctype, name, doc_method, **kwargs):
 	getattr(nts.get_doc(doctype, name), doc_method)(**kwargs)
 
 
+def add_batched_call(method: str, queue: str, batch_key: str, kwargs: dict, timeout: int | None = None):
+	if not hasattr(nts.local, "_batched_calls"):
+		nts.local._batched_calls = defaultdict(list)
+		nts.db.after_commit.add(flush_batched_calls)
+		nts.db.after_rollback.add(clear_batched_calls)
+
+	call = {"user": nts.session.user, "kwargs": kwargs, "retry": 0}
+	nts.local._batched_calls[(method, queue, batch_key, timeout)].append(
+		pickle.dumps(call, protocol=pickle.HIGHEST_PROTOCOL)
+	)
+
+
+def flush_batched_calls():
+	if not hasattr(nts.local, "_batched_calls"):
+		return
+
+	batched_calls = nts.local._batched_calls
+	clear_batched_calls()
+	for (method, queue, batch_key, timeout), calls in batched_calls.items():
+		push_batched_calls(method, queue, batch_key, calls, timeout)
+
+
+def clear_batched_calls():
+	if hasattr(nts.local, "_batched_calls"):
+		del nts.local._batched_calls
+
+
+def push_batched_calls(
+	method: str,
+	queue: str,
+	batch_key: str,
+	calls: list[bytes],
+	timeout: int | None = None,
+	at_front: bool = False,
+):
+	"""Append `calls` to pending calls of the batch and queue a job to run them if one isn't queued.
+
+	A queued job runs all calls added until it starts, so a burst of calls is run by a few jobs.
+	With `at_front`, calls are put before pending calls, e.g. calls not run by an interrupted job."""
+	key = get_batched_calls_key(method, queue, batch_key)
+	lock_key = key + b"|queued"
+	with nts.cache.pipeline(transaction=False) as pipeline:
+		if calls and at_front:
+			pipeline.lpush(key, *reversed(calls))
+		elif calls:
+			pipeline.rpush(key, *calls)
+		pipeline.set(lock_key, 1, nx=True, ex=BATCHED_JOB_LOCK_TTL)
+		*_, queue_job = pipeline.execute()
+
+	if not queue_job:
+		return
+
+	try:
+		enqueue(
+			"nts.utils.background_jobs.run_batched_calls",
+			queue=queue,
+			timeout=timeout,
+			batched_method=method,
+			batch_queue=queue,
+			batch_key=batch_key,
+		)
+	except Exception:
+		# calls stay in redis and are run by job queued for next call of the batch
+		nts.cache.delete_value(lock_key, make_keys=False)
+		raise
+
+
+def run_batched_calls(batched_method: str, batch_queue: str, batch_key: str):
+	"""Run pending calls of a batch added by `enqueue` with `batch_key`.
+
+	Each call is committed separately so that a failing call doesn't affect others. Failed calls are
+	retried in next job if the failure is temporary, same as `execute_job` retries jobs.
+
+	Calls are taken out of redis a few at a time. If the job is interrupted (e.g. by timeout), calls
+	taken out but not started yet are put back for next job, the interrupted call fails like a job."""
+	from nts.deferred_insert import pop_items
+
+	key = get_batched_calls_key(batched_method, batch_queue, batch_key)
+	# calls added from now on queue another job
+	nts.cache.delete_value(key + b"|queued", make_keys=False)
+
+	method = nts.get_attr(batched_method)
+	failed_calls = []
+	calls_run = 0
+	while calls_run < MAX_BATCHED_CALLS_PER_JOB and (
+		calls := pop_items(key, min(BATCHED_CALLS_CHUNK_SIZE, MAX_BATCHED_CALLS_PER_JOB - calls_run))
+	):
+		calls_run += len(calls)
+		pending = calls[::-1]
+		try:
+			while pending:
+				if failed_call := run_batched_call(method, batched_method, pending.pop()):
+					failed_calls.append(failed_call)
+		finally:
+			if pending:
+				# e.g. job timed out while running a call, calls not started yet are run by next job
+				push_batched_calls(batched_method, batch_queue, batch_key, pending[::-1], at_front=True)
+
+	if failed_calls:
+		# same backoff as `execute_job` before retrying a job
+		time.sleep(max(call["retry"] for call in failed_calls))
+
+	if failed_calls or calls_run == MAX_BATCHED_CALLS_PER_JOB:
+		push_batched_calls(
+			batched_method,
+			batch_queue,
+			batch_key,
+			[pickle.dumps(call, protocol=pickle.HIGHEST_PROTOCOL) for call in failed_calls],
+		)
+
+
+def run_batched_call(method: Callable, batched_method: str, call: bytes) -> dict | None:
+	"""Run and commit one call of a batch, return the call if it should be retried."""
+	call = pickle.loads(call)
+	if call["user"] != nts.session.user:
+		nts.set_user(call["user"])
+
+	try:
+		method(**call["kwargs"])
+	except JobTimeoutException:
+		# fail the job, remaining calls are run by next job
+		nts.db.rollback()
+		raise
+	except Exception as e:
+		nts.db.rollback()
+		if call["retry"] < 5 and (
+			isinstance(e, nts.RetryBackgroundJobError) or (nts.db.is_deadlocked(e) or nts.db.is_timedout(e))
+		):
+			call["retry"] += 1
+			return call
+		nts.log_error(title=batched_method)
+	nts.db.commit()
+
+
+def get_batched_calls_key(method: str, queue: str, batch_key: str) -> bytes:
+	return nts.cache.make_key(f"batched_calls|{queue}|{method}|{batch_key}")
+
+
 def execute_job(site, method, event, job_name, kwargs, user=None, is_async=True, retry=0):
 	"""Executes job in a worker, performs commit/rollback and logs if there is any error"""
 	retval = None
 
 	if is_async:
-		nts.init(site, force=True)
-		nts.connect()
+		init_job_site(site)
 		if os.environ.get("CI"):
 			from nts.tests.utils import toggle_test_mode
 
@@ -284,7 +439,7 @@ def execute_job(site, method, event, job_name, kwargs, user=None, is_async=True,
 			# 1205 = lock wait timeout
 			# or RetryBackgroundJobError is explicitly raised
 			nts.job.after_job.reset()
-			nts.destroy()
+			release_job_site(site)
 			time.sleep(retry + 1)
 
 			return execute_job(site, method, event, job_name, kwargs, is_async=is_async, retry=retry + 1)
@@ -314,7 +469,112 @@ def execute_job(site, method, event, job_name, kwargs, user=None, is_async=True,
 		nts.local.job.after_job.run()
 
 		if is_async:
-			nts.destroy()
+			release_job_site(site)
+
+
+class SiteContext:
+	"""State of a site kept across jobs by workers which run jobs without forking.
+
+	Each job still starts with fresh `nts.local`, but reuses the DB connection and in-memory cached
+	site config of the previous job of the site instead of reconnecting. The connection is replaced
+	after `SITE_CONTEXT_MAX_JOBS` jobs and when metadata changes, so that state left in connection by
+	jobs (e.g. session variables) doesn't live forever.
+
+	Every kept context holds an open DB connection, so a worker serving many sites would hold one
+	connection per site. Only `SITE_CONTEXT_MAX_SITES` recently served sites are kept and contexts idle
+	for `SITE_CONTEXT_IDLE_TIMEOUT` are closed, see `evict_site_contexts`."""
+
+	__slots__ = ("db", "jobs", "last_used", "meta_version")
+
+	def __init__(self, db, meta_version: str):
+		self.db = db
+		self.jobs = 0
+		self.last_used = time.monotonic()
+		self.meta_version = meta_version
+
+	def is_stale(self) -> bool:
+		from nts.model.meta_snapshot import get_meta_version
+
+		return self.jobs >= SITE_CONTEXT_MAX_JOBS or self.meta_version != get_meta_version()
+
+
+# site -> context in least recently used order, `None` unless the worker keeps contexts, see
+# `enable_site_contexts`
+_site_contexts: dict[str, SiteContext] | None = None
+
+
+def enable_site_contexts():
+	"""Keep site contexts across jobs, only for workers which don't fork for every job.
+
+	Each worker keeps up to `SITE_CONTEXT_MAX_SITES` DB connections open, account for them in
+	`max_connections` of the DB server on multi-tenant benches."""
+	global _site_contexts
+	if _site_contexts is None:
+		_site_contexts = {}
+
+
+def init_job_site(site: str):
+	if _site_contexts is None:
+		nts.init(site, force=True)
+		nts.connect()
+		return
+
+	from nts.model.meta_snapshot import get_meta_version
+
+	nts.init(site, force=True, cached_config=True)
+	context = _site_contexts.pop(site, None)
+	if context and not context.is_stale():
+		nts.local.db = context.db
+		nts.set_user("Administrator")
+	else:
+		if context:
+			context.db.close()
+		nts.connect()
+		context = SiteContext(nts.local.db, get_meta_version())
+
+	# Re-insert to mark as most recently used
+	_site_contexts[site] = context
+	evict_site_contexts(site)
+
+
+def evict_site_contexts(current_site: str):
+	"""Close DB connections of sites which are idle or served least recently beyond the limit."""
+	now = time.monotonic()
+	for site, context in list(_site_contexts.items()):
+		if site == current_site:
+			continue
+		if (
+			len(_site_contexts) > SITE_CONTEXT_MAX_SITES
+			or now - context.last_used > SITE_CONTEXT_IDLE_TIMEOUT
+		):
+			context.db.close()
+			del _site_contexts[site]
+
+
+def release_job_site(site: str):
+	context = _site_contexts.get(site) if _site_contexts is not None else None
+	if not context:
+		nts.destroy()
+		return
+
+	context.jobs += 1
+	context.last_used = time.monotonic()
+	# e.g. replica connections opened by the job
+	for attr in ("db", "replica_db"):
+		db = getattr(nts.local, attr, None)
+		if db and db is not context.db:
+			db.close()
+
+	try:
+		# e.g. transaction control disabled or connection pinned to primary by the job
+		context.db.reset_state()
+		# Discard snapshot of current transaction so that next job sees fresh data
+		context.db.rollback()
+	except Exception:
+		context.db.close()
+		del _site_contexts[site]
+
+	release_local(nts.local)
 
 
 def start_worker(
@@ -382,6 +642,10 @@ class ntsWorkerNoFork(ntsWorker):
 	def __init__(self, *args, **kwargs):
 		super().__init__(*args, **kwargs)
 		self.push_exc_handler(self.no_fork_exception_handler)
+		# Reuses DB connections across jobs, each worker then holds up to `SITE_CONTEXT_MAX_SITES`
+		# connections (one per recently served site) even while idle.
+		if sbool(os.environ.get("nts_BACKGROUND_WORKERS_KEEP_SITE_CONTEXT", False)):
+			enable_site_contexts()
 
 	def work(self, *args, **kwargs):
 		kwargs["max_jobs"] = RQ_MAX_JOBS + random.randint(0, RQ_MAX_JOBS_JITTER)
@@ -1,18 +1,23 @@
 # Copyright (c) 2022, nts Technologies Pvt. Ltd. and Contributors
 # License: MIT. Check LICENSE
 
+import threading
 import time
-from collections import defaultdict
 from collections.abc import Callable
-from contextlib import suppress
 from functools import wraps
 from types import NoneType
 
 import nts
+from nts.utils.lru import LRUCache, approximate_size, get_all_cache_statistics, get_cache_statistics
 
-_SITE_CACHE = defaultdict(dict)
+# function -> LRUCache of (site, arguments) -> return value
+_SITE_CACHE: dict[Callable, LRUCache] = {}
 _KWD_MARK = object()  # sentinel for separating args from kwargs
 
+# key -> `_InFlightCall`, see `single_flight`
+_IN_FLIGHT: dict = {}
+_IN_FLIGHT_LOCK = threading.Lock()
+
 
 def __generate_request_cache_key(args: tuple, kwargs: dict) -> tuple:
 	"""Generate a key for the cache."""
@@ -23,7 +28,11 @@ def __generate_request_cache_key(args: tuple, kwargs: dict) -> tuple:
 	return (args, _KWD_MARK, frozenset(kwargs.items()))
 
 
-def request_cache(func: Callable) -> Callable:
+def _get_cache_name(func: Callable) -> str:
+	return f"{func.__module__}.{func.__qualname__}"
+
+
+def request_cache(func: Callable | None = None, *, maxsize: int | None = None) -> Callable:
 	"""
 	Decorator to cache function calls mid-request.
 
@@ -31,7 +40,8 @@ def request_cache(func: Callable) -> Callable:
 
 	The cache only persists for the current request and is cleared when the request is over.
 
-	The function is called just once per request with the same set of (kw)arguments.
+	The function is called just once per request with the same set of (kw)arguments. If `maxsize`
+	is specified, least recently used results are evicted once `maxsize` results are cached.
 
 	---
 	Usage:
@@ -48,34 +58,64 @@ def request_cache(func: Callable) -> Callable:
 
 	        calculate_pi(10)  # will calculate value
 	        calculate_pi(10)  # will return value from cache
+
+	        @request_cache(maxsize=128)
+	        def get_row(name): ...
 	```
 	"""
 
-	@wraps(func)
-	def wrapper(*args, **kwargs):
-		_cache = getattr(nts.local, "request_cache", None)
-		if _cache is None:
-			return func(*args, **kwargs)
-		try:
-			args_key = __generate_request_cache_key(args, kwargs)
-		except Exception:
-			return func(*args, **kwargs)
-
-		try:
-			return _cache[func][args_key]
-		except TypeError:
-			# args_key is not hashable
-			return func(*args, **kwargs)
-		except KeyError:
-			# cache miss
-			return_val = func(*args, **kwargs)
-			_cache[func][args_key] = return_val
+	def decorator(func: Callable) -> Callable:
+		cache_name = _get_cache_name(func)
+		# Counters are process wide, cache itself is per request.
+		statistics = get_cache_statistics(cache_name)
+
+		@wraps(func)
+		def wrapper(*args, **kwargs):
+			_cache = getattr(nts.local, "request_cache", None)
+			if _cache is None:
+				return func(*args, **kwargs)
+			try:
+				args_key = __generate_request_cache_key(args, kwargs)
+			except Exception:
+				return func(*args, **kwargs)
+
+			if maxsize and func not in _cache:
+				# Request local, doesn't need to be thread-safe
+				_cache[func] = LRUCache(maxsize, name=cache_name, thread_safe=False)
+
+			function_cache = _cache[func]
+			try:
+				return_val = function_cache[args_key]
+			except TypeError:
+				# args_key is not hashable
+				return func(*args, **kwargs)
+			except KeyError:
+				# cache miss
+				if not maxsize:
+					statistics.misses += 1
+				return_val = func(*args, **kwargs)
+				function_cache[args_key] = return_val
+				return return_val
+
+			if not maxsize:
+				statistics.hits += 1
 			return return_val
 
-	return wrapper
+		wrapper.cache_statistics = lambda: statistics.as_dict()
+		return wrapper
+
+	if func is not None:
+		return decorator(func)
+	return decorator
 
 
-def site_cache(ttl: int | None = None, maxsize: int | None = None) -> Callable:
+def site_cache(
+	ttl: int | None = None,
+	maxsize: int | None = None,
+	*,
+	max_bytes: int | None = None,
+	admission: bool = False,
+) -> Callable:
 	"""
 	Decorator to cache method calls across requests.
 
@@ -86,6 +126,11 @@ def site_cache(ttl: int | None = None, maxsize: int | None = None) -> Callable:
 	It offers a light-weight cache for the current process without the additional
 	overhead of serializing / deserializing Python objects.
 
+	Least recently used results are evicted once `maxsize` results or (approximately) `max_bytes`
+	worth of results are cached. With `admission=True` a new result only replaces the least recently
+	used one if it is requested more frequently (TinyLFU), so one-off calls don't evict hot results.
+	See `nts.utils.lru` for details.
+
 	Note: This cache isn't shared among workers. If you need to share data across
 	workers, use redis (nts.cache API) instead.
 
@@ -105,13 +150,30 @@ def site_cache(ttl: int | None = None, maxsize: int | None = None) -> Callable:
 	        calculate_pi(10) # will return value from cache
 	        calculate_pi.clear_cache() # clear this function's cache for all sites
 	        calculate_pi(10) # will calculate value
+	        calculate_pi.cache_statistics() # hits, misses, evictions etc.
 	```
 	"""
 
 	def time_cache_wrapper(func: Callable | None = None) -> Callable:
+		cache_name = _get_cache_name(func)
+
+		def get_function_cache() -> LRUCache:
+			if (function_cache := _SITE_CACHE.get(func)) is None:
+				function_cache = _SITE_CACHE.setdefault(
+					func,
+					LRUCache(
+						getattr(func, "maxsize", None),
+						max_bytes=max_bytes,
+						sizeof=approximate_size if max_bytes else None,
+						admission=admission,
+						name=cache_name,
+					),
+				)
+			return function_cache
+
 		def clear_cache():
 			"""Clear cache for this function for all sites if not specified."""
-			_SITE_CACHE[func].clear()
+			get_function_cache().clear()
 
 		func.clear_cache = clear_cache
 
@@ -134,31 +196,22 @@ def site_cache(ttl: int | None = None, maxsize: int | None = None) -> Callable:
 				func.clear_cache()
 				func.expiration = time.monotonic() + func.ttl
 
-			# NOTE: Important things to consider from thread safety POV:
-			#   1. Other thread can issue clear_cache and delete entire dictionary.
-			#   2. Other thread can pop the exact elemement we are reading if maxsize is hit.
-
-			# NOTE: Keep a local reference to dictionary of interest so it doesn't get swapped
-			function_cache = _SITE_CACHE[func]
+			# NOTE: LRUCache is thread-safe, keep a local reference so it doesn't get swapped
+			function_cache = get_function_cache()
 
 			try:
 				return function_cache[arguments_key]
 
 			# not handling TypeError here, expecting arguments_key to be hashable
-			except (KeyError, RuntimeError):
-				# NOTE: This is just a cache miss or dictionary was modified while reading it
+			except KeyError:
 				pass
 
-			if hasattr(func, "maxsize") and len(function_cache) >= func.maxsize:
-				# Note: This implements FIFO eviction policy
-				with suppress(RuntimeError):
-					function_cache.pop(next(iter(function_cache)), None)
-
 			result = func(*args, **kwargs)
 			function_cache[arguments_key] = result
 
 			return result
 
+		site_cache_wrapper.cache_statistics = lambda: get_function_cache().statistics
 		return site_cache_wrapper
 
 	if callable(ttl):
@@ -167,13 +220,80 @@ def site_cache(ttl: int | None = None, maxsize: int | None = None) -> Callable:
 	return time_cache_wrapper
 
 
-def redis_cache(ttl: int | None = 3600, user: str | bool | None = None, shared: bool = False) -> Callable:
+def clear_site_cache():
+	"""Clear cached results of all `site_cache` decorated functions for all sites."""
+	for function_cache in list(_SITE_CACHE.values()):
+		function_cache.clear()
+
+
+def get_local_cache_statistics() -> dict[str, dict]:
+	"""Return hit/miss/eviction counters of `site_cache` and `request_cache` caches in this process."""
+	statistics = get_all_cache_statistics()
+	for function_cache in list(_SITE_CACHE.values()):
+		statistics[function_cache.stats.name] = function_cache.statistics
+	return statistics
+
+
+class _InFlightCall:
+	__slots__ = ("done", "exception", "owner", "result")
+
+	def __init__(self):
+		self.done = threading.Event()
+		self.owner = threading.get_ident()
+		self.result = self.exception = None
+
+
+def single_flight(key, fn: Callable):
+	"""Call `fn` once for all threads of this process which request same `key` at the same time.
+
+	Threads which request `key` while `fn` is being called wait for it and get the same result (or
+	exception). `key` should identify the site too, e.g. use `nts.cache.make_key`."""
+	with _IN_FLIGHT_LOCK:
+		call = _IN_FLIGHT.get(key)
+		if call is None:
+			call = _IN_FLIGHT[key] = _InFlightCall()
+			leader = True
+		else:
+			leader = False
+
+	if not leader:
+		if call.owner == threading.get_ident():
+			# `fn` (indirectly) needs its own result, waiting would deadlock
+			return fn()
+		call.done.wait()
+		if call.exception is not None:
+			raise call.exception
+		return call.result
+
+	try:
+		call.result = fn()
+	except Exception as e:
+		call.exception = e
+		raise
+	finally:
+		with _IN_FLIGHT_LOCK:
+			del _IN_FLIGHT[key]
+		call.done.set()
+
+	return call.result
+
+
+def redis_cache(
+	ttl: int | None = 3600,
+	user: str | bool | None = None,
+	shared: bool = False,
+	stale_ttl: int | None = None,
+) -> Callable:
 	"""Decorator to cache method calls and its return values in Redis
 
+	Concurrent calls with same arguments in a process share a single call to the function.
+
 	args:
 	        ttl: time to expiry in seconds, defaults to 1 hour
 	        user: `true` should cache be specific to session user.
 	        shared: `true` should cache be shared across sites
+	        stale_ttl: serve expired value for these many more seconds while one worker recomputes it,
+	                instead of every worker computing it at the same time.
 	"""
 
 	def wrapper(func: Callable | None = None) -> Callable:
@@ -188,6 +308,16 @@ def redis_cache(ttl: int | None = 3600, user: str | bool | None = None, shared:
 		@wraps(func)
 		def redis_cache_wrapper(*args, **kwargs):
 			func_call_key = f"{func_key}::{hash(__generate_request_cache_key(args, kwargs))}"
+			if stale_ttl:
+				return nts.cache.get_value(
+					func_call_key,
+					generator=lambda: func(*args, **kwargs),
+					user=user,
+					shared=shared,
+					expires_in_sec=getattr(func, "ttl", 3600),
+					stale_ttl=stale_ttl,
+				)
+
 			cached_val = nts.cache.get_value(func_call_key, user=user, shared=shared)
 			if cached_val is not None:
 				return cached_val
@@ -197,10 +327,13 @@ def redis_cache(ttl: int | None = 3600, user: str | bool | None = None, shared:
 			if nts.cache.exists(func_call_key, user=user, shared=shared):
 				return None
 
-			val = func(*args, **kwargs)
-			ttl = getattr(func, "ttl", 3600)
-			nts.cache.set_value(func_call_key, val, expires_in_sec=ttl, user=user, shared=shared)
-			return val
+			def generate():
+				val = func(*args, **kwargs)
+				ttl = getattr(func, "ttl", 3600)
+				nts.cache.set_value(func_call_key, val, expires_in_sec=ttl, user=user, shared=shared)
+				return val
+
+			return single_flight(nts.cache.make_key(func_call_key, user, shared), generate)
 
 		return redis_cache_wrapper
 
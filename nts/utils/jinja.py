@@ -137,12 +137,14 @@ def render_template(template, context=None, is_path=None, safe_render=True):
 
 	import time
 
+	from nts.monitor import measure
 	from nts.utils.logger import get_logger
 
 	logger = get_logger("render-template")
 	try:
 		start_time = time.monotonic()
-		return compiled_template.render(context)
+		with measure("render_template"):
+			return compiled_template.render(context)
 	except Exception as e:
 		import html
 
@@ -0,0 +1,269 @@
+# Copyright (c) 2026, nts Technologies Pvt. Ltd. and Contributors
+# License: MIT. See LICENSE
+
+"""
+In-process LRU cache used by `site_cache`, `request_cache`, `ClientCache` and other worker level
+caches.
+
+- Eviction: least recently used key is evicted once `maxsize` keys (or `max_bytes` of values, when
+  a `sizeof` function is given) are stored.
+- Admission (optional): With `admission=True` a TinyLFU filter decides whether a new key is worth
+  evicting the least recently used key for. Access frequency of keys is estimated using a small
+  count-min sketch, a new key is only stored if it was accessed more frequently than the key it
+  would replace. This stops one-off keys (e.g. scans over many sites or documents) from pushing out
+  hot keys. See https://arxiv.org/abs/1512.00727
+- Statistics: hits, misses and evictions are counted per cache *name* so caches which are created
+  repeatedly (like per-request caches) report aggregated numbers. See `get_cache_statistics`.
+"""
+
+import sys
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Hashable, Iterator
+from contextlib import nullcontext
+from dataclasses import asdict, dataclass
+
+# Max value of a counter in frequency sketch, 4 bits are enough as counters are halved regularly.
+_MAX_FREQUENCY = 15
+_SKETCH_DEPTH = 4
+_SKETCH_SEEDS = (0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9, 0x27D4EB2F165667C5)
+
+
+@dataclass(slots=True)
+class CacheStatistics:
+	name: str
+	hits: int = 0
+	misses: int = 0
+	evictions: int = 0
+	rejections: int = 0  # keys not admitted by TinyLFU
+
+	@property
+	def hit_ratio(self) -> float | None:
+		return round(self.hits / (self.hits + self.misses), 2) if self.hits else None
+
+	def as_dict(self) -> dict:
+		return asdict(self) | {"hit_ratio": self.hit_ratio}
+
+	def reset(self):
+		self.hits = self.misses = self.evictions = self.rejections = 0
+
+
+# name -> statistics. Counters can be *slightly* off, these aren't guarded by a mutex.
+_STATISTICS: dict[str, CacheStatistics] = {}
+
+
+def get_cache_statistics(name: str) -> CacheStatistics:
+	if (statistics := _STATISTICS.get(name)) is None:
+		statistics = _STATISTICS.setdefault(name, CacheStatistics(name))
+	return statistics
+
+
+def get_all_cache_statistics() -> dict[str, dict]:
+	"""Return statistics of all caches in current process, keyed by cache name."""
+	return {name: statistics.as_dict() for name, statistics in sorted(_STATISTICS.items())}
+
+
+class FrequencySketch:
+	"""Count-min sketch to estimate access frequency of keys, used for TinyLFU admission."""
+
+	__slots__ = ("additions", "mask", "sample_size", "table")
+
+	def __init__(self, capacity: int):
+		width = 1 << max(capacity - 1, 15).bit_length()
+		self.mask = width - 1
+		self.table = bytearray(width * _SKETCH_DEPTH)
+		# Counters are halved after these many increments so old popularity fades away.
+		self.sample_size = 10 * max(capacity, 16)
+		self.additions = 0
+
+	def _indexes(self, key: Hashable):
+		h = hash(key)
+		for row, seed in enumerate(_SKETCH_SEEDS):
+			yield row * (self.mask + 1) + (((h * seed) >> 16) & self.mask)
+
+	def increment(self, key: Hashable):
+		table = self.table
+		for index in self._indexes(key):
+			if table[index] < _MAX_FREQUENCY:
+				table[index] += 1
+
+		self.additions += 1
+		if self.additions >= self.sample_size:
+			self.table = bytearray(count >> 1 for count in table)
+			self.additions //= 2
+
+	def frequency(self, key: Hashable) -> int:
+		table = self.table
+		return min(table[index] for index in self._indexes(key))
+
+
+class LRUCache:
+	"""Mapping with least-recently-used eviction policy.
+
+	:param maxsize: Max number of keys, `None` for unbounded.
+	:param max_bytes: Max total size of values as computed by `sizeof`.
+	:param sizeof: Function returning (approximate) size of a value in bytes, sizes are only tracked
+	        if this is specified.
+	:param admission: Use TinyLFU admission policy, only applicable if `maxsize` is set.
+	:param name: Name used for reporting statistics, caches with same name share statistics. Caches
+	        without a name keep their own statistics, these aren't reported.
+	:param thread_safe: Guard all operations with a lock. Not required for thread-local caches.
+	"""
+
+	__slots__ = ("data", "lock", "max_bytes", "maxsize", "sizeof", "sizes", "sketch", "stats", "used_bytes")
+
+	def __init__(
+		self,
+		maxsize: int | None = None,
+		*,
+		max_bytes: int | None = None,
+		sizeof: Callable[[object], int] | None = None,
+		admission: bool = False,
+		name: str | None = None,
+		thread_safe: bool = True,
+	):
+		self.maxsize = maxsize
+		self.max_bytes = max_bytes
+		self.sizeof = sizeof
+		self.data: OrderedDict = OrderedDict()
+		self.sizes: dict | None = {} if sizeof else None
+		self.used_bytes = 0
+		self.sketch = FrequencySketch(maxsize) if admission and maxsize else None
+		self.stats = get_cache_statistics(name) if name else CacheStatistics("")
+		self.lock = threading.RLock() if thread_safe else nullcontext()
+
+	def __getitem__(self, key):
+		with self.lock:
+			if self.sketch:
+				self.sketch.increment(key)
+			try:
+				value = self.data[key]
+			except KeyError:
+				self.stats.misses += 1
+				raise
+			self.data.move_to_end(key)
+
+		self.stats.hits += 1
+		return value
+
+	def get(self, key, default=None):
+		try:
+			return self[key]
+		except KeyError:
+			return default
+
+	def peek(self, key, default=None):
+		"""Get value without affecting recency or statistics."""
+		return self.data.get(key, default)
+
+	def __setitem__(self, key, value):
+		self.set(key, value)
+
+	def set(self, key, value) -> bool:
+		"""Store value, return `False` if it was rejected by admission policy or size limits."""
+		size = self.sizeof(value) if self.sizeof else 0
+
+		with self.lock:
+			if self.max_bytes is not None and size > self.max_bytes:
+				self._pop(key)
+				return False
+
+			if key in self.data:
+				self._pop(key)
+			elif self.maxsize and len(self.data) >= self.maxsize and not self._admit(key):
+				self.stats.rejections += 1
+				return False
+
+			self.data[key] = value
+			if self.sizes is not None:
+				self.sizes[key] = size
+				self.used_bytes += size
+
+			self._evict()
+		return True
+
+	def _admit(self, key) -> bool:
+		if not self.sketch or not self.data:
+			return True
+
+		victim = next(iter(self.data))
+		return self.sketch.frequency(key) > self.sketch.frequency(victim)
+
+	def _evict(self):
+		while (self.maxsize and len(self.data) > self.maxsize) or (
+			self.max_bytes is not None and self.used_bytes > self.max_bytes and len(self.data) > 1
+		):
+			key, _ = self.data.popitem(last=False)
+			if self.sizes is not None:
+				self.used_bytes -= self.sizes.pop(key, 0)
+			self.stats.evictions += 1
+
+	def _pop(self, key, default=None):
+		value = self.data.pop(key, default)
+		if self.sizes is not None:
+			self.used_bytes -= self.sizes.pop(key, 0)
+		return value
+
+	def pop(self, key, default=None):
+		with self.lock:
+			return self._pop(key, default)
+
+	def __delitem__(self, key):
+		with self.lock:
+			if key not in self.data:
+				raise KeyError(key)
+			self._pop(key)
+
+	def __contains__(self, key) -> bool:
+		return key in self.data
+
+	def __len__(self) -> int:
+		return len(self.data)
+
+	def __iter__(self) -> Iterator:
+		with self.lock:
+			return iter(list(self.data))
+
+	def keys(self) -> list:
+		with self.lock:
+			return list(self.data)
+
+	def items(self) -> list[tuple]:
+		with self.lock:
+			return list(self.data.items())
+
+	def values(self) -> list:
+		with self.lock:
+			return list(self.data.values())
+
+	def clear(self):
+		with self.lock:
+			self.data.clear()
+			if self.sizes is not None:
+				self.sizes.clear()
+			self.used_bytes = 0
+
+	@property
+	def statistics(self) -> dict:
+		return self.stats.as_dict() | {
+			"capacity": self.maxsize,
+			"used": len(self.data),
+			"max_bytes": self.max_bytes,
+			"used_bytes": self.used_bytes if self.sizes is not None else None,
+		}
+
+
+def approximate_size(obj, depth: int = 3) -> int:
+	"""Approximate memory used by `obj` including (a few levels of) contained objects."""
+	size = sys.getsizeof(obj, 0)
+	if depth <= 0:
+		return size
+
+	if isinstance(obj, dict):
+		size += sum(approximate_size(k, depth - 1) + approximate_size(v, depth - 1) for k, v in obj.items())
+	elif isinstance(obj, list | tuple | set | frozenset):
+		size += sum(approximate_size(item, depth - 1) for item in obj)
+	elif hasattr(obj, "__dict__"):
+		size += approximate_size(obj.__dict__, depth - 1)
+
+	return size
@@ -3,9 +3,9 @@
 import json
 import pickle
 import re
-import threading
 import time
 from collections import namedtuple
+from collections.abc import Callable
 from contextlib import suppress
 
 import redis
@@ -15,11 +15,143 @@ from redis.exceptions import ResponseError
 
 import nts
 from nts.utils import cstr
+from nts.utils.caching import single_flight
+from nts.utils.lru import LRUCache
 
 # 5 is faster than default which is 4.
 # Python uses old protocol for backward compatibility, we don't support anything <3.10.
 DEFAULT_PICKLE_PROTOCOL = 5
 
+# Value stored by `set_value(..., stale_ttl=...)`, `fresh_until` is a unix timestamp.
+StaleableValue = namedtuple("StaleableValue", ["value", "fresh_until"])
+
+# Max time one worker gets to regenerate a stale value before others try again.
+REVALIDATION_LOCK_TIMEOUT = 60
+
+
+def _loads(value):
+	"""Unpickle value stored by `RedisWrapper.set_value`."""
+	if value is None:
+		return None
+
+	value = pickle.loads(value)
+	if type(value) is StaleableValue:
+		return value.value
+	return value
+
+
+class RedisPipeline:
+	"""Pipeline returned by `nts.cache.pipeline()`.
+
+	Commands of redis-py's pipeline (`set`, `hdel`, `publish` etc.) work with raw keys and values as
+	usual. `*_value` methods behave like their `RedisWrapper` counterparts: keys are made using
+	`make_key`, values are pickled and the request local cache is used and updated. `execute`
+	returns results of all calls in order.
+
+	Usage:
+	        with nts.cache.pipeline(transaction=False) as pipeline:
+	                pipeline.get_value("a")
+	                pipeline.get_value("b", user=True)
+	                pipeline.set_value("c", {"x": 1}, expires_in_sec=60)
+	                a, b, _ = pipeline.execute()
+	"""
+
+	def __init__(self, cache: "RedisWrapper", pipeline: redis.client.Pipeline):
+		self.cache = cache
+		self.pipeline = pipeline
+		# index of queued command -> function to decode its result
+		self.decoders: dict[int, Callable] = {}
+		# results available without querying redis: (index in results, value)
+		self.local_results: list[tuple[int, object]] = []
+
+	def __getattr__(self, name):
+		return getattr(self.pipeline, name)
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *args):
+		self.reset()
+
+	def __len__(self):
+		return len(self.pipeline) + len(self.local_results)
+
+	def _queue(self, decoder: Callable | None = None):
+		if decoder:
+			self.decoders[len(self.pipeline.command_stack) - 1] = decoder
+
+	def _add_local_result(self, value):
+		self.local_results.append((len(self), value))
+
+	def get_value(self, key, user=None, shared=False):
+		key = self.cache.make_key(key, user, shared)
+		local_cache = nts.local.cache
+		if key in local_cache:
+			self._add_local_result(local_cache[key])
+			return
+
+		def decode(value):
+			value = local_cache[key] = _loads(value)
+			return value
+
+		self.pipeline.get(key)
+		self._queue(decode)
+
+	def set_value(self, key, val, user=None, expires_in_sec=None, shared=False):
+		key = self.cache.make_key(key, user, shared)
+		nts.local.cache[key] = val
+		self.pipeline.set(key, pickle.dumps(val, protocol=DEFAULT_PICKLE_PROTOCOL), ex=expires_in_sec)
+
+	def delete_value(self, keys, user=None, shared=False):
+		if not isinstance(keys, list | tuple):
+			keys = (keys,)
+
+		keys = [self.cache.make_key(k, user, shared) for k in keys]
+		local_cache = nts.local.cache
+		for key in keys:
+			local_cache.pop(key, None)
+
+		self.pipeline.unlink(*keys)
+
+	def hget_value(self, name, key, shared=False):
+		_name = self.cache.make_key(name, shared=shared)
+		local_hash = nts.local.cache.setdefault(_name, {})
+		if key in local_hash:
+			self._add_local_result(local_hash[key])
+			return
+
+		def decode(value):
+			value = _loads(value)
+			if value is not None:
+				local_hash[key] = value
+			return value
+
+		self.pipeline.hget(_name, key)
+		self._queue(decode)
+
+	def execute(self, raise_on_error: bool = True) -> list:
+		try:
+			if monitor := getattr(nts.local, "monitor", None):
+				start = time.perf_counter()
+				results = self.pipeline.execute(raise_on_error)
+				monitor.add_timing("redis", time.perf_counter() - start)
+			else:
+				results = self.pipeline.execute(raise_on_error)
+			results = [
+				self.decoders[i](result) if i in self.decoders else result for i, result in enumerate(results)
+			]
+			for index, value in self.local_results:
+				results.insert(index, value)
+			return results
+		finally:
+			self.decoders.clear()
+			self.local_results.clear()
+
+	def reset(self):
+		self.pipeline.reset()
+		self.decoders.clear()
+		self.local_results.clear()
+
 
 class RedisearchWrapper(Search):
 	def sugadd(self, key, *suggestions, **kwargs):
@@ -49,6 +181,16 @@ class RedisWrapper(redis.Redis):
 		"""WARNING: Added for backward compatibility to support nts.cache().method(...)"""
 		return self
 
+	def execute_command(self, *args, **options):
+		if monitor := getattr(nts.local, "monitor", None):
+			start = time.perf_counter()
+			try:
+				return super().execute_command(*args, **options)
+			finally:
+				monitor.add_timing("redis", time.perf_counter() - start)
+
+		return super().execute_command(*args, **options)
+
 	def make_key(self, key, user=None, shared=False):
 		if shared:
 			return key
@@ -61,55 +203,161 @@ class RedisWrapper(redis.Redis):
 
 		return f"{nts.local.conf.get('db_name')}|{key}".encode()
 
-	def set_value(self, key, val, user=None, expires_in_sec=None, shared=False):
+	def set_value(self, key, val, user=None, expires_in_sec=None, shared=False, *, stale_ttl=None):
 		"""Sets cache value.
 
 		:param key: Cache key
 		:param val: Value to be cached
 		:param user: Prepends key with User
 		:param expires_in_sec: Expire value of this key in X seconds
+		:param stale_ttl: Keep the value for X more seconds after it expires, `get_value` serves it
+		        while one worker regenerates it.
 		"""
 		key = self.make_key(key, user, shared)
 
 		nts.local.cache[key] = val
 
+		if stale_ttl and expires_in_sec:
+			val = StaleableValue(val, time.time() + expires_in_sec)
+			expires_in_sec += stale_ttl
+
 		with suppress(redis.exceptions.ConnectionError):
 			self.set(name=key, value=pickle.dumps(val, protocol=DEFAULT_PICKLE_PROTOCOL), ex=expires_in_sec)
 
-	def get_value(self, key, generator=None, user=None, expires=False, shared=False, *, use_local_cache=True):
+	def get_value(
+		self,
+		key,
+		generator=None,
+		user=None,
+		expires=False,
+		shared=False,
+		*,
+		use_local_cache=True,
+		expires_in_sec=None,
+		stale_ttl=None,
+	):
 		"""Return cache value. If not found and generator function is
 		        given, call the generator.
 
+		Concurrent calls to `generator` for the same key are deduplicated within the process.
+
 		:param key: Cache key.
 		:param generator: Function to be called to generate a value if `None` is returned.
 		:param expires: If the key is supposed to be with an expiry, don't store it in nts.local
+		:param expires_in_sec: Expiry of value returned by `generator`.
+		:param stale_ttl: Serve expired value for X more seconds while one worker (holding a lock in
+		        redis) regenerates it. Requires `expires_in_sec`.
 		"""
 		original_key = key
 		key = self.make_key(key, user, shared)
 
 		local_cache = nts.local.cache
 		if key in local_cache and use_local_cache:
-			val = local_cache[key]
+			return local_cache[key]
 
-		else:
-			val = None
-			try:
-				val = self.get(key)
-			except redis.exceptions.ConnectionError:
-				pass
+		val = None
+		try:
+			val = self.get(key)
+		except redis.exceptions.ConnectionError:
+			pass
+
+		if val is not None:
+			val = pickle.loads(val)
+
+		# Unlike plain values, a stored `None` is a valid value if it's wrapped.
+		found = val is not None
+		revalidating = False
+		if type(val) is StaleableValue:
+			if (
+				generator
+				and not expires
+				and time.time() >= val.fresh_until
+				and self.acquire_revalidation_lock(original_key, user=user, shared=shared)
+			):
+				found = False
+				revalidating = True
+			val = val.value
+
+		if not expires:
+			if not found and generator:
+
+				def generate():
+					value = generator()
+					self.set_value(
+						original_key,
+						value,
+						user=user,
+						expires_in_sec=expires_in_sec,
+						shared=shared,
+						stale_ttl=stale_ttl,
+					)
+					if revalidating:
+						self.release_revalidation_lock(original_key, user=user, shared=shared)
+					return value
+
+				val = local_cache[key] = single_flight(key, generate)
 
-			if val is not None:
-				val = pickle.loads(val)
+			else:
+				local_cache[key] = val
+
+		return val
+
+	def acquire_revalidation_lock(self, key, *, user=None, shared=False) -> bool:
+		"""Return `True` if caller should regenerate stale value of `key`, only one caller gets to
+		do that every `REVALIDATION_LOCK_TIMEOUT` seconds."""
+		lock_key = self.make_key(f"{key}::revalidate", user, shared)
+		try:
+			return bool(self.set(lock_key, 1, nx=True, ex=REVALIDATION_LOCK_TIMEOUT))
+		except redis.exceptions.ConnectionError:
+			return True
+
+	def release_revalidation_lock(self, key, *, user=None, shared=False):
+		with suppress(redis.exceptions.ConnectionError):
+			self.unlink(self.make_key(f"{key}::revalidate", user, shared))
+
+	def pipeline(self, transaction=True, shard_hint=None) -> RedisPipeline:
+		"""Return a pipeline to send multiple commands in one round trip, see `RedisPipeline`."""
+		return RedisPipeline(self, super().pipeline(transaction=transaction, shard_hint=shard_hint))
+
+	def get_many(self, keys, user=None, shared=False, *, expires=False) -> dict:
+		"""Return values of `keys` as a dict using a single round trip, missing keys have `None`.
+
+		Same as calling `get_value` for each key, see `get_value` for arguments."""
+		local_cache = nts.local.cache
+		values = {}
+		missing = {}
+		for key in keys:
+			made_key = self.make_key(key, user, shared)
+			if made_key in local_cache:
+				values[key] = local_cache[made_key]
+			else:
+				missing[made_key] = key
+
+		if not missing:
+			return values
+
+		try:
+			raw_values = self.mget(list(missing))
+		except redis.exceptions.ConnectionError:
+			raw_values = [None] * len(missing)
 
+		for made_key, raw in zip(missing, raw_values, strict=True):
+			values[missing[made_key]] = value = _loads(raw)
 			if not expires:
-				if val is None and generator:
-					val = generator()
-					self.set_value(original_key, val, user=user, shared=shared)
+				local_cache[made_key] = value
 
-				else:
-					local_cache[key] = val
+		return values
 
-		return val
+	def set_many(self, mapping: dict, user=None, expires_in_sec=None, shared=False):
+		"""Set multiple values using a single round trip, see `set_value` for arguments."""
+		if not mapping:
+			return
+
+		with self.pipeline(transaction=False) as pipeline:
+			for key, val in mapping.items():
+				pipeline.set_value(key, val, user=user, expires_in_sec=expires_in_sec, shared=shared)
+			with suppress(redis.exceptions.ConnectionError):
+				pipeline.execute()
 
 	def expire_key(self, key, time, *, user=None, shared=False):
 		key = self.make_key(key, user, shared)
@@ -318,6 +566,24 @@ class RedisWrapper(redis.Redis):
 		except redis.exceptions.ConnectionError:
 			pass
 
+	def hget_names(self, names: list | tuple, key: str, shared=False) -> dict:
+		"""
+		Same as calling `hget` on multiple hash names with a common key, run in a single pipeline
+
+		:param names: The hash names
+		:param key: The common key
+		:return: dict of hash name and value
+		"""
+		with self.pipeline(transaction=False) as pipeline:
+			for name in names:
+				pipeline.hget_value(name, key, shared=shared)
+			try:
+				values = pipeline.execute()
+			except redis.exceptions.ConnectionError:
+				values = [None] * len(names)
+
+		return dict(zip(names, values, strict=True))
+
 	def hdel_keys(self, name_starts_with, key):
 		"""Delete hash names with wildcard `*` and key"""
 		pipeline = self.pipeline()
@@ -433,6 +699,77 @@ CacheStatistics = namedtuple(
 )
 _PLACEHOLDER_VALUE = CachedValue(value=None, expiry=-1)
 
+CachedDocument = namedtuple("CachedDocument", ["value", "expiry", "size"])
+DocumentCacheStatistics = namedtuple(
+	"DocumentCacheStatistics",
+	["hits", "misses", "evictions", "capacity", "used", "max_bytes", "used_bytes", "hit_ratio"],
+)
+_PLACEHOLDER_DOCUMENT = CachedDocument(value=None, expiry=-1, size=0)
+
+DEFAULT_DOCUMENT_CACHE_SIZE = 256
+DEFAULT_DOCUMENT_CACHE_BYTES = 8 * 1024 * 1024
+DOCUMENT_CACHE_TTL = 60 * 60  # Same as `get_cached_doc`
+
+
+class DocumentStore:
+	"""In-process LRU cache of documents of one doctype, bounded by count and pickled size."""
+
+	def __init__(self, doctype: str, maxsize: int, max_bytes: int, ttl: int) -> None:
+		self.doctype = doctype
+		self.maxsize = maxsize
+		self.max_bytes = max_bytes
+		self.ttl = ttl
+		self.entries = LRUCache(maxsize, max_bytes=max_bytes, sizeof=lambda entry: entry.size)
+
+		# Unlike `entries.stats`, these don't count expired documents as hits.
+		# These can be *slightly* off, these aren't guarded by a mutex.
+		self.hits = self.misses = 0
+
+	def get(self, key: bytes):
+		entry = self.entries.get(key)
+		if entry and time.monotonic() < entry.expiry:
+			self.hits += 1
+			return entry.value
+
+		self.misses += 1
+
+	def reserve(self, key: bytes):
+		"""Store a placeholder to detect race between GET and parallel invalidation."""
+		self.entries[key] = _PLACEHOLDER_DOCUMENT
+
+	def put(self, key: bytes, value, size: int) -> bool:
+		"""Store value if placeholder for `key` still exists, return `True` if stored."""
+		with self.entries.lock:
+			if self.entries.peek(key) is not _PLACEHOLDER_DOCUMENT:
+				return False
+
+			return self.entries.set(
+				key, CachedDocument(value=value, expiry=time.monotonic() + self.ttl, size=size)
+			)
+
+	def pop(self, key: bytes):
+		self.entries.pop(key)
+
+	def clear(self):
+		self.entries.clear()
+
+	@property
+	def used_bytes(self) -> int:
+		return self.entries.used_bytes
+
+	@property
+	def statistics(self) -> DocumentCacheStatistics:
+		return DocumentCacheStatistics(
+			hits=self.hits,
+			misses=self.misses,
+			evictions=self.entries.stats.evictions,
+			capacity=self.maxsize,
+			used=len(self.entries),
+			max_bytes=self.max_bytes,
+			used_bytes=self.used_bytes,
+			hit_ratio=round(self.hits / (self.hits + self.misses), 2) if self.hits else None,
+		)
+
 
 class ClientCache:
 	"""A subset of RedisWrapper that keeps "local" cache across requests.
@@ -460,16 +797,32 @@ class ClientCache:
 		  default Redis cache behaviour.
 		- Never use `nts.cache`'s request local cache along with client-side cache. Two
 		  different copies of same key are a big source of data races.
-		- This cache uses simple FIFO eviction policy. Make sure your access patterns don't cause
-		  the worst case behaviour for this policy. E.g. looping over `maxsize` items repeatedly.
+		- This cache evicts least recently used keys. New keys are only admitted into a full cache
+		  if they're read more frequently than the key they'd replace (TinyLFU, see
+		  `nts.utils.lru`), so looping over many keys once doesn't evict frequently read keys.
+
+	Documents:
+		`get_cached_doc` can keep documents of selected doctypes in worker memory too. This is
+		opt-in per doctype using site config, every doctype gets its own LRU store limited by
+		number of documents and their (pickled) size:
+
+			"local_document_cache": {
+				"Company": {"maxsize": 64, "max_bytes": 4194304, "ttl": 600},
+				"Currency": {}
+			}
+
+		Documents are invalidated by `clear_document_cache` (i.e. on every update) and by Redis
+		like other keys. Returned documents are shared across requests, treat them as read-only.
 	"""
 
 	def __init__(self, maxsize: int = 1024, ttl=10 * 60, monitor: RedisWrapper | None = None) -> None:
 		self.maxsize = maxsize or 1024  # Expect 1024 * 4kb objects ~ 4MB
 		self.local_ttl = ttl
-		# This guards writes to self.cache, reads are done without a lock.
-		self.lock = threading.RLock()
-		self.cache: dict[bytes, CachedValue] = {}
+		self.cache: LRUCache = LRUCache(self.maxsize, admission=True, name="client_cache")
+		# This guards writes to self.cache and document stores.
+		self.lock = self.cache.lock
+		# (site, doctype) -> DocumentStore, see `get_document`
+		self.document_stores: dict[tuple[str, str], DocumentStore] = {}
 
 		self.invalidator = nts.cache
 		self.healthy = True
@@ -505,13 +858,10 @@ class ClientCache:
 			return self.redis.get_value(key, shared=shared, generator=generator)
 
 		key = self.redis.make_key(key, shared=shared)
-		try:
-			val = self.cache[key]
-			if time.monotonic() < val.expiry:
-				self.hits += 1
-				return val.value
-		except KeyError:
-			pass
+		val = self.cache.get(key)
+		if val and time.monotonic() < val.expiry:
+			self.hits += 1
+			return val.value
 
 		self.misses += 1
 
@@ -532,7 +882,6 @@ class ClientCache:
 			else:
 				return None
 
-		self.ensure_max_size()
 		with self.lock:
 			# Note: If our placeholder value is not present then it's possible that value we just
 			# got is invalidated, so we should not store it in local cache.
@@ -543,7 +892,6 @@ class ClientCache:
 
 	def set_value(self, key, val, *, shared=False):
 		key = self.redis.make_key(key, shared=shared)
-		self.ensure_max_size()
 		self.redis.set_value(key, val, shared=True)
 		with self.lock:
 			self.cache[key] = CachedValue(value=val, expiry=time.monotonic() + self.local_ttl)
@@ -565,16 +913,101 @@ class ClientCache:
 		key = nts.get_document_cache_key(doctype, name)
 		return self.get_value(key, generator=lambda: nts.get_doc(doctype, name))
 
-	def ensure_max_size(self):
-		if len(self.cache) >= self.maxsize:
-			with self.lock, suppress(RuntimeError):
-				self.cache.pop(next(iter(self.cache)), None)
+	def get_document_store(self, doctype: str) -> DocumentStore | None:
+		"""Return in-process store for documents of `doctype` if enabled in site config."""
+		if not self.healthy:
+			return
+
+		site = nts.local.site
+		if store := self.document_stores.get((site, doctype)):
+			return store
+
+		config = nts.local.conf.get("local_document_cache")
+		if not config or doctype not in config:
+			return
+
+		options = (config.get(doctype) if isinstance(config, dict) else None) or {}
+		with self.lock:
+			return self.document_stores.setdefault(
+				(site, doctype),
+				DocumentStore(
+					doctype,
+					maxsize=options.get("maxsize") or DEFAULT_DOCUMENT_CACHE_SIZE,
+					max_bytes=options.get("max_bytes") or DEFAULT_DOCUMENT_CACHE_BYTES,
+					ttl=options.get("ttl") or self.local_ttl,
+				),
+			)
+
+	def get_document(self, doctype: str, key: str):
+		"""Get cached document stored at `key` (see `get_document_cache_key`), checking worker
+		memory first if enabled for `doctype`."""
+		if not (store := self.get_document_store(doctype)):
+			return nts.cache.get_value(key)
+
+		key = self.redis.make_key(key)
+		if (doc := store.get(key)) is not None:
+			return doc
+
+		with self.lock:
+			store.reserve(key)
+
+		try:
+			# Read through tracked connection, so Redis notifies us when this key changes.
+			raw = self.redis.get(key)
+		except redis.exceptions.ConnectionError:
+			raw = None
+
+		if raw is None:
+			with self.lock:
+				store.pop(key)
+			return
+
+		doc = pickle.loads(raw)
+		with self.lock:
+			store.put(key, doc, len(raw))
+		return doc
+
+	def set_document(self, doctype: str, key: str, doc) -> None:
+		if not self.get_document_store(doctype):
+			nts.cache.set_value(key, doc, expires_in_sec=DOCUMENT_CACHE_TTL)
+			return
+
+		# Not stored locally yet, next read goes through tracked connection to enable invalidation.
+		with suppress(redis.exceptions.ConnectionError):
+			self.redis.set(
+				self.redis.make_key(key),
+				pickle.dumps(doc, protocol=DEFAULT_PICKLE_PROTOCOL),
+				ex=DOCUMENT_CACHE_TTL,
+			)
+
+	def clear_documents(self, doctype: str, key: str | None = None) -> None:
+		"""Remove document at `key` (or all documents of `doctype`) from worker memory."""
+		if not (store := self.document_stores.get((nts.local.site, doctype))):
+			return
+
+		with self.lock:
+			if key is None:
+				store.clear()
+			else:
+				store.pop(self.redis.make_key(key))
+
+	@property
+	def document_cache_statistics(self) -> dict[str, DocumentCacheStatistics]:
+		site = nts.local.site
+		return {
+			doctype: store.statistics
+			for (_site, doctype), store in self.document_stores.items()
+			if _site == site
+		}
 
 	def delete_value(self, key, *, shared=False):
-		key = self.redis.make_key(key, shared=shared)
-		self.redis.delete_value(key, shared=True)
+		"""Delete key or list of keys."""
+		keys = key if isinstance(key, list | tuple) else (key,)
+		keys = [self.redis.make_key(k, shared=shared) for k in keys]
+		self.redis.delete_value(keys, shared=True)
 		with self.lock:
-			self.cache.pop(key, None)
+			for key in keys:
+				self.cache.pop(key, None)
 
 	def delete_keys(self, pattern):
 		keys = self.redis.get_keys(pattern)
@@ -620,19 +1053,23 @@ class ClientCache:
 		with self.lock:
 			for key in message["data"]:
 				self.cache.pop(key, None)
+				for store in self.document_stores.values():
+					store.pop(key)
 
 	def _handle_persistent_cache_invalidation(self, message):
 		import nts.utils.caching
 		from nts.cache_manager import clear_controller_cache
+		from nts.database.query_plan import query_plan_cache
 
 		if message["type"] != "message":
 			return
 
 		payload = nts._dict(json.loads(message["data"]))
 		clear_controller_cache(payload.doctype, site=payload.site)
+		query_plan_cache.clear(payload.doctype, site=payload.site)
 
 		if not payload.doctype:
-			nts.utils.caching._SITE_CACHE.clear()
+			nts.utils.caching.clear_site_cache()
 
 	def _exception_handler(self, exc, pubsub, pubsub_thread):
 		if isinstance(exc, (redis.exceptions.ConnectionError)):
@@ -649,6 +1086,8 @@ class ClientCache:
 	def clear_cache(self):
 		with self.lock:
 			self.cache.clear()
+			for store in self.document_stores.values():
+				store.clear()
 
 	@property
 	def statistics(self) -> CacheStatistics:
@@ -3,10 +3,11 @@
 
 import datetime
 import functools
+import itertools
 import mimetypes
 import os
 import sys
-from collections.abc import Iterable
+from collections.abc import Callable, Iterable
 from decimal import Decimal
 from pathlib import Path
 from re import Match
@@ -155,6 +156,53 @@ def as_json():
 	return response
 
 
+STREAM_FORMATS = {"ndjson": "application/x-ndjson", "json": "application/json"}
+STREAM_CHUNK_SIZE = 500
+
+
+def as_stream(
+	rows: Iterable, stream_format: str = "ndjson", trailer: Callable[[], dict] | None = None
+) -> Response:
+	"""Return a response which serializes `rows` while they are being sent.
+
+	Rows are consumed lazily in chunks of `STREAM_CHUNK_SIZE`, so memory used by the worker doesn't
+	grow with the size of the result.
+
+	Formats:
+	        - `ndjson`: one JSON document per line.
+	        - `json`: `{"data": [...]}` followed by keys returned by `trailer` (called after all rows
+	          are sent), same shape as a regular list response.
+	"""
+	if stream_format not in STREAM_FORMATS:
+		nts.throw(
+			_("Invalid stream format {0}, expected one of {1}").format(stream_format, list(STREAM_FORMATS))
+		)
+
+	def dumps(obj) -> bytes:
+		return orjson_dumps(obj, default=json_handler, decode=False)
+
+	def generate():
+		is_json = stream_format == "json"
+		if is_json:
+			yield b'{"data":['
+
+		separator = b"," if is_json else b"\n"
+		for index, chunk in enumerate(itertools.batched(rows, STREAM_CHUNK_SIZE, strict=False)):
+			body = separator.join(dumps(row) for row in chunk)
+			if is_json:
+				yield b"," + body if index else body
+			else:
+				yield body + b"\n"
+
+		if is_json:
+			yield b"]"
+			for key, value in (trailer() if trailer else {}).items():
+				yield b"," + dumps(key) + b":" + dumps(value)
+			yield b"}"
+
+	return Response(generate(), mimetype=STREAM_FORMATS[stream_format], direct_passthrough=True)
+
+
 def as_pdf():
 	response = Response()
 	response.mimetype = "application/pdf"
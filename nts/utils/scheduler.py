@@ -12,8 +12,11 @@ import datetime
 import os
 import random
 import time
-from typing import NoReturn
+from collections import defaultdict
+from contextlib import suppress
+from typing import TYPE_CHECKING, NoReturn
 
+import redis
 from croniter import CroniterBadCronError
 from filelock import FileLock, Timeout
 
@@ -22,8 +25,19 @@ from nts.utils import cint, get_bench_path, get_datetime, get_sites, now_datetim
 from nts.utils.background_jobs import set_niceness
 from nts.utils.caching import redis_cache
 
+if TYPE_CHECKING:
+	from nts.core.doctype.scheduled_job_type.scheduled_job_type import ScheduledJobType
+
 DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
 DEFAULT_SCHEDULER_TICK = 4 * 60
+# All jobs of all sites are checked after this many seconds, other ticks only check jobs due as per
+# index of next execution times, see `index_scheduled_jobs`
+FULL_SCAN_INTERVAL = 60 * 60
+# Sorted set of "site|Scheduled Job Type" scored by UNIX timestamp of next execution, shared by sites
+SCHEDULED_JOBS_INDEX_KEY = "scheduled_jobs_by_next_execution"
+
+# time.monotonic() after which next tick checks all jobs
+_next_full_scan = 0.0
 
 
 def cprint(*args, **kwargs):
@@ -92,22 +106,38 @@ def sleep_duration(tick):
 
 
 def enqueue_events_for_all_sites() -> None:
-	"""Loop through sites and enqueue events that are not already queued"""
+	"""Loop through sites and enqueue events that are not already queued
+
+	Only sites having due jobs as per index of next execution times are checked, except once every
+	`FULL_SCAN_INTERVAL` when all jobs of all sites are checked and indexed again. This indexes jobs
+	missing in index, e.g. after redis is restarted."""
+	global _next_full_scan
 
+	full_scan = time.monotonic() >= _next_full_scan
 	with nts.init_site():
 		sites = get_sites()
+		if not full_scan:
+			try:
+				due_jobs = get_due_jobs(sites)
+			except redis.exceptions.ConnectionError:
+				full_scan = True
+
+	if full_scan:
+		_next_full_scan = time.monotonic() + FULL_SCAN_INTERVAL
+	else:
+		sites = list(due_jobs)
 
 	# Sites are sorted in alphabetical order, shuffle to randomize priorities
 	random.shuffle(sites)
 
 	for site in sites:
 		try:
-			enqueue_events_for_site(site=site)
+			enqueue_events_for_site(site=site, job_types=None if full_scan else due_jobs[site])
 		except Exception:
 			nts.logger("scheduler").debug(f"Failed to enqueue events for site: {site}", exc_info=True)
 
 
-def enqueue_events_for_site(site: str) -> None:
+def enqueue_events_for_site(site: str, job_types: list[str] | None = None) -> None:
 	def log_exc():
 		nts.logger("scheduler").error(f"Exception in Enqueue Events for Site {site}", exc_info=True)
 
@@ -117,7 +147,7 @@ def enqueue_events_for_site(site: str) -> None:
 		if is_scheduler_inactive():
 			return
 
-		enqueue_events()
+		enqueue_events(job_types)
 
 		nts.logger("scheduler").debug(f"Queued events for site {site}")
 	except Exception as e:
@@ -129,24 +159,78 @@ def enqueue_events_for_site(site: str) -> None:
 		nts.destroy()
 
 
-def enqueue_events() -> list[str] | None:
+def enqueue_events(job_types: list[str] | None = None) -> list[str] | None:
+	"""Enqueue due jobs among `job_types` (names of Scheduled Job Types), all jobs if not specified.
+
+	Checked jobs which aren't enqueued are indexed again with their next execution time."""
 	if schedule_jobs_based_on_activity():
 		enqueued_jobs = []
-		all_jobs = nts.get_all("Scheduled Job Type", filters={"stopped": 0}, fields="*")
+		filters = {"stopped": 0}
+		if job_types is not None:
+			filters["name"] = ("in", job_types)
+
+		all_jobs = nts.get_all("Scheduled Job Type", filters=filters, fields="*")
 		random.shuffle(all_jobs)
+		jobs_to_index = []
 		for job_type in all_jobs:
 			job_type = nts.get_doc(doctype="Scheduled Job Type", **job_type)
 			try:
 				if job_type.enqueue():
 					enqueued_jobs.append(job_type.method)
+				else:
+					jobs_to_index.append(job_type)
 			except CroniterBadCronError:
 				nts.logger("scheduler").error(
 					f"Invalid Job on {nts.local.site} - {job_type.name}", exc_info=True
 				)
 
+		# enqueued jobs are indexed when they run, see `ScheduledJobType.update_scheduler_log`
+		index_scheduled_jobs(jobs_to_index)
+		if job_types is not None:
+			# stopped or deleted jobs
+			found = {job_type.name for job_type in all_jobs}
+			remove_from_index([name for name in job_types if name not in found])
+
 		return enqueued_jobs
 
 
+def get_due_jobs(sites: list[str]) -> dict[str, list[str]]:
+	"""Names of Scheduled Job Types due as per index, by site. Jobs of removed sites are removed."""
+	due_jobs = defaultdict(list)
+	removed_sites = []
+	for member in nts.cache.zrangebyscore(SCHEDULED_JOBS_INDEX_KEY, "-inf", time.time()):
+		site, job_type = member.decode().split("|", 1)
+		if site in sites:
+			due_jobs[site].append(job_type)
+		else:
+			removed_sites.append(member)
+
+	if removed_sites:
+		nts.cache.zrem(SCHEDULED_JOBS_INDEX_KEY, *removed_sites)
+	return due_jobs
+
+
+def index_scheduled_jobs(job_types: list["ScheduledJobType"]) -> None:
+	"""Store next execution time of `job_types` of current site in index of due jobs."""
+	# next execution is in site's time zone, index has UNIX timestamps
+	now, timestamp = now_datetime(), time.time()
+	mapping = {}
+	for job_type in job_types:
+		with suppress(CroniterBadCronError):
+			next_execution = job_type.get_next_execution()
+			mapping[f"{nts.local.site}|{job_type.name}"] = timestamp + (next_execution - now).total_seconds()
+
+	if mapping:
+		with suppress(redis.exceptions.ConnectionError):
+			nts.cache.zadd(SCHEDULED_JOBS_INDEX_KEY, mapping)
+
+
+def remove_from_index(job_types: list[str]) -> None:
+	if job_types:
+		with suppress(redis.exceptions.ConnectionError):
+			nts.cache.zrem(SCHEDULED_JOBS_INDEX_KEY, *(f"{nts.local.site}|{name}" for name in job_types))
+
+
 def is_scheduler_inactive(verbose=True) -> bool:
 	if nts.local.conf.maintenance_mode:
 		if verbose:
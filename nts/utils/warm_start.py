@@ -0,0 +1,151 @@
+# Copyright (c) 2026, nts Technologies Pvt. Ltd. and Contributors
+# License: MIT. See LICENSE
+
+"""
+On-disk cache of app metadata which every new process otherwise computes from app files.
+
+Merged hooks, module map and import paths of doctype controllers only change when apps are
+installed or updated, so they are computed once and stored in a file in sites directory. New web
+workers, background workers and CLI commands load this file instead of importing hooks of all apps
+and reading modules of all apps when these aren't available in redis.
+
+The cache is keyed on apps on the bench, their git HEAD and modification times of files these values
+are computed from. A stale cache is ignored and rebuilt. The key is computed once per process.
+"""
+
+import hashlib
+import os
+import pickle
+import sys
+from contextlib import suppress
+
+import nts
+
+WARM_START_FILE = "warm_start_cache.pickle"
+VERSION = 1
+
+# sites path -> cache data
+_loaded: dict[str, dict] = {}
+
+
+def get_app_modules() -> dict[str, list[str]]:
+	"""Modules of all apps on bench."""
+	return load()["app_modules"]
+
+
+def get_controller_modules(sites_path: str | None = None) -> list[str]:
+	"""Import paths of controller modules of all doctypes in all apps on bench."""
+	return load(sites_path)["controller_modules"]
+
+
+def get_hooks(apps: list[str]) -> dict | None:
+	"""Merged hooks of `apps` if cached."""
+	return load()["hooks"].get(tuple(apps))
+
+
+def set_hooks(apps: list[str], hooks: dict):
+	data = load()
+	data["hooks"][tuple(apps)] = hooks
+	save(data)
+
+
+def load(sites_path: str | None = None) -> dict:
+	sites_path = sites_path or nts.local.sites_path
+	if data := _loaded.get(sites_path):
+		return data
+
+	apps = nts.get_all_apps(with_internal_apps=False, sites_path=sites_path)
+	key = get_cache_key(apps)
+	data = None
+	with suppress(Exception):
+		with open(get_cache_path(sites_path), "rb") as f:
+			data = pickle.load(f)
+
+	if not data or data.get("key") != key:
+		data = build(apps, key)
+		save(data, sites_path)
+
+	_loaded[sites_path] = data
+	return data
+
+
+def build(apps: list[str], key: str) -> dict:
+	app_modules = {app: [nts.scrub(module) for module in nts.get_module_list(app)] for app in apps}
+	controller_modules = []
+	for app, modules in app_modules.items():
+		for module in modules:
+			doctype_path = nts.get_app_path(app, module, "doctype")
+			if not os.path.isdir(doctype_path):
+				continue
+			for doctype in sorted(os.listdir(doctype_path)):
+				if os.path.isfile(os.path.join(doctype_path, doctype, f"{doctype}.py")):
+					controller_modules.append(f"{app}.{module}.doctype.{doctype}.{doctype}")
+
+	return {
+		"key": key,
+		"app_modules": app_modules,
+		"controller_modules": controller_modules,
+		"hooks": {},
+	}
+
+
+def save(data: dict, sites_path: str | None = None):
+	path = get_cache_path(sites_path)
+	temp_path = f"{path}.{os.getpid()}.tmp"
+	try:
+		with open(temp_path, "wb") as f:
+			pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+		os.replace(temp_path, path)
+	except Exception:
+		# e.g. hooks with values that can't be pickled or read only sites directory, cache is optional
+		with suppress(FileNotFoundError):
+			os.remove(temp_path)
+
+
+def clear():
+	"""Remove cache, it's rebuilt on next use."""
+	_loaded.clear()
+	with suppress(FileNotFoundError):
+		os.remove(get_cache_path())
+
+
+def get_cache_path(sites_path: str | None = None) -> str:
+	return os.path.join(sites_path or nts.local.sites_path, WARM_START_FILE)
+
+
+def get_cache_key(apps: list[str]) -> str:
+	parts = [str(VERSION), sys.version]
+	for app in apps:
+		app_path = nts.get_app_path(app)
+		parts.append(app)
+		parts.append(get_git_head(os.path.dirname(app_path)))
+		for path in (app_path, os.path.join(app_path, "hooks.py"), os.path.join(app_path, "modules.txt")):
+			parts.append(str(get_mtime(path)))
+		for module in nts.get_module_list(app):
+			# changes when doctypes are added or removed
+			parts.append(str(get_mtime(os.path.join(app_path, nts.scrub(module), "doctype"))))
+
+	return hashlib.sha1("|".join(parts).encode()).hexdigest()
+
+
+def get_git_head(source_path: str) -> str:
+	"""Commit checked out in the repository, read without spawning git."""
+	git_path = os.path.join(source_path, ".git")
+	try:
+		with open(os.path.join(git_path, "HEAD")) as f:
+			head = f.read().strip()
+	except OSError:
+		return ""
+
+	if head.startswith("ref:"):
+		# commit of a branch is either in its ref file or in packed-refs, mtimes cover both
+		ref = head.removeprefix("ref:").strip()
+		return f"{head}:{get_mtime(os.path.join(git_path, ref))}:{get_mtime(os.path.join(git_path, 'packed-refs'))}"
+	return head
+
+
+def get_mtime(path: str) -> float | None:
+	try:
+		return os.stat(path).st_mtime
+	except OSError:
+		return None
@@ -1,3 +1,5 @@
+const permission_cache = require("./permission_cache");
+
 const WEBSITE_ROOM = "website";
 const SITE_ROOM = "all";
 
@@ -10,19 +12,13 @@ function nts_handlers(socket) {
 	}
 
 	socket.has_permission = (doctype, name) => {
+		// resolves only if user has permission, checks are cached and batched
 		return new Promise((resolve) => {
-			socket
-				.nts_request("/api/method/nts.realtime.has_permission", {
-					doctype,
-					name: name || "",
-				})
-				.then((res) => res.json())
-				.then(({ message }) => {
-					if (message) {
-						resolve();
-					}
-				})
-				.catch((err) => console.log("Can't check permissions", err));
+			permission_cache.has_permission(socket, doctype, name).then((allowed) => {
+				if (allowed) {
+					resolve();
+				}
+			});
 		});
 	};
 
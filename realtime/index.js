@@ -4,6 +4,7 @@ const http = require("node:http");
 const fs = require("fs");
 const path = require("path");
 const { get_conf, get_redis_subscriber } = require("../node_utils");
+const permission_cache = require("./permission_cache");
 const conf = get_conf();
 
 const server = http.createServer();
@@ -70,18 +71,29 @@ realtime.on("connection", on_connection);
 // =======================
 
 // Consume events sent from python via redis pub-sub channel.
+function emit_event(site, message) {
+	let namespace = "/" + site;
+	if (message.event == "clear_permission_cache") {
+		permission_cache.clear(site, message.message.user);
+	} else if (message.room) {
+		io.of(namespace).to(message.room).emit(message.event, message.message);
+	} else {
+		// publish to ALL sites only used for things like build event.
+		realtime.emit(message.event, message.message);
+	}
+}
+
 const subscriber = get_redis_subscriber();
 
 (async () => {
 	await subscriber.connect();
 	subscriber.subscribe("events", (message) => {
 		message = JSON.parse(message);
-		let namespace = "/" + message.namespace;
-		if (message.room) {
-			io.of(namespace).to(message.room).emit(message.event, message.message);
+		if (message.events) {
+			// events published together after a transaction, see `emit_many_via_redis`
+			message.events.forEach((event) => emit_event(message.namespace, event));
 		} else {
-			// publish to ALL sites only used for things like build event.
-			realtime.emit(message.event, message.message);
+			emit_event(message.namespace, message);
 		}
 	});
 })();
@@ -0,0 +1,101 @@
+// Permission checks done for subscribing to rooms are cached per user for a short while and
+// requests made around the same time are sent to the server in one batch. This avoids flooding
+// web workers with requests when many clients reconnect at once, e.g. after a restart.
+
+const CACHE_TTL = 30 * 1000; // ms
+const MAX_CACHE_SIZE = 10000;
+const BATCH_DELAY = 20; // ms
+const MAX_BATCH_SIZE = 50; // keep in sync with `MAX_PERMISSION_CHECKS` in nts/realtime.py
+
+// site|user|doctype|name -> {allowed, expiry}
+const cache = new Map();
+// socket -> {docs: Map(doctype|name -> [callbacks]), timer}
+const pending = new WeakMap();
+
+function cache_key(socket, doctype, name) {
+	return [socket.nsp.name, socket.user, doctype, name].join("|");
+}
+
+function get_cached(key) {
+	const entry = cache.get(key);
+	if (!entry) return;
+	if (entry.expiry < Date.now()) {
+		cache.delete(key);
+		return;
+	}
+	return entry.allowed;
+}
+
+function set_cached(key, allowed) {
+	if (cache.size >= MAX_CACHE_SIZE) {
+		// Map preserves insertion order, so this drops the oldest entry
+		cache.delete(cache.keys().next().value);
+	}
+	cache.set(key, { allowed, expiry: Date.now() + CACHE_TTL });
+}
+
+function has_permission(socket, doctype, name) {
+	name = name || "";
+	const key = cache_key(socket, doctype, name);
+	const allowed = get_cached(key);
+	if (allowed !== undefined) {
+		return Promise.resolve(allowed);
+	}
+
+	return new Promise((resolve) => {
+		let batch = pending.get(socket);
+		if (!batch) {
+			batch = { docs: new Map(), timer: setTimeout(() => flush(socket), BATCH_DELAY) };
+			pending.set(socket, batch);
+		}
+
+		// same document requested again while a check is pending
+		const doc_key = JSON.stringify([doctype, name]);
+		if (!batch.docs.has(doc_key)) batch.docs.set(doc_key, []);
+		batch.docs.get(doc_key).push(resolve);
+
+		if (batch.docs.size >= MAX_BATCH_SIZE) {
+			clearTimeout(batch.timer);
+			flush(socket);
+		}
+	});
+}
+
+function flush(socket) {
+	const batch = pending.get(socket);
+	if (!batch) return;
+	pending.delete(socket);
+
+	const doc_keys = Array.from(batch.docs.keys());
+	const docs = doc_keys.map((doc_key) => JSON.parse(doc_key));
+
+	socket
+		.nts_request("/api/method/nts.realtime.has_permissions", { docs: JSON.stringify(docs) })
+		.then((res) => res.json())
+		.then(({ message }) => {
+			docs.forEach(([doctype, name], i) => {
+				const allowed = Boolean(message && message[i]);
+				set_cached(cache_key(socket, doctype, name), allowed);
+				batch.docs.get(doc_keys[i]).forEach((resolve) => resolve(allowed));
+			});
+		})
+		.catch((err) => {
+			console.log("Can't check permissions", err);
+			batch.docs.forEach((callbacks) => callbacks.forEach((resolve) => resolve(false)));
+		});
+}
+
+// Called when permissions change on server, see `clear_permission_cache` in nts/realtime.py
+function clear(site, user) {
+	const prefix = user ? `/${site}|${user}|` : `/${site}|`;
+	for (const key of cache.keys()) {
+		if (key.startsWith(prefix)) {
+			cache.delete(key);
+		}
+	}
+}
+
+module.exports = {
+	has_permission,
+	clear,
+};